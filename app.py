@@ -5,7 +5,8 @@ import os
 # Agregar el directorio raíz al path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from database.db_manager import init_database, migrate_database, obtener_diplomados
+from database.db_manager import asegurar_esquema
+from utils.selectores import hay_diplomados, selector_diplomado
 
 # Configuración de la página
 st.set_page_config(
@@ -39,9 +40,8 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Inicializar la base de datos
-init_database()
-migrate_database()
+# Inicializar la base de datos (solo migra la primera vez en cada proceso)
+asegurar_esquema()
 
 # Intentar recuperar sesión desde query params
 try:
@@ -95,26 +95,18 @@ def main():
     # Acceso a diplomados (sin contraseña)
     st.markdown("## 📚 Selecciona tu Diplomado")
     
-    # Obtener diplomados disponibles
-    diplomados = obtener_diplomados()
-    
-    if diplomados:
+    if hay_diplomados():
         # Centrar el formulario
         col1, col2, col3 = st.columns([1, 2, 1])
         
         with col2:
-            diplomado_opciones = {d['nombre']: d['id'] for d in diplomados}
-            
-            diplomado_seleccionado = st.selectbox(
-                "Selecciona tu Diplomado",
-                options=list(diplomado_opciones.keys()),
-                key="select_diplomado"
-            )
+            # Solo se cargan los primeros diplomados que coinciden con la búsqueda
+            diplomado = selector_diplomado("Selecciona tu Diplomado", "select_diplomado")
             
             st.markdown("")  # Espaciado
             
-            if st.button("📖 Ver Diplomado", type="primary", use_container_width=True):
-                diplomado_id = diplomado_opciones[diplomado_seleccionado]
+            if st.button("📖 Ver Diplomado", type="primary", use_container_width=True, disabled=diplomado is None):
+                diplomado_id = diplomado.id
                 st.session_state.tipo_usuario = 'alumno'
                 st.session_state.diplomado_id = diplomado_id
                 # Guardar en query params para persistencia
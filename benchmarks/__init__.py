@@ -0,0 +1,11 @@
+"""
+Benchmarks de database/db_manager.py sobre catálogos generados.
+
+Genera un catálogo realista del tamaño indicado (diplomados, módulos y
+sesiones) en una base de datos aparte, mide cada función pública de
+db_manager y guarda los percentiles en JSON para comparar corridas.
+
+Uso:
+    python -m benchmarks --escala chica --salida base.json
+    python -m benchmarks --escala chica --comparar base.json --umbral 0.2
+"""
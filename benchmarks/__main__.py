@@ -0,0 +1,136 @@
+"""
+Línea de comandos de los benchmarks: python -m benchmarks --help
+
+Retorna código de salida 1 si alguna función pública de db_manager no tiene
+escenario o si, con --comparar, algún escenario empeoró más que --umbral.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+if __package__ in (None, ""):
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_manager
+
+from benchmarks import resultados
+from benchmarks.escenarios import Catalogo, definir_escenarios, funciones_sin_escenario, medir, rss_pico_mb
+from benchmarks.generador import ESCALAS, preparar_catalogo
+
+
+def _argumentos(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Mide las funciones públicas de db_manager sobre un catálogo generado.",
+    )
+    parser.add_argument("--escala", choices=ESCALAS, default="chica", help="tamaño predefinido del catálogo")
+    parser.add_argument("--diplomados", type=int, help="reemplaza la cantidad de diplomados de la escala")
+    parser.add_argument("--modulos", type=int, help="reemplaza la cantidad de módulos de la escala")
+    parser.add_argument("--sesiones", type=int, help="reemplaza la cantidad de sesiones de la escala")
+    parser.add_argument(
+        "--base-datos",
+        help="archivo del catálogo; si existe se reutiliza sin generar (por defecto, uno temporal)",
+    )
+    parser.add_argument("--iteraciones", type=int, default=200, help="llamadas por escenario")
+    parser.add_argument(
+        "--iteraciones-lentas", type=int, default=20,
+        help="llamadas por escenario que calcula un hash de contraseña",
+    )
+    parser.add_argument("--solo", nargs="+", metavar="ESCENARIO", help="mide solo los escenarios con estos prefijos")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="guarda los resultados en este JSON")
+    parser.add_argument("--comparar", metavar="BASE_JSON", help="compara contra los resultados de otra corrida")
+    parser.add_argument(
+        "--umbral", type=float, default=0.2,
+        help="aumento relativo de p50/p95 que cuenta como regresión (0.2 = 20%%)",
+    )
+    return parser.parse_args(argv)
+
+
+def ejecutar(args, ruta):
+    """Genera o reutiliza el catálogo, mide los escenarios y retorna el resultado completo"""
+    diplomados, modulos, sesiones = ESCALAS[args.escala]
+    escala, generacion = preparar_catalogo(
+        ruta, args.diplomados or diplomados, args.modulos or modulos, args.sesiones or sesiones, args.semilla,
+    )
+
+    ruta_original = db_manager.DATABASE_PATH
+    limitar_original = db_manager.LIMITAR_INTENTOS
+    db_manager.DATABASE_PATH = ruta
+    # Cientos de verificaciones seguidas agotarían el límite de intentos del proceso
+    db_manager.LIMITAR_INTENTOS = False
+    try:
+        db_manager.asegurar_esquema()
+        escenarios = definir_escenarios(Catalogo())
+        sin_escenario = funciones_sin_escenario(escenarios)
+        if args.solo:
+            escenarios = [escenario for escenario in escenarios if escenario.nombre.startswith(tuple(args.solo))]
+
+        azar = random.Random(args.semilla)
+        metricas = {}
+        for escenario in escenarios:
+            iteraciones = args.iteraciones_lentas if escenario.lento else args.iteraciones
+            metricas[escenario.nombre] = medir(escenario, iteraciones, azar)
+            m = metricas[escenario.nombre]
+            print(f"  {escenario.nombre:<40} p50 {m['p50_ms']:>9.3f} ms  p95 {m['p95_ms']:>9.3f} ms  "
+                  f"p99 {m['p99_ms']:>9.3f} ms  {m['filas_por_s'] or 0:>11.0f} filas/s")
+    finally:
+        db_manager._reabrir_pool()
+        db_manager.DATABASE_PATH = ruta_original
+        db_manager.LIMITAR_INTENTOS = limitar_original
+
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "entorno": resultados.entorno(),
+        "escala": escala,
+        "generacion": generacion,
+        "escenarios": metricas,
+        "sin_escenario": sin_escenario,
+        "rss_pico_mb": rss_pico_mb(),
+    }
+
+
+def main(argv=None):
+    args = _argumentos(argv)
+
+    if args.base_datos and os.path.abspath(args.base_datos) == os.path.abspath(db_manager.DATABASE_PATH):
+        print(f"❌ {args.base_datos} es la base de datos de la aplicación; usa otro archivo")
+        return 2
+
+    inicio = time.perf_counter()
+    if args.base_datos:
+        resultado = ejecutar(args, args.base_datos)
+    else:
+        with tempfile.TemporaryDirectory() as directorio:
+            resultado = ejecutar(args, os.path.join(directorio, "benchmark.db"))
+    print(f"⏱️ Total {time.perf_counter() - inicio:.1f} s, memoria máxima {resultado['rss_pico_mb']} MiB")
+
+    if args.salida:
+        resultados.guardar(resultado, args.salida)
+        print(f"💾 Resultados guardados en {args.salida}")
+
+    codigo = 0
+    for nombre in resultado["sin_escenario"]:
+        print(f"❌ {nombre}: sin escenario en benchmarks/escenarios.py")
+        codigo = 1
+
+    if args.comparar:
+        base = resultados.cargar(args.comparar)
+        if resultados.escalas_distintas(resultado, base):
+            print(f"⚠️ La base se midió con otra escala: {base.get('escala')}")
+        regresiones = resultados.comparar(resultado, base, args.umbral)
+        for nombre, metrica, antes, ahora, cambio in regresiones:
+            print(f"❌ {nombre} {metrica}: {antes:.3f} -> {ahora:.3f} ms (+{cambio:.0%})")
+        if regresiones:
+            codigo = 1
+        else:
+            print(f"✅ Ningún escenario empeoró más de {args.umbral:.0%} respecto de {args.comparar}")
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,383 @@
+"""
+Prueba de carga de las páginas con sesiones concurrentes de AppTest.
+
+Recorre app.py, pages/2_alumno.py y pages/1_admin.py sin navegador, como lo
+haría un alumno (buscar y abrir su diplomado, cambiar de módulo, desbloquearlo
+y paginar las sesiones) o un administrador (iniciar sesión, editar una sesión,
+crear varias en la tabla y moverlas de módulo), todos contra el mismo catálogo
+generado. Reporta los percentiles de cada interacción, las consultas SQL que
+ejecuta y los errores, como "database is locked".
+
+AppTest cambia estado global de Streamlit en cada ejecución, así que cada
+sesión simulada corre en su propio proceso: la concurrencia contra la base de
+datos es real, como con varios servidores. Las variables DB_* (p. ej.
+DB_COLA_ESCRITURAS=1 o DB_PERFIL) se aplican a todos los procesos.
+
+Uso:
+    python -m benchmarks.carga --alumnos 20 --admins 2 --rondas 3 --salida carga.json
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import traceback
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from multiprocessing import get_context
+
+if __package__ in (None, ""):
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_manager
+from database.planes import SENTENCIAS_AUDITADAS
+
+from benchmarks import resultados
+from benchmarks.escenarios import percentil
+from benchmarks.generador import AREAS, ESCALAS, PASSWORD, preparar_catalogo
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PASSWORD_ADMIN = "admin123"
+
+# Segundos que puede tardar una ejecución del script antes de contarla como error
+TIEMPO_MAXIMO = 60
+
+# Módulos que abre un alumno en cada ronda
+MODULOS_POR_RONDA = 2
+
+# Sesiones que agrega un administrador en la tabla de cada ronda
+SESIONES_POR_CARGA = 10
+
+# Sentencias ejecutadas por este proceso; el proceso simula una sesión a la vez
+_consultas = [0]
+
+
+class InteraccionFallida(Exception):
+    """Corta la ronda: las interacciones siguientes dependen de la que falló"""
+
+
+def clasificar_error(mensaje):
+    """Agrupa los mensajes de error en los tipos que interesan para dimensionar el servidor"""
+    texto = mensaje.lower()
+    if "database is locked" in texto or "database table is locked" in texto:
+        return "database is locked"
+    if "no hay conexiones libres" in texto:
+        return "pool agotado"
+    if "demasiados intentos" in texto:
+        return "intentos agotados"
+    if "timed out" in texto or "timeout" in texto:
+        return "tiempo agotado"
+    return "otro"
+
+
+def _contar_sentencia(sql):
+    if sql.lstrip().upper().startswith(SENTENCIAS_AUDITADAS):
+        _consultas[0] += 1
+
+
+def _preparar_proceso(ruta):
+    """
+    Apunta db_manager al catálogo de la prueba y cuenta las sentencias de cada conexión.
+
+    Ejecuta una vez la portada sin medirla, para que la primera interacción no
+    incluya importar Streamlit ni compilar las páginas, como en un servidor ya
+    iniciado.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    # Los avisos de AppTest ("missing ScriptRunContext", deprecaciones) se repetirían en cada
+    # proceso; Streamlit vuelve a fijar el nivel de sus loggers al leer la configuración
+    logging.disable(logging.WARNING)
+
+    db_manager.DATABASE_PATH = ruta
+    db_manager.escuchar_sentencias(_contar_sentencia)
+    with contextlib.redirect_stdout(io.StringIO()):
+        db_manager.asegurar_esquema()
+        AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=TIEMPO_MAXIMO).run()
+
+
+class SesionSimulada:
+    """Una visita de un alumno o un administrador, con el registro de cada interacción"""
+
+    def __init__(self, rol, azar):
+        self.rol = rol
+        self.azar = azar
+        self.registros = []
+
+    def medir(self, interaccion, accion):
+        """
+        Ejecuta `accion` (que corre el script y retorna el AppTest) y anota la interacción.
+
+        Cuenta como error una excepción, una excepción del script que muestra
+        Streamlit o un st.error. Lanza InteraccionFallida si hubo error.
+        """
+        _consultas[0] = 0
+        inicio = time.perf_counter()
+        error = None
+        try:
+            at = accion()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        else:
+            if at.exception:
+                error = at.exception[0].message
+            elif at.error:
+                error = at.error[0].value
+        self.registros.append({
+            "rol": self.rol,
+            "interaccion": interaccion,
+            "ms": (time.perf_counter() - inicio) * 1000,
+            "consultas": _consultas[0],
+            "error": error,
+        })
+        if error is not None:
+            raise InteraccionFallida(error)
+
+
+def _boton(at, inicio_etiqueta):
+    return next(boton for boton in at.button if boton.label.startswith(inicio_etiqueta))
+
+
+def _hay(elementos, clave):
+    return any(elemento.key == clave for elemento in elementos)
+
+
+def _clave_con_prefijo(elementos, prefijo):
+    return next(elemento.key for elemento in elementos if elemento.key and elemento.key.startswith(prefijo))
+
+
+def ronda_alumno(sesion):
+    """Busca y abre un diplomado, y recorre algunos de sus módulos"""
+    from streamlit.testing.v1 import AppTest
+
+    azar = sesion.azar
+    at = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=TIEMPO_MAXIMO)
+    sesion.medir("inicio", at.run)
+
+    texto = f"Diplomado en {azar.choice(AREAS)[:4]}"
+    sesion.medir("buscar diplomado", lambda: at.text_input(key="select_diplomado_busqueda").input(texto).run())
+    if not _hay(at.selectbox, "select_diplomado"):
+        # Ningún diplomado de esa área en un catálogo chico
+        sesion.medir("buscar diplomado", lambda: at.text_input(key="select_diplomado_busqueda").input("").run())
+    selector = at.selectbox(key="select_diplomado")
+    selector.select_index(azar.randrange(len(selector.options)))
+    sesion.medir("abrir diplomado", lambda: _boton(at, "📖").click().run())
+
+    modulos = [boton.key for boton in at.button if boton.key and boton.key.startswith("btn_mod_")]
+    desbloqueados = set()
+    for clave in azar.sample(modulos, min(MODULOS_POR_RONDA, len(modulos))):
+        modulo_id = int(clave.rsplit("_", 1)[1])
+        sesion.medir("cambiar módulo", lambda: at.button(key=clave).click().run())
+        if modulo_id not in desbloqueados:
+            at.text_input(key=f"pass_mod_{modulo_id}").input(PASSWORD)
+            sesion.medir("desbloquear módulo", lambda: _boton(at, "🔓").click().run())
+            desbloqueados.add(modulo_id)
+        siguiente = f"pagina_clases_{modulo_id}_siguiente"
+        if _hay(at.button, siguiente):
+            sesion.medir("página siguiente", lambda: at.button(key=siguiente).click().run())
+
+
+def ronda_admin(sesion):
+    """Inicia sesión y edita, crea en bloque y mueve sesiones de un módulo"""
+    from streamlit.testing.v1 import AppTest
+
+    azar = sesion.azar
+    at = AppTest.from_file(os.path.join(RAIZ, "pages", "1_admin.py"), default_timeout=TIEMPO_MAXIMO)
+    sesion.medir("inicio admin", at.run)
+    at.text_input[0].input(PASSWORD_ADMIN)
+    sesion.medir("iniciar sesión admin", lambda: _boton(at, "Iniciar Sesión").click().run())
+    sesion.medir("menú clases", lambda: _boton(at, "🎥 Clases").click().run())
+
+    texto = f"Diplomado en {azar.choice(AREAS)[:4]}"
+    sesion.medir("buscar diplomado admin", lambda: at.text_input(key="select_dip_clase_busqueda").input(texto).run())
+    if not _hay(at.selectbox, "select_dip_clase"):
+        sesion.medir("buscar diplomado admin", lambda: at.text_input(key="select_dip_clase_busqueda").input("").run())
+    diplomados = at.selectbox(key="select_dip_clase")
+    diplomados.select_index(azar.randrange(len(diplomados.options)))
+    sesion.medir("elegir diplomado", at.run)
+    modulos = at.selectbox(key="select_mod_clase")
+    modulos.select_index(azar.randrange(len(modulos.options)))
+    sesion.medir("elegir módulo", at.run)
+
+    # Editar una sesión de la primera página
+    tabla = _clave_con_prefijo(at.dataframe, "tabla_clases_")
+    at.session_state[tabla] = {"selection": {"rows": [0], "columns": []}}
+    sesion.medir("seleccionar sesión", at.run)
+    clave_nombre = _clave_con_prefijo(at.text_input, "nombre_clase_")
+    at.text_input(key=clave_nombre).input(f"Sesión editada {azar.randrange(10_000)}")
+    sesion.medir("editar sesión", lambda: _boton(at, "💾 Guardar Cambios").click().run())
+
+    # Agregar varias sesiones en el editor de tabla
+    sesion.medir("abrir editor de sesiones", lambda: at.toggle(key="editor_sesiones_abierto").set_value(True).run())
+    editor = _clave_con_prefijo(at.dataframe, "editor_sesiones_")
+    at.session_state[editor] = {
+        "edited_rows": {},
+        "added_rows": [
+            {"numero_sesion": 900 + numero, "fecha_sesion": f"2026-03-{numero + 1:02d}", "nombre": f"Carga {numero}"}
+            for numero in range(SESIONES_POR_CARGA)
+        ],
+        "deleted_rows": [],
+    }
+    sesion.medir("crear sesiones en tabla", lambda: _boton(at, "💾 Guardar Cambios").click().run())
+    sesion.medir("cerrar editor de sesiones", lambda: at.toggle(key="editor_sesiones_abierto").set_value(False).run())
+
+    # Mover dos sesiones a otro módulo
+    if _hay(at.selectbox, "modulo_destino"):
+        seleccion = at.multiselect(key="sesiones_mover")
+        for opcion in azar.sample(seleccion.options, min(2, len(seleccion.options))):
+            seleccion.select(opcion)
+        destino = at.selectbox(key="modulo_destino")
+        destino.select_index(azar.randrange(len(destino.options)))
+        sesion.medir("mover sesiones", lambda: _boton(at, "🔄 Mover").click().run())
+
+
+RONDAS = {"alumno": ronda_alumno, "admin": ronda_admin}
+
+
+def simular_sesion(rol, numero, rondas, semilla):
+    """Simula `rondas` visitas de un alumno o administrador y retorna sus registros"""
+    sesion = SesionSimulada(rol, random.Random(f"{semilla}-{rol}-{numero}"))
+    for _ in range(rondas):
+        try:
+            RONDAS[rol](sesion)
+        except InteraccionFallida:
+            continue
+        except Exception:
+            # Un cambio en las páginas que el guion no contempla: se reporta como error de la ronda
+            sesion.registros.append({
+                "rol": rol, "interaccion": "guion", "ms": 0.0, "consultas": 0,
+                "error": traceback.format_exc(limit=3),
+            })
+    return sesion.registros
+
+
+def resumir(registros):
+    """Percentiles, consultas y errores por interacción"""
+    por_interaccion = defaultdict(list)
+    for registro in registros:
+        por_interaccion[(registro["rol"], registro["interaccion"])].append(registro)
+
+    resumen = {}
+    for (rol, interaccion), grupo in sorted(por_interaccion.items()):
+        tiempos = sorted(registro["ms"] for registro in grupo)
+        consultas = [registro["consultas"] for registro in grupo]
+        errores = sum(1 for registro in grupo if registro["error"])
+        resumen[f"{rol}: {interaccion}"] = {
+            "n": len(grupo),
+            "p50_ms": round(percentil(tiempos, 0.50), 2),
+            "p95_ms": round(percentil(tiempos, 0.95), 2),
+            "p99_ms": round(percentil(tiempos, 0.99), 2),
+            "consultas_media": round(sum(consultas) / len(consultas), 1),
+            "consultas_max": max(consultas),
+            "errores": errores,
+            "tasa_error": round(errores / len(grupo), 4),
+        }
+    return resumen
+
+
+def _argumentos(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.carga",
+        description="Simula alumnos y administradores concurrentes sobre las páginas de Streamlit.",
+    )
+    parser.add_argument("--alumnos", type=int, default=8, help="sesiones de alumno simultáneas")
+    parser.add_argument("--admins", type=int, default=2, help="sesiones de administrador simultáneas")
+    parser.add_argument("--rondas", type=int, default=3, help="visitas completas de cada sesión")
+    parser.add_argument("--procesos", type=int, help="procesos en paralelo (por defecto, uno por sesión)")
+    parser.add_argument("--escala", choices=ESCALAS, default="chica", help="tamaño del catálogo generado")
+    parser.add_argument(
+        "--base-datos",
+        help="archivo del catálogo; si existe se reutiliza sin generar (por defecto, uno temporal)",
+    )
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="guarda los resultados en este JSON")
+    parser.add_argument(
+        "--max-tasa-error", type=float, default=0.0,
+        help="fracción de interacciones con error tolerada antes de salir con código 1",
+    )
+    return parser.parse_args(argv)
+
+
+def ejecutar(args, ruta):
+    """Prepara el catálogo, corre todas las sesiones en paralelo y retorna el resultado completo"""
+    escala, _ = preparar_catalogo(ruta, *ESCALAS[args.escala], args.semilla)
+
+    sesiones = [("alumno", numero) for numero in range(args.alumnos)]
+    sesiones += [("admin", numero) for numero in range(args.admins)]
+    procesos = args.procesos or len(sesiones)
+    print(f"🚦 {args.alumnos} alumnos y {args.admins} administradores, {args.rondas} rondas, {procesos} procesos")
+
+    registros = []
+    inicio = time.perf_counter()
+    # spawn: cada proceso importa Streamlit y db_manager desde cero, sin heredar conexiones abiertas
+    with ProcessPoolExecutor(
+        max_workers=procesos, mp_context=get_context("spawn"), initializer=_preparar_proceso, initargs=(ruta,),
+    ) as ejecutor:
+        futuros = [
+            ejecutor.submit(simular_sesion, rol, numero, args.rondas, args.semilla) for rol, numero in sesiones
+        ]
+        for futuro in as_completed(futuros):
+            registros.extend(futuro.result())
+    segundos = time.perf_counter() - inicio
+
+    errores = [registro for registro in registros if registro["error"]]
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "entorno": resultados.entorno(),
+        "escala": escala,
+        "carga": {"alumnos": args.alumnos, "admins": args.admins, "rondas": args.rondas, "procesos": procesos},
+        "segundos": round(segundos, 2),
+        "interacciones": len(registros),
+        "interacciones_por_s": round(len(registros) / segundos, 2),
+        "tasa_error": round(len(errores) / len(registros), 4) if registros else 0.0,
+        "errores_por_tipo": dict(Counter(clasificar_error(registro["error"]) for registro in errores)),
+        "ejemplos_error": sorted({registro["error"].strip().splitlines()[-1] for registro in errores})[:10],
+        "por_interaccion": resumir(registros),
+    }
+
+
+def _imprimir(resultado):
+    print(f"{'interacción':<44} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'consultas':>10} {'errores':>8}")
+    for nombre, m in resultado["por_interaccion"].items():
+        print(f"{nombre:<44} {m['n']:>5} {m['p50_ms']:>9.1f} {m['p95_ms']:>9.1f} {m['p99_ms']:>9.1f} "
+              f"{m['consultas_media']:>10.1f} {m['errores']:>8}")
+    print(f"⏱️ {resultado['interacciones']} interacciones en {resultado['segundos']:.1f} s "
+          f"({resultado['interacciones_por_s']:.1f}/s), tasa de error {resultado['tasa_error']:.1%}")
+    for tipo, cantidad in resultado["errores_por_tipo"].items():
+        print(f"❌ {tipo}: {cantidad}")
+    for ejemplo in resultado["ejemplos_error"]:
+        print(f"     {ejemplo}")
+
+
+def main(argv=None):
+    args = _argumentos(argv)
+
+    if args.base_datos and os.path.abspath(args.base_datos) == os.path.abspath(db_manager.DATABASE_PATH):
+        print(f"❌ {args.base_datos} es la base de datos de la aplicación; usa otro archivo")
+        return 2
+
+    if args.base_datos:
+        resultado = ejecutar(args, os.path.abspath(args.base_datos))
+    else:
+        with tempfile.TemporaryDirectory() as directorio:
+            resultado = ejecutar(args, os.path.join(directorio, "carga.db"))
+    _imprimir(resultado)
+
+    if args.salida:
+        resultados.guardar(resultado, args.salida)
+        print(f"💾 Resultados guardados en {args.salida}")
+    return 1 if resultado["tasa_error"] > args.max_tasa_error else 0
+
+
+if __name__ == "__main__":
+    # AppTest reemplaza __main__ en cada ejecución: los procesos deben encontrar
+    # las funciones en benchmarks.carga
+    from benchmarks.carga import main as _main
+
+    sys.exit(_main())
@@ -0,0 +1,275 @@
+"""
+Escenarios cronometrados de las funciones públicas de db_manager.
+
+Cada escenario prepara sus argumentos (sin cronometrar), llama a la función y
+anota cuánto tardó y cuántas filas leyó o escribió. Las lecturas se miden sin
+la caché (la función original, como en database/planes.py), porque lo que
+interesa es cómo escala la consulta; las escrituras pasan por la función
+pública completa, con sus reintentos y la invalidación de la caché.
+"""
+import time
+from collections import namedtuple
+
+from database import db_manager
+from database.modelos import Diplomado
+from database.planes import PREFIJOS_PUBLICOS
+
+from benchmarks.generador import PASSWORD, TEMAS, _descripcion
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# `preparar(azar)` retorna los argumentos de una llamada; `lento` marca los
+# escenarios que calculan un hash de contraseña (~100 ms) y se repiten menos;
+# `filas(resultado)` cuenta las filas de una llamada (por defecto contar_filas)
+Escenario = namedtuple("Escenario", ["nombre", "funcion", "preparar", "lento", "filas"], defaults=(False, None))
+
+# Sesiones por llamada en los escenarios de escritura masiva
+SESIONES_POR_LOTE = 50
+
+# Filas que cambian por llamada en guardar_cambios_clases (de cada tipo)
+CAMBIOS_POR_GUARDADO = 5
+
+
+def rss_pico_mb():
+    """Memoria residente máxima del proceso hasta ahora, en MiB (None si no se puede medir)"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo reporta en KiB y macOS en bytes
+    return round(pico / (1024 * 1024 if pico > 1 << 32 else 1024), 1)
+
+
+def percentil(ordenados, fraccion):
+    """Percentil por interpolación lineal de una lista ya ordenada"""
+    if not ordenados:
+        return None
+    posicion = (len(ordenados) - 1) * fraccion
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
+
+
+def contar_filas(resultado):
+    """Filas que leyó o escribió una llamada, según lo que retorna una lectura o escritura por lote"""
+    if resultado is None:
+        return 0
+    if isinstance(resultado, bool):
+        # Verificación de contraseña: leyó una fila
+        return 1
+    if isinstance(resultado, int):
+        # mover_clases_a_modulo, renumerar_clases: filas tocadas
+        return resultado
+    if isinstance(resultado, Diplomado):
+        modulos = resultado.modulos or ()
+        return 1 + len(modulos)
+    if isinstance(resultado, tuple) and hasattr(resultado, "_fields"):
+        return 1
+    if isinstance(resultado, tuple) and all(isinstance(valor, int) for valor in resultado):
+        return sum(resultado)
+    if isinstance(resultado, tuple):
+        # obtener_clases_pagina: (clases, cursor)
+        return len(resultado[0])
+    return len(resultado)
+
+
+def _una_fila(resultado):
+    return 1
+
+
+def _sin_cache(funcion):
+    """La función de lectura original, sin la caché de @_cacheado"""
+    return getattr(funcion, "__wrapped__", funcion)
+
+
+def _fila(sql, parametros=()):
+    with db_manager._conexion() as conn:
+        return conn.execute(sql, parametros).fetchone()
+
+
+class Catalogo:
+    """Rangos de ids del catálogo y elecciones al azar dentro de ellos"""
+
+    def __init__(self):
+        self.rangos = {
+            tabla: tuple(_fila(f"SELECT MIN(id), MAX(id) FROM {tabla}"))
+            for tabla in ("diplomados", "modulos", "clases")
+        }
+
+    def _id(self, azar, tabla):
+        minimo, maximo = self.rangos[tabla]
+        return azar.randint(minimo, maximo)
+
+    def diplomado(self, azar):
+        return self._id(azar, "diplomados")
+
+    def modulo(self, azar):
+        # Un módulo que todavía existe (los escenarios de borrado pueden dejar huecos)
+        fila = _fila("SELECT id FROM modulos WHERE id >= ? ORDER BY id LIMIT 1", (self._id(azar, "modulos"),))
+        return fila["id"] if fila else self.rangos["modulos"][0]
+
+    def clase(self, azar):
+        fila = _fila("SELECT id FROM clases WHERE id >= ? ORDER BY id LIMIT 1", (self._id(azar, "clases"),))
+        return fila["id"] if fila else self.rangos["clases"][0]
+
+    def texto(self, azar):
+        """Dos palabras de un tema, como las que escribe alguien en el buscador"""
+        return " ".join(azar.choice(TEMAS).split()[:2])
+
+
+def _sesiones(azar, cantidad, numero_inicial=1):
+    return [
+        {
+            "nombre": f"Sesión {numero}: {azar.choice(TEMAS)}",
+            "descripcion": _descripcion(azar),
+            "url_video": f"https://onedrive.live.com/embed?resid=BENCH!{numero}",
+            "numero_sesion": numero,
+            "fecha_sesion": f"2026-{azar.randint(1, 12):02d}-{azar.randint(1, 28):02d}",
+        }
+        for numero in range(numero_inicial, numero_inicial + cantidad)
+    ]
+
+
+def _nombre_unico(prefijo):
+    return f"{prefijo} {time.perf_counter_ns()}"
+
+
+def definir_escenarios(catalogo):
+    """Lista de escenarios que cubre todas las funciones públicas de db_manager"""
+    dm = db_manager
+    leer = _sin_cache
+
+    def pagina_siguiente(azar, resumen):
+        modulo_id = catalogo.modulo(azar)
+        _, despues = _sin_cache(dm.obtener_clases_pagina)(modulo_id, None, 20, resumen)
+        return (modulo_id, despues, 20, resumen)
+
+    def actualizar_diplomado(azar):
+        diplomado = _sin_cache(dm.obtener_diplomado)(catalogo.diplomado(azar))
+        return (diplomado.id, diplomado.nombre, _descripcion(azar, 20))
+
+    def actualizar_modulo(azar):
+        modulo = _fila("SELECT id, nombre, orden FROM modulos WHERE id = ?", (catalogo.modulo(azar),))
+        return (modulo["id"], modulo["nombre"], _descripcion(azar), modulo["orden"])
+
+    def actualizar_clase(azar):
+        clase = _sin_cache(dm.obtener_clase)(catalogo.clase(azar))
+        return (clase.id, clase.nombre, _descripcion(azar), clase.url_video, clase.numero_sesion, clase.fecha_sesion)
+
+    def guardar_cambios(azar):
+        modulo_id = catalogo.modulo(azar)
+        clases = _sin_cache(dm.obtener_clases)(modulo_id)
+        modificadas = [
+            {**clase._asdict(), "descripcion": _descripcion(azar)} for clase in clases[:CAMBIOS_POR_GUARDADO]
+        ]
+        eliminadas = [clase.id for clase in clases[CAMBIOS_POR_GUARDADO:2 * CAMBIOS_POR_GUARDADO]]
+        nuevas = _sesiones(azar, CAMBIOS_POR_GUARDADO, len(clases) + 1)
+        return (modulo_id, nuevas, modificadas, eliminadas)
+
+    def eliminar_clase(azar):
+        modulo_id = catalogo.modulo(azar)
+        return (dm.crear_clase(modulo_id, "Sesión a eliminar", "", "https://bench", 999, "2026-01-01"),)
+
+    def eliminar_modulo(azar):
+        modulo_id = dm.crear_modulo(catalogo.diplomado(azar), "Módulo a eliminar", "", 999, PASSWORD)
+        dm.crear_clases_bulk(modulo_id, _sesiones(azar, SESIONES_POR_LOTE))
+        return (modulo_id,)
+
+    def eliminar_diplomado(azar):
+        # eliminar_diplomado solo lo desactiva: basta con uno vacío
+        return (dm.crear_diplomado(_nombre_unico("Diplomado a eliminar"), "", PASSWORD),)
+
+    def mover_clases(azar):
+        clases, _ = _sin_cache(dm.obtener_clases_pagina)(catalogo.modulo(azar), None, 20, True)
+        return ([clase.id for clase in clases], catalogo.modulo(azar))
+
+    return [
+        # Lecturas
+        Escenario("obtener_diplomados", leer(dm.obtener_diplomados), lambda azar: ()),
+        Escenario("obtener_diplomado", leer(dm.obtener_diplomado), lambda azar: (catalogo.diplomado(azar),)),
+        Escenario("buscar_diplomados[prefijo]", leer(dm.buscar_diplomados), lambda azar: ("diplomado en psi", 20)),
+        Escenario("buscar_diplomados[vacío]", leer(dm.buscar_diplomados), lambda azar: ("", 20)),
+        Escenario("contar_modulos_y_clases_por_diplomado", leer(dm.contar_modulos_y_clases_por_diplomado), lambda azar: ()),
+        Escenario("obtener_arbol_diplomado", leer(dm.obtener_arbol_diplomado), lambda azar: (catalogo.diplomado(azar),)),
+        Escenario("obtener_modulos", leer(dm.obtener_modulos), lambda azar: (catalogo.diplomado(azar),)),
+        Escenario("contar_clases_por_modulo", leer(dm.contar_clases_por_modulo), lambda azar: (catalogo.diplomado(azar),)),
+        Escenario("obtener_clases", leer(dm.obtener_clases), lambda azar: (catalogo.modulo(azar),)),
+        Escenario("obtener_clases_pagina[primera]", leer(dm.obtener_clases_pagina),
+                  lambda azar: (catalogo.modulo(azar), None, 20, False)),
+        Escenario("obtener_clases_pagina[siguiente]", leer(dm.obtener_clases_pagina),
+                  lambda azar: pagina_siguiente(azar, False)),
+        Escenario("obtener_clases_pagina[resumen]", leer(dm.obtener_clases_pagina),
+                  lambda azar: pagina_siguiente(azar, True)),
+        Escenario("obtener_clase", leer(dm.obtener_clase), lambda azar: (catalogo.clase(azar),)),
+        Escenario("buscar_clases[global]", leer(dm.buscar_clases), lambda azar: (catalogo.texto(azar), None, 20)),
+        Escenario("buscar_clases[diplomado]", leer(dm.buscar_clases),
+                  lambda azar: (catalogo.texto(azar), catalogo.diplomado(azar), 20)),
+        # Contraseñas
+        Escenario("verificar_admin", dm.verificar_admin, lambda azar: ("admin", "admin123"), lento=True),
+        Escenario("verificar_password_diplomado", dm.verificar_password_diplomado,
+                  lambda azar: (catalogo.diplomado(azar), PASSWORD), lento=True),
+        Escenario("verificar_password_modulo", dm.verificar_password_modulo,
+                  lambda azar: (catalogo.modulo(azar), PASSWORD), lento=True),
+        # Escrituras de una fila
+        Escenario("crear_diplomado", dm.crear_diplomado,
+                  lambda azar: (_nombre_unico("Diplomado Benchmark"), _descripcion(azar, 20), PASSWORD),
+                  lento=True, filas=_una_fila),
+        Escenario("actualizar_diplomado", dm.actualizar_diplomado, actualizar_diplomado, filas=_una_fila),
+        Escenario("crear_modulo", dm.crear_modulo,
+                  lambda azar: (catalogo.diplomado(azar), "Módulo Benchmark", _descripcion(azar), 99, PASSWORD),
+                  lento=True, filas=_una_fila),
+        Escenario("actualizar_modulo", dm.actualizar_modulo, actualizar_modulo, filas=_una_fila),
+        Escenario("crear_clase", dm.crear_clase,
+                  lambda azar: (catalogo.modulo(azar), *_sesiones(azar, 1, 999)[0].values()),
+                  filas=_una_fila),
+        Escenario("actualizar_clase", dm.actualizar_clase, actualizar_clase, filas=_una_fila),
+        # Escrituras masivas y movimientos
+        Escenario("crear_clases_bulk", dm.crear_clases_bulk,
+                  lambda azar: (catalogo.modulo(azar), _sesiones(azar, SESIONES_POR_LOTE))),
+        Escenario("guardar_cambios_clases", dm.guardar_cambios_clases, guardar_cambios),
+        Escenario("mover_clase_a_modulo", dm.mover_clase_a_modulo,
+                  lambda azar: (catalogo.clase(azar), catalogo.modulo(azar)), filas=_una_fila),
+        Escenario("mover_clases_a_modulo", dm.mover_clases_a_modulo, mover_clases),
+        Escenario("renumerar_clases", dm.renumerar_clases, lambda azar: (catalogo.modulo(azar),)),
+        # Borrados (de filas creadas al preparar)
+        Escenario("eliminar_clase", dm.eliminar_clase, eliminar_clase, filas=_una_fila),
+        Escenario("eliminar_modulo", dm.eliminar_modulo, eliminar_modulo, lento=True, filas=_una_fila),
+        Escenario("eliminar_diplomado", dm.eliminar_diplomado, eliminar_diplomado, lento=True, filas=_una_fila),
+    ]
+
+
+def funciones_sin_escenario(escenarios):
+    """Funciones públicas de db_manager que ningún escenario mide"""
+    medidas = {escenario.funcion.__name__ for escenario in escenarios}
+    return sorted(
+        nombre for nombre in dir(db_manager)
+        if nombre.startswith(PREFIJOS_PUBLICOS) and callable(getattr(db_manager, nombre)) and nombre not in medidas
+    )
+
+
+def medir(escenario, iteraciones, azar):
+    """Ejecuta un escenario `iteraciones` veces y retorna sus métricas"""
+    contar = escenario.filas or contar_filas
+    tiempos = []
+    filas = 0
+    for _ in range(iteraciones):
+        args = escenario.preparar(azar)
+        inicio = time.perf_counter()
+        resultado = escenario.funcion(*args)
+        tiempos.append(time.perf_counter() - inicio)
+        filas += contar(resultado)
+
+    tiempos.sort()
+    total = sum(tiempos)
+    return {
+        "iteraciones": iteraciones,
+        "p50_ms": round(percentil(tiempos, 0.50) * 1000, 4),
+        "p95_ms": round(percentil(tiempos, 0.95) * 1000, 4),
+        "p99_ms": round(percentil(tiempos, 0.99) * 1000, 4),
+        "media_ms": round(total / iteraciones * 1000, 4),
+        "filas": filas,
+        "filas_por_s": round(filas / total, 1) if total else None,
+        "rss_pico_mb": rss_pico_mb(),
+    }
@@ -0,0 +1,199 @@
+"""
+Generador de catálogos sintéticos para los benchmarks.
+
+Crea el esquema con las migraciones de siempre y después inserta diplomados,
+módulos y sesiones directamente con executemany en una sola transacción. El
+trigger que mantiene el índice FTS5 se suspende durante la carga y el índice
+se llena al final con un único INSERT ... SELECT, que es varias veces más
+rápido que indexar fila por fila.
+"""
+import os
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+
+from database import db_manager
+
+AREAS = [
+    "Psicología Clínica", "Neuropsicología", "Psicoterapia Infantil", "Terapia Familiar",
+    "Salud Mental Comunitaria", "Evaluación Psicológica", "Intervención en Crisis",
+    "Psicología Organizacional", "Terapia Cognitivo Conductual", "Educación Inclusiva",
+    "Psicopedagogía", "Gestión de Recursos Humanos", "Mindfulness Clínico", "Sexualidad Humana",
+    "Psicología Forense", "Adicciones", "Gerontología", "Trastornos de la Conducta Alimentaria",
+]
+
+ENFOQUES = [
+    "Fundamentos", "Práctica Clínica", "Actualización", "Especialización", "Avanzado",
+    "Intervención", "Investigación Aplicada", "Supervisión de Casos",
+]
+
+TEMAS = [
+    "Introducción y encuadre", "Modelos teóricos", "Entrevista clínica", "Diagnóstico diferencial",
+    "Instrumentos de evaluación", "Diseño de la intervención", "Técnicas de regulación emocional",
+    "Trabajo con familias", "Ética profesional", "Estudio de casos", "Psicofarmacología básica",
+    "Vínculo terapéutico", "Trauma y resiliencia", "Ansiedad y depresión", "Neurodesarrollo",
+    "Redacción de informes", "Prevención de recaídas", "Cierre del proceso",
+]
+
+PALABRAS = (
+    "sesión análisis revisión práctica caso paciente evaluación técnica enfoque modelo teoría "
+    "emoción conducta cognición aprendizaje familia escuela comunidad intervención diagnóstico "
+    "tratamiento protocolo evidencia ejercicio lectura discusión supervisión herramienta registro"
+).split()
+
+# Tamaños predefinidos: (diplomados, módulos, sesiones)
+ESCALAS = {
+    "chica": (10, 200, 10_000),
+    "mediana": (100, 2_000, 100_000),
+    "grande": (1_000, 20_000, 1_000_000),
+}
+
+# Contraseña de todos los diplomados y módulos generados
+PASSWORD = "clave"
+
+FECHA_INICIO = date(2023, 1, 9)
+
+
+def _reparto(total, grupos):
+    """Tamaño de cada uno de `grupos` grupos que suman `total`, lo más parejos posible"""
+    base, resto = divmod(total, grupos)
+    return [base + (1 if indice < resto else 0) for indice in range(grupos)]
+
+
+def _descripcion(azar, palabras=12):
+    texto = " ".join(azar.choices(PALABRAS, k=palabras))
+    return texto[0].upper() + texto[1:] + "."
+
+
+def _diplomados(azar, cantidad, password_hash):
+    for diplomado_id in range(1, cantidad + 1):
+        nombre = f"Diplomado en {azar.choice(AREAS)}: {azar.choice(ENFOQUES)} {diplomado_id}"
+        yield (diplomado_id, nombre, db_manager.normalizar_busqueda(nombre),
+               _descripcion(azar, 20), password_hash)
+
+
+def _modulos(azar, por_diplomado, password_hash):
+    modulo_id = 0
+    for diplomado_id, cantidad in enumerate(por_diplomado, start=1):
+        for orden in range(1, cantidad + 1):
+            modulo_id += 1
+            yield (modulo_id, diplomado_id, f"Módulo {orden}: {azar.choice(TEMAS)}",
+                   _descripcion(azar), orden, password_hash)
+
+
+def _clases(azar, por_modulo):
+    clase_id = 0
+    for modulo_id, cantidad in enumerate(por_modulo, start=1):
+        # Una sesión semanal desde una fecha distinta para cada módulo
+        inicio = FECHA_INICIO + timedelta(days=azar.randrange(0, 700))
+        for numero in range(1, cantidad + 1):
+            clase_id += 1
+            yield (clase_id, modulo_id, f"Sesión {numero}: {azar.choice(TEMAS)}", _descripcion(azar),
+                   f"https://onedrive.live.com/embed?resid={modulo_id:X}!{clase_id}&authkey=benchmark",
+                   numero, numero, (inicio + timedelta(weeks=numero - 1)).isoformat(), "01:30:00")
+
+
+def generar_catalogo(ruta, diplomados, modulos, sesiones, semilla=0, progreso=print):
+    """
+    Crea en `ruta` un catálogo con la cantidad indicada de cada entidad.
+
+    Los módulos se reparten de forma pareja entre los diplomados y las sesiones
+    entre los módulos. La base de datos debe ser nueva: los ids se asignan
+    desde 1. Todas las contraseñas son PASSWORD, hasheadas una sola vez con el
+    costo calibrado. Retorna un diccionario con los segundos y las filas por
+    segundo de la carga.
+    """
+    if not diplomados or modulos < diplomados or sesiones < modulos:
+        raise ValueError("Se necesita al menos un módulo por diplomado y una sesión por módulo")
+
+    ruta_original = db_manager.DATABASE_PATH
+    db_manager.DATABASE_PATH = ruta
+    try:
+        db_manager.asegurar_esquema()
+        password_hash = db_manager.hash_password(PASSWORD)
+    finally:
+        db_manager._reabrir_pool()
+        db_manager.DATABASE_PATH = ruta_original
+
+    azar = random.Random(semilla)
+    inicio = time.perf_counter()
+    conn = sqlite3.connect(ruta, isolation_level=None)
+    try:
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA cache_size = -262144")
+        trigger = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'clases_fts_insertar'"
+        ).fetchone()[0]
+
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DROP TRIGGER clases_fts_insertar")
+        conn.executemany(
+            "INSERT INTO diplomados (id, nombre, nombre_busqueda, descripcion, password_hash) VALUES (?, ?, ?, ?, ?)",
+            _diplomados(azar, diplomados, password_hash),
+        )
+        progreso(f"⏳ {diplomados} diplomados insertados")
+        conn.executemany(
+            "INSERT INTO modulos (id, diplomado_id, nombre, descripcion, orden, password_hash) VALUES (?, ?, ?, ?, ?, ?)",
+            _modulos(azar, _reparto(modulos, diplomados), password_hash),
+        )
+        progreso(f"⏳ {modulos} módulos insertados")
+        conn.executemany("""
+        INSERT INTO clases (id, modulo_id, nombre, descripcion, url_video, orden, numero_sesion, fecha_sesion, duracion)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, _clases(azar, _reparto(sesiones, modulos)))
+        progreso(f"⏳ {sesiones} sesiones insertadas, indexando la búsqueda de texto completo")
+
+        # Misma carga inicial que la migración 6
+        conn.execute("""
+        INSERT INTO clases_fts (rowid, nombre, descripcion, modulo, diplomado)
+        SELECT c.id, c.nombre, COALESCE(c.descripcion, ''), m.nombre, d.nombre
+        FROM clases c
+        JOIN modulos m ON m.id = c.modulo_id
+        JOIN diplomados d ON d.id = m.diplomado_id
+        """)
+        conn.execute(trigger)
+        conn.execute("UPDATE cambios_catalogo SET version = version + 1 WHERE id = 1")
+        conn.execute("COMMIT")
+        conn.execute("PRAGMA optimize")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    segundos = time.perf_counter() - inicio
+    filas = diplomados + modulos + sesiones
+    return {"segundos": round(segundos, 3), "filas_por_s": round(filas / segundos)}
+
+
+def contar_catalogo(ruta):
+    """Retorna {"diplomados", "modulos", "sesiones"} con las filas de una base existente"""
+    conn = sqlite3.connect(ruta)
+    try:
+        return {
+            clave: conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+            for clave, tabla in (("diplomados", "diplomados"), ("modulos", "modulos"), ("sesiones", "clases"))
+        }
+    finally:
+        conn.close()
+
+
+def preparar_catalogo(ruta, diplomados, modulos, sesiones, semilla=0):
+    """
+    Genera el catálogo en `ruta` si no existe; si existe lo reutiliza tal cual.
+
+    Retorna (escala, generacion): las filas de cada entidad y las métricas de
+    generar_catalogo, o None si se reutilizó.
+    """
+    if os.path.exists(ruta):
+        escala = contar_catalogo(ruta)
+        print(f"♻️ Reutilizando {ruta}: {escala['diplomados']} diplomados, "
+              f"{escala['modulos']} módulos, {escala['sesiones']} sesiones")
+        return escala, None
+
+    print(f"🏗️ Generando {diplomados} diplomados, {modulos} módulos y {sesiones} sesiones en {ruta}")
+    generacion = generar_catalogo(ruta, diplomados, modulos, sesiones, semilla)
+    print(f"✅ Catálogo generado en {generacion['segundos']:.1f} s ({generacion['filas_por_s']} filas/s)")
+    return {"diplomados": diplomados, "modulos": modulos, "sesiones": sesiones}, generacion
@@ -0,0 +1,66 @@
+"""
+Resultados de los benchmarks en JSON y comparación contra una corrida base.
+"""
+import json
+import platform
+import sqlite3
+
+from database import db_manager
+
+# Percentiles que se comparan; p99 con pocas iteraciones es demasiado ruidoso
+PERCENTILES_COMPARADOS = ("p50_ms", "p95_ms")
+
+# Diferencias menores a esto (en ms) se consideran ruido aunque superen el umbral
+DIFERENCIA_MINIMA_MS = 0.05
+
+
+def entorno():
+    """Versiones y configuración que afectan a los tiempos, para guardar junto a los resultados"""
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "plataforma": platform.platform(),
+        "perfil": db_manager.PERFIL,
+        "cola_escrituras": db_manager.COLA_ESCRITURAS,
+        "password_algoritmo": db_manager._hasher.algoritmo.nombre,
+        "password_costo": db_manager._hasher.calibrar(),
+    }
+
+
+def guardar(resultado, ruta):
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(resultado, archivo, ensure_ascii=False, indent=2)
+
+
+def cargar(ruta):
+    with open(ruta, encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def comparar(actual, base, umbral=0.2):
+    """
+    Compara los escenarios de dos corridas.
+
+    Retorna una lista de (escenario, metrica, base, actual, cambio) ordenada por
+    escenario, con `cambio` como fracción (0.25 = 25 % más lento). Una métrica
+    es regresión si crece más que `umbral` y más que DIFERENCIA_MINIMA_MS; los
+    escenarios que faltan en una de las dos corridas se omiten.
+    """
+    regresiones = []
+    for nombre, metricas in sorted(actual["escenarios"].items()):
+        anteriores = base["escenarios"].get(nombre)
+        if anteriores is None:
+            continue
+        for metrica in PERCENTILES_COMPARADOS:
+            antes, ahora = anteriores.get(metrica), metricas.get(metrica)
+            if not antes or ahora is None:
+                continue
+            cambio = (ahora - antes) / antes
+            if cambio > umbral and ahora - antes > DIFERENCIA_MINIMA_MS:
+                regresiones.append((nombre, metrica, antes, ahora, cambio))
+    return regresiones
+
+
+def escalas_distintas(actual, base):
+    """Indica si las dos corridas se hicieron sobre catálogos de distinto tamaño"""
+    return actual.get("escala") != base.get("escala")
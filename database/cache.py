@@ -0,0 +1,175 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """
+    Caché acotada con desalojo LRU para las lecturas del catálogo.
+
+    Los valores se comparten entre todas las sesiones del proceso, por lo que
+    quien los recibe no debe modificarlos. Una entrada puede guardarse bajo un
+    grupo (otra clave): invalidar el grupo elimina todas sus entradas, lo que
+    sirve para lecturas cuyas claves no se conocen al escribir (p. ej. páginas).
+    """
+
+    def __init__(self, max_entradas=1024):
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()
+        self._grupos = {}
+        self._grupo_de = {}
+        self._lock = threading.Lock()
+        self._generacion = 0
+        self._aciertos = 0
+        self._fallos = 0
+        self._desalojos = 0
+        self._invalidaciones = 0
+
+    @property
+    def generacion(self):
+        """Cambia cada vez que se invalida algo; sirve para descartar llenados obsoletos"""
+        return self._generacion
+
+    def obtener(self, clave):
+        """Retorna (encontrado, valor) y marca la entrada como usada recientemente"""
+        with self._lock:
+            try:
+                valor = self._datos[clave]
+            except KeyError:
+                self._fallos += 1
+                return False, None
+            self._datos.move_to_end(clave)
+            self._aciertos += 1
+            return True, valor
+
+    def guardar(self, clave, valor, generacion, grupo=None):
+        """
+        Guarda un valor leído de la base de datos.
+
+        Si hubo una invalidación desde que empezó la lectura (la generación
+        cambió), el valor podría estar obsoleto y no se guarda.
+        """
+        with self._lock:
+            if generacion != self._generacion:
+                return
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            if grupo is not None:
+                self._grupos.setdefault(grupo, set()).add(clave)
+                self._grupo_de[clave] = grupo
+            while len(self._datos) > self.max_entradas:
+                desalojada, _ = self._datos.popitem(last=False)
+                self._quitar_de_grupo(desalojada)
+                self._desalojos += 1
+
+    def _quitar_de_grupo(self, clave):
+        grupo = self._grupo_de.pop(clave, None)
+        if grupo is not None:
+            miembros = self._grupos[grupo]
+            miembros.discard(clave)
+            if not miembros:
+                del self._grupos[grupo]
+
+    def invalidar(self, claves):
+        """Elimina exactamente las claves indicadas y las entradas de los grupos con esas claves"""
+        with self._lock:
+            self._generacion += 1
+            for clave in claves:
+                if clave in self._datos:
+                    del self._datos[clave]
+                    self._quitar_de_grupo(clave)
+                    self._invalidaciones += 1
+                for miembro in self._grupos.pop(clave, ()):
+                    del self._datos[miembro]
+                    del self._grupo_de[miembro]
+                    self._invalidaciones += 1
+
+    def limpiar(self):
+        """Vacía la caché completa"""
+        with self._lock:
+            self._generacion += 1
+            self._invalidaciones += len(self._datos)
+            self._datos.clear()
+            self._grupos.clear()
+            self._grupo_de.clear()
+
+    def estadisticas(self):
+        """Retorna los contadores de aciertos, fallos, desalojos e invalidaciones"""
+        with self._lock:
+            total = self._aciertos + self._fallos
+            return {
+                "entradas": len(self._datos),
+                "max_entradas": self.max_entradas,
+                "aciertos": self._aciertos,
+                "fallos": self._fallos,
+                "tasa_aciertos": self._aciertos / total if total else 0.0,
+                "desalojos": self._desalojos,
+                "invalidaciones": self._invalidaciones,
+            }
+
+
+class VigilanteCambios:
+    """
+    Detecta escrituras hechas por otros procesos sobre la misma base de datos.
+
+    PRAGMA data_version en una conexión dedicada cambia cuando cualquier otra
+    conexión confirma una transacción. Solo en ese caso se lee el contador
+    cambios_catalogo: si todas las versiones nuevas fueron producidas por este
+    proceso (ya invalidadas clave por clave) no hace falta vaciar la caché.
+    La verificación se hace como máximo una vez por intervalo.
+    """
+
+    def __init__(self, ruta, intervalo=1.0, busy_timeout=5.0):
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self.busy_timeout = busy_timeout
+        self._conn = None
+        self._lock = threading.Lock()
+        self._ultima_verificacion = 0.0
+        self._data_version = None
+        self._version = None
+        self._versiones_locales = set()
+
+    def _leer_version(self):
+        row = self._conn.execute("SELECT version FROM cambios_catalogo WHERE id = 1").fetchone()
+        return row[0] if row else 0
+
+    def registrar_version_local(self, version):
+        """Anota una versión del contador producida por una escritura de este proceso"""
+        with self._lock:
+            self._versiones_locales.add(version)
+
+    def hubo_cambios_externos(self):
+        """Retorna True si otro proceso modificó la base de datos desde la última verificación"""
+        ahora = time.monotonic()
+        if ahora - self._ultima_verificacion < self.intervalo:
+            return False
+        with self._lock:
+            self._ultima_verificacion = ahora
+            if self._conn is None:
+                self._conn = sqlite3.connect(
+                    self.ruta, check_same_thread=False, isolation_level=None, timeout=self.busy_timeout
+                )
+                self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                self._version = self._leer_version()
+                return False
+
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return False
+            self._data_version = data_version
+
+            version = self._leer_version()
+            nuevas = range(self._version + 1, version + 1)
+            # Si el contador no avanzó, la escritura no pasó por db_manager
+            externas = version == self._version or any(v not in self._versiones_locales for v in nuevas)
+            self._versiones_locales = {v for v in self._versiones_locales if v > version}
+            self._version = version
+            return externas
+
+    def cerrar(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,95 @@
+import functools
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+SQLITE_BUSY = getattr(sqlite3, "SQLITE_BUSY", 5)
+SQLITE_LOCKED = getattr(sqlite3, "SQLITE_LOCKED", 6)
+
+
+def es_error_de_bloqueo(error):
+    """Indica si un error de SQLite se debe a que otra conexión tiene la base bloqueada"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    codigo = getattr(error, "sqlite_errorcode", None)
+    if codigo is not None:
+        # Los códigos extendidos conservan el código primario en el byte bajo
+        return codigo & 0xFF in (SQLITE_BUSY, SQLITE_LOCKED)
+    mensaje = str(error).lower()
+    return "database is locked" in mensaje or "database is busy" in mensaje
+
+
+def reintentar_si_bloqueada(intentos=5, espera_base=0.05, espera_maxima=2.0, omitir=None):
+    """
+    Decorador que reintenta una operación cuando SQLite responde SQLITE_BUSY/LOCKED.
+
+    Entre intentos espera un tiempo aleatorio entre 0 y espera_base * 2**n
+    (acotado por espera_maxima), para que los procesos que chocaron no vuelvan
+    a intentarlo al mismo tiempo. `omitir` es una función opcional que, si
+    retorna True, desactiva los reintentos (por ejemplo dentro de una
+    transacción que no se puede repetir parcialmente).
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if omitir is not None and omitir():
+                return funcion(*args, **kwargs)
+            intento = 0
+            while True:
+                try:
+                    return funcion(*args, **kwargs)
+                except sqlite3.OperationalError as error:
+                    intento += 1
+                    if intento >= intentos or not es_error_de_bloqueo(error):
+                        raise
+                    time.sleep(random.uniform(0, min(espera_maxima, espera_base * 2 ** intento)))
+        return envoltura
+    return decorador
+
+
+class ColaEscrituras:
+    """
+    Hilo único que ejecuta en orden todas las escrituras de este proceso.
+
+    Serializar las escrituras dentro del proceso evita que varios hilos de
+    Streamlit compitan por el bloqueo de escritura de SQLite; los demás
+    procesos siguen coordinándose mediante busy_timeout y los reintentos.
+    """
+
+    def __init__(self, nombre="db-escrituras"):
+        self._cola = queue.Queue()
+        self._hilo = threading.Thread(target=self._trabajar, name=nombre, daemon=True)
+        self._hilo.start()
+
+    def _trabajar(self):
+        while True:
+            tarea = self._cola.get()
+            if tarea is None:
+                return
+            futuro, funcion, args, kwargs = tarea
+            if not futuro.set_running_or_notify_cancel():
+                continue
+            try:
+                futuro.set_result(funcion(*args, **kwargs))
+            except BaseException as error:
+                futuro.set_exception(error)
+
+    def en_hilo_escritor(self):
+        """Indica si el código actual ya corre en el hilo de escrituras"""
+        return threading.current_thread() is self._hilo
+
+    def ejecutar(self, funcion, *args, **kwargs):
+        """Encola la escritura, espera a que termine y retorna su resultado"""
+        if self.en_hilo_escritor():
+            return funcion(*args, **kwargs)
+        futuro = Future()
+        self._cola.put((futuro, funcion, args, kwargs))
+        return futuro.result()
+
+    def detener(self):
+        """Termina el hilo después de procesar las escrituras pendientes"""
+        self._cola.put(None)
+        self._hilo.join()
@@ -0,0 +1,120 @@
+"""
+Configuración de la base de datos leída de variables de entorno.
+
+Todas las variables son opcionales; los valores por defecto reproducen el
+comportamiento de una instalación local. Ver .env.example.
+"""
+import os
+
+# Ruta del archivo SQLite (relativa al directorio desde el que se lanza la app)
+DATABASE_PATH = os.environ.get("DATABASE_PATH", "database/vodsacademia.db")
+
+# Modo de servicio: "primario" lee y escribe DATABASE_PATH; "snapshot" abre en
+# solo lectura la copia publicada en SNAPSHOT_PATH (servidores de alumnos)
+MODOS = ("primario", "snapshot")
+MODO = os.environ.get("DB_MODO", "primario")
+if MODO not in MODOS:
+    raise ValueError(f"Modo de base de datos desconocido: {MODO!r} (opciones: {', '.join(MODOS)})")
+SNAPSHOT_PATH = os.environ.get("DB_SNAPSHOT_PATH") or os.path.splitext(DATABASE_PATH)[0] + "-snapshot.db"
+# En modo primario, publica el snapshot después de cada escritura confirmada
+PUBLICAR_SNAPSHOT = os.environ.get("DB_PUBLICAR_SNAPSHOT", "0") == "1"
+
+# Tamaño máximo del pool y caché de sentencias preparadas por conexión
+POOL_MAX_CONEXIONES = int(os.environ.get("DB_POOL_MAX_CONEXIONES", "8"))
+POOL_CACHED_STATEMENTS = int(os.environ.get("DB_POOL_CACHED_STATEMENTS", "128"))
+
+# Concurrencia entre procesos: milisegundos que una conexión espera un bloqueo
+# antes de fallar, reintentos de escritura ante SQLITE_BUSY y cola de escrituras
+BUSY_TIMEOUT_MS = int(os.environ.get("DB_BUSY_TIMEOUT_MS", "5000"))
+REINTENTOS_ESCRITURA = int(os.environ.get("DB_REINTENTOS_ESCRITURA", "5"))
+REINTENTO_ESPERA_BASE = float(os.environ.get("DB_REINTENTO_ESPERA_BASE", "0.05"))
+REINTENTO_ESPERA_MAXIMA = float(os.environ.get("DB_REINTENTO_ESPERA_MAXIMA", "2.0"))
+COLA_ESCRITURAS = os.environ.get("DB_COLA_ESCRITURAS", "0") == "1"
+
+# Caché de lecturas del catálogo: entradas máximas y segundos entre
+# verificaciones de escrituras hechas por otros procesos
+CACHE_MAX_ENTRADAS = int(os.environ.get("DB_CACHE_MAX_ENTRADAS", "1024"))
+CACHE_INTERVALO_VERIFICACION = float(os.environ.get("DB_CACHE_INTERVALO_VERIFICACION", "1.0"))
+
+# Contraseñas: algoritmo de los hashes nuevos (scrypt o pbkdf2_sha256) y
+# milisegundos que debe tardar una verificación; el costo se calibra al arrancar
+PASSWORD_ALGORITMO = os.environ.get("DB_PASSWORD_ALGORITMO", "scrypt")
+PASSWORD_TIEMPO_OBJETIVO_MS = float(os.environ.get("DB_PASSWORD_TIEMPO_OBJETIVO_MS", "100"))
+
+# Límite de intentos de contraseña (en memoria de cada proceso). Cada intento
+# gasta una ficha de la sesión, de la cuenta o módulo y del proceso; ver
+# database/limites.py. Con DB_LIMITAR_INTENTOS=0 no se limita.
+LIMITAR_INTENTOS = os.environ.get("DB_LIMITAR_INTENTOS", "1") == "1"
+LIMITE_MAX_CLAVES = int(os.environ.get("DB_LIMITE_MAX_CLAVES", "10000"))
+LIMITE_TTL = float(os.environ.get("DB_LIMITE_TTL", "3600"))
+LIMITES_INTENTOS = {
+    # Una sesión del navegador: 5 intentos seguidos y luego uno cada 10 s;
+    # desde 5 fallos seguidos, 30 s de bloqueo que se duplican hasta 15 min
+    "sesion": {"capacidad": 5, "recarga": 0.1, "fallos_para_bloqueo": 5, "bloqueo_base": 30, "bloqueo_maximo": 900},
+    # Una cuenta admin o un módulo, sumando todas las sesiones: solo frena el
+    # ritmo, sin bloqueo, porque cualquiera puede abrir sesiones nuevas y un
+    # bloqueo dejaría afuera al administrador o a toda la clase. Deja pasar el
+    # pico de alumnos que desbloquean al inicio de la clase
+    "objetivo": {"capacidad": 300, "recarga": 5.0, "fallos_para_bloqueo": None, "bloqueo_base": 0, "bloqueo_maximo": 0},
+    # Todo el proceso: acota la CPU que los hashes pueden ocupar en el worker
+    "proceso": {"capacidad": 100, "recarga": 10.0, "fallos_para_bloqueo": None, "bloqueo_base": 0, "bloqueo_maximo": 0},
+}
+
+# Traza de consultas (ver database/trazas.py): las sentencias que tardan al
+# menos DB_CONSULTA_LENTA_MS se reportan en la consola (0 = no medir) y, con
+# DB_TRAZA_CONSULTAS=1 (desarrollo), el panel de administración muestra al
+# final las sentencias de la ejecución y las candidatas a N+1
+CONSULTA_LENTA_MS = float(os.environ.get("DB_CONSULTA_LENTA_MS", "250"))
+TRAZA_CONSULTAS = os.environ.get("DB_TRAZA_CONSULTAS", "0") == "1"
+
+# Perfiles de ajuste de SQLite. cache_size negativo se expresa en KiB.
+PERFILES = {
+    # Valores por defecto de SQLite; synchronous=NORMAL es seguro en modo WAL
+    "default": {
+        "synchronous": "NORMAL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+    # Servidores de alumnos: catálogo en memoria y lecturas por mmap
+    "read-heavy": {
+        "synchronous": "NORMAL",
+        "cache_size": -65536,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+    # Cada commit se sincroniza a disco antes de retornar
+    "durable": {
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+}
+
+PERFIL = os.environ.get("DB_PERFIL", "default")
+
+# Variables que sobreescriben un pragma concreto del perfil elegido
+_SOBREESCRITURAS = {
+    "synchronous": "DB_SYNCHRONOUS",
+    "cache_size": "DB_CACHE_SIZE",
+    "mmap_size": "DB_MMAP_SIZE",
+    "temp_store": "DB_TEMP_STORE",
+}
+
+
+def pragmas_de_perfil(nombre=None):
+    """
+    Retorna la lista de (pragma, valor) del perfil indicado (o DB_PERFIL).
+
+    Lanza ValueError si el perfil no existe, para no arrancar con un ajuste
+    distinto del que se pidió.
+    """
+    nombre = nombre or PERFIL
+    if nombre not in PERFILES:
+        raise ValueError(f"Perfil de base de datos desconocido: {nombre!r} (opciones: {', '.join(PERFILES)})")
+    pragmas = dict(PERFILES[nombre])
+    for pragma, variable in _SOBREESCRITURAS.items():
+        if os.environ.get(variable):
+            pragmas[pragma] = os.environ[variable]
+    return list(pragmas.items())
@@ -0,0 +1,181 @@
+"""
+Hash de contraseñas con sal por registro y costo calibrado.
+
+Cada hash se guarda con su algoritmo y sus parámetros, por ejemplo
+"scrypt$n=16384,r=8,p=1$<sal>$<hash>", de modo que se puede verificar aunque
+el costo actual sea otro. Los hashes SHA256 sin sal de versiones anteriores
+(64 caracteres hexadecimales) se siguen aceptando y se reportan como
+pendientes de rehash.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import re
+import threading
+import time
+
+LARGO_SAL = 16
+LARGO_HASH = 32
+
+_HASH_ANTIGUO = re.compile(r"[0-9a-f]{64}")
+
+
+def _b64(datos):
+    return base64.b64encode(datos).decode("ascii").rstrip("=")
+
+
+def _desde_b64(texto):
+    return base64.b64decode(texto + "=" * (-len(texto) % 4))
+
+
+class Scrypt:
+    """hashlib.scrypt con r=8, p=1 y n potencia de dos (memoria = 128 * r * n bytes)"""
+
+    nombre = "scrypt"
+    # 2**14 son 16 MiB por verificación; 2**20, 1 GiB
+    n_minimo = 2 ** 14
+    n_maximo = 2 ** 20
+
+    def parametros(self, costo):
+        return {"n": costo, "r": 8, "p": 1}
+
+    def costo(self, parametros):
+        return parametros["n"]
+
+    def derivar(self, password, sal, parametros):
+        n, r, p = parametros["n"], parametros["r"], parametros["p"]
+        return hashlib.scrypt(
+            password, salt=sal, n=n, r=r, p=p, maxmem=2 * 128 * r * n * p + 1024 * 1024, dklen=LARGO_HASH,
+        )
+
+    def calibrar(self, objetivo, medir):
+        """Mayor n cuya verificación estimada no supera `objetivo` segundos (el tiempo crece lineal con n)"""
+        segundos = medir(self.parametros(self.n_minimo))
+        n = self.n_minimo
+        while n < self.n_maximo and segundos * (n * 2) / self.n_minimo <= objetivo:
+            n *= 2
+        return n
+
+
+class Pbkdf2Sha256:
+    """hashlib.pbkdf2_hmac con SHA256; el costo es el número de iteraciones"""
+
+    nombre = "pbkdf2_sha256"
+    iteraciones_minimas = 100_000
+    iteraciones_maximas = 10_000_000
+
+    def parametros(self, costo):
+        return {"i": costo}
+
+    def costo(self, parametros):
+        return parametros["i"]
+
+    def derivar(self, password, sal, parametros):
+        return hashlib.pbkdf2_hmac("sha256", password, sal, parametros["i"], dklen=LARGO_HASH)
+
+    def calibrar(self, objetivo, medir):
+        """Iteraciones (múltiplo de 10 000) que tardan cerca de `objetivo` segundos"""
+        segundos = medir(self.parametros(self.iteraciones_minimas))
+        iteraciones = int(self.iteraciones_minimas * objetivo / segundos) // 10_000 * 10_000
+        return min(max(iteraciones, self.iteraciones_minimas), self.iteraciones_maximas)
+
+
+ALGORITMOS = {algoritmo.nombre: algoritmo for algoritmo in (Scrypt(), Pbkdf2Sha256())}
+
+
+def es_hash_antiguo(guardado):
+    """Indica si `guardado` es un SHA256 sin sal de las versiones anteriores"""
+    return bool(guardado) and _HASH_ANTIGUO.fullmatch(guardado) is not None
+
+
+def _separar(guardado):
+    """Retorna (algoritmo, parametros, sal, hash) de un hash guardado o None si no tiene el formato"""
+    try:
+        nombre, parametros, sal, derivado = guardado.split("$")
+        algoritmo = ALGORITMOS[nombre]
+        parametros = {clave: int(valor) for clave, valor in (par.split("=") for par in parametros.split(","))}
+        return algoritmo, parametros, _desde_b64(sal), _desde_b64(derivado)
+    except (AttributeError, KeyError, ValueError):
+        return None
+
+
+class HasherContrasenas:
+    """
+    Genera y verifica hashes de contraseñas con el algoritmo indicado.
+
+    El costo se calibra una vez por proceso (calibrar() o el primer hash) para
+    que una verificación tarde alrededor de `objetivo` segundos en esta máquina,
+    sin bajar del mínimo del algoritmo. Las verificaciones usan los parámetros
+    guardados con cada hash, así que su costo no depende de la calibración.
+    """
+
+    def __init__(self, algoritmo="scrypt", objetivo=0.1):
+        if algoritmo not in ALGORITMOS:
+            raise ValueError(
+                f"Algoritmo de contraseñas desconocido: {algoritmo!r} (opciones: {', '.join(ALGORITMOS)})"
+            )
+        self.algoritmo = ALGORITMOS[algoritmo]
+        self.objetivo = objetivo
+        self._costo = None
+        self._lock = threading.Lock()
+        self._hash_ficticio = None
+
+    def _medir(self, parametros):
+        inicio = time.perf_counter()
+        self.algoritmo.derivar(b"calibracion", os.urandom(LARGO_SAL), parametros)
+        return max(time.perf_counter() - inicio, 1e-6)
+
+    def calibrar(self):
+        """Calcula (una sola vez) el costo de los hashes nuevos y lo retorna"""
+        if self._costo is None:
+            with self._lock:
+                if self._costo is None:
+                    self._costo = self.algoritmo.calibrar(self.objetivo, self._medir)
+        return self._costo
+
+    def hash(self, password):
+        """Retorna el hash con sal nueva y el costo calibrado, listo para guardar"""
+        parametros = self.algoritmo.parametros(self.calibrar())
+        sal = os.urandom(LARGO_SAL)
+        derivado = self.algoritmo.derivar(password.encode(), sal, parametros)
+        texto_parametros = ",".join(f"{clave}={valor}" for clave, valor in parametros.items())
+        return f"{self.algoritmo.nombre}${texto_parametros}${_b64(sal)}${_b64(derivado)}"
+
+    def verificar(self, password, guardado):
+        """
+        Compara en tiempo constante `password` con el hash guardado.
+
+        Con guardado=None (el registro no existe) se calcula igualmente un hash
+        con el costo actual, para que la respuesta tarde lo mismo.
+        """
+        if es_hash_antiguo(guardado):
+            return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), guardado)
+        partes = _separar(guardado) if guardado else None
+        if partes is None:
+            if self._hash_ficticio is None:
+                self._hash_ficticio = self.hash(os.urandom(LARGO_SAL).hex())
+            partes = _separar(self._hash_ficticio)
+            guardado = None
+        algoritmo, parametros, sal, derivado = partes
+        calculado = algoritmo.derivar(password.encode(), sal, parametros)
+        return hmac.compare_digest(calculado, derivado) and guardado is not None
+
+    def necesita_rehash(self, guardado):
+        """
+        Indica si conviene volver a hashear la contraseña tras verificarla.
+
+        Es así para los SHA256 antiguos, para otro algoritmo y para costos que
+        difieren más del doble del calibrado; dentro de ese margen no se
+        rehashea, para que pequeñas diferencias de calibración entre procesos
+        no reescriban los hashes en cada inicio de sesión.
+        """
+        partes = _separar(guardado) if guardado else None
+        if partes is None:
+            return True
+        algoritmo, parametros, _, _ = partes
+        if algoritmo is not self.algoritmo:
+            return True
+        costo = algoritmo.costo(parametros)
+        actual = self.calibrar()
+        return not (actual / 2 <= costo <= actual * 2)
@@ -1,80 +1,523 @@
 import sqlite3
-import hashlib
+import functools
+import inspect
 import os
+import re
+import sys
+import threading
+import unicodedata
+from contextlib import contextmanager, nullcontext
 
-DATABASE_PATH = "database/vodsacademia.db"
+if __package__ in (None, ""):
+    # Permite ejecutar este archivo directamente: python database/db_manager.py
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import config
+from database.cache import CacheLRU, VigilanteCambios
+from database.concurrencia import ColaEscrituras, reintentar_si_bloqueada
+from database.contrasenas import HasherContrasenas
+from database.limites import IntentosAgotadosError, LimitadorIntentos, ReglaLimite
+from database.migraciones import aplicar_migraciones
+from database.modelos import (
+    Clase, ClaseResumen, Diplomado, DiplomadoResumen, Modulo, ResultadoBusqueda, columnas, fabrica_de_filas,
+)
+from database.pool import CONSULTA_SALUD, PoolConexiones
+from database.snapshot import SoloLecturaError, VigilanteSnapshot, publicar_snapshot as _publicar_snapshot
+from database.trazas import Trazador
+
+DATABASE_PATH = config.DATABASE_PATH
+PERFIL = config.PERFIL
+
+MODO = config.MODO
+SNAPSHOT_PATH = config.SNAPSHOT_PATH
+PUBLICAR_SNAPSHOT = config.PUBLICAR_SNAPSHOT
+
+POOL_MAX_CONEXIONES = config.POOL_MAX_CONEXIONES
+POOL_CACHED_STATEMENTS = config.POOL_CACHED_STATEMENTS
+
+BUSY_TIMEOUT_MS = config.BUSY_TIMEOUT_MS
+REINTENTOS_ESCRITURA = config.REINTENTOS_ESCRITURA
+REINTENTO_ESPERA_BASE = config.REINTENTO_ESPERA_BASE
+REINTENTO_ESPERA_MAXIMA = config.REINTENTO_ESPERA_MAXIMA
+COLA_ESCRITURAS = config.COLA_ESCRITURAS
+
+CACHE_MAX_ENTRADAS = config.CACHE_MAX_ENTRADAS
+CACHE_INTERVALO_VERIFICACION = config.CACHE_INTERVALO_VERIFICACION
+
+PASSWORD_ALGORITMO = config.PASSWORD_ALGORITMO
+PASSWORD_TIEMPO_OBJETIVO_MS = config.PASSWORD_TIEMPO_OBJETIVO_MS
+
+LIMITAR_INTENTOS = config.LIMITAR_INTENTOS
+REGLAS_LIMITE = {nombre: ReglaLimite(**regla) for nombre, regla in config.LIMITES_INTENTOS.items()}
+
+CONSULTA_LENTA_MS = config.CONSULTA_LENTA_MS
+TRAZA_CONSULTAS = config.TRAZA_CONSULTAS
+
+# Pragmas que se leen de vuelta para el mensaje de arranque
+PRAGMAS_REPORTADOS = ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "busy_timeout")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Ruta cuyos pragmas ya se mostraron: el snapshot reabre el pool tras cada publicación
+_pragmas_reportados = None
+
+# Ruta de la base de datos cuyo esquema ya está al día en este proceso
+_esquema_listo = None
+_esquema_lock = threading.Lock()
+
+_cache = CacheLRU(CACHE_MAX_ENTRADAS)
+
+_hasher = HasherContrasenas(PASSWORD_ALGORITMO, PASSWORD_TIEMPO_OBJETIVO_MS / 1000)
+
+# Intentos de contraseña de todas las sesiones del proceso
+_limitador = LimitadorIntentos(config.LIMITE_MAX_CLAVES, config.LIMITE_TTL)
+
+# Log de consultas lentas y trazas por ejecución del script (database/trazas.py)
+_trazador = Trazador(CONSULTA_LENTA_MS, TRAZA_CONSULTAS, ignorar=(CONSULTA_SALUD,))
+_SIN_TRAZA = nullcontext()
+
+# Estado de la transacción explícita (transaccion()) del hilo actual
+_transaccion_local = threading.local()
+
+_vigilante = None
+_vigilante_lock = threading.Lock()
+
+_cola_escrituras = None
+_cola_lock = threading.Lock()
+
+def es_solo_lectura():
+    """Indica si este proceso sirve el snapshot publicado (DB_MODO=snapshot)"""
+    return MODO == "snapshot"
+
+def _ruta_activa():
+    """Retorna el archivo que lee este proceso: la base principal o el snapshot"""
+    return SNAPSHOT_PATH if es_solo_lectura() else DATABASE_PATH
+
+def get_pool():
+    """Retorna el pool de conexiones del proceso, creándolo la primera vez"""
+    global _pool, _pragmas_reportados
+    ruta = _ruta_activa()
+    pool = _pool
+    if pool is not None and pool.ruta == ruta:
+        return pool
+    with _pool_lock:
+        if _pool is None or _pool.ruta != ruta:
+            if _pool is not None:
+                _pool.cerrar()
+            if es_solo_lectura():
+                # Un snapshot inmutable no usa diario ni bloqueos
+                pragmas = config.pragmas_de_perfil(PERFIL)
+            else:
+                pragmas = [
+                    # WAL: los lectores nunca esperan al escritor
+                    ("journal_mode", "WAL"),
+                    ("busy_timeout", BUSY_TIMEOUT_MS),
+                    *config.pragmas_de_perfil(PERFIL),
+                ]
+            _pool = PoolConexiones(
+                ruta,
+                max_conexiones=POOL_MAX_CONEXIONES,
+                cached_statements=POOL_CACHED_STATEMENTS,
+                pragmas=pragmas,
+                solo_lectura=es_solo_lectura(),
+                al_conectar=_al_conectar,
+            )
+            if _pragmas_reportados != ruta:
+                _reportar_pragmas(_pool)
+                _pragmas_reportados = ruta
+        return _pool
+
+def _al_conectar(conn):
+    # El único trace callback de la conexión: el trazador reparte las sentencias a los oyentes
+    conn.set_trace_callback(_trazador.sentencia)
+
+def escuchar_sentencias(oyente):
+    """
+    Registra una función que recibe el SQL de cada sentencia de las conexiones del pool.
+
+    Es la forma de instrumentar las conexiones: SQLite admite un solo trace
+    callback por conexión y es el del trazador de consultas. Quitarla con
+    dejar_de_escuchar().
+    """
+    _trazador.agregar_oyente(oyente)
+
+def dejar_de_escuchar(oyente):
+    """Quita una función registrada con escuchar_sentencias()"""
+    _trazador.quitar_oyente(oyente)
+
+def _llamada(nombre):
+    """Contexto que atribuye a la función `nombre` las sentencias de la traza"""
+    return _trazador.llamada(nombre) if _trazador.activo else _SIN_TRAZA
+
+def _trazado(funcion):
+    """Registra en la traza de consultas una función pública sin caché ni escritura"""
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        with _llamada(funcion.__name__):
+            return funcion(*args, **kwargs)
+    return envoltura
+
+def iniciar_traza(nombre):
+    """
+    Empieza a guardar las consultas de una ejecución del script en el hilo actual.
+
+    Retorna la TrazaConsultas, o None si DB_TRAZA_CONSULTAS no está activo o
+    ya hay una traza en curso en el hilo. Ver utils/trazas.py.
+    """
+    return _trazador.iniciar(nombre)
+
+def terminar_traza(traza):
+    """Deja de guardar consultas en la traza retornada por iniciar_traza()"""
+    _trazador.terminar(traza)
+
+def _reabrir_pool():
+    """Cierra el pool para que la próxima lectura abra el snapshot recién publicado"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.cerrar()
+            _pool = None
+
+def pragmas_efectivos(pool=None):
+    """Retorna {pragma: valor} tal como los ve una conexión del pool"""
+    pool = pool or get_pool()
+    with pool.conexion() as conn:
+        return {
+            pragma: conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+            for pragma in PRAGMAS_REPORTADOS
+        }
+
+def _reportar_pragmas(pool):
+    """Muestra al arrancar la configuración efectiva de SQLite"""
+    efectivos = pragmas_efectivos(pool)
+    detalle = ", ".join(f"{pragma}={valor}" for pragma, valor in efectivos.items())
+    modo = ", snapshot de solo lectura" if pool.solo_lectura else ""
+    print(f"✅ SQLite {pool.ruta} (perfil '{PERFIL}'{modo}): {detalle}")
+
+def _conexion():
+    """Presta la conexión del hilo actual desde el pool"""
+    return get_pool().conexion()
 
 def get_connection():
-    """Crea y retorna una conexión a la base de datos"""
-    os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
-    conn = sqlite3.connect(DATABASE_PATH)
+    """Crea y retorna una conexión independiente (fuera del pool) a la base de datos"""
+    if os.path.dirname(DATABASE_PATH):
+        os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
+    conn = sqlite3.connect(DATABASE_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
     conn.row_factory = sqlite3.Row
     return conn
 
+def _obtener_vigilante():
+    """Retorna el vigilante de cambios externos para la base de datos actual"""
+    global _vigilante
+    ruta = _ruta_activa()
+    vigilante = _vigilante
+    if vigilante is not None and vigilante.ruta == ruta:
+        return vigilante
+    with _vigilante_lock:
+        if _vigilante is None or _vigilante.ruta != ruta:
+            if _vigilante is not None:
+                _vigilante.cerrar()
+            # Las entradas de otra base de datos no sirven para esta
+            _cache.limpiar()
+            if es_solo_lectura():
+                _vigilante = VigilanteSnapshot(ruta, CACHE_INTERVALO_VERIFICACION)
+            else:
+                _vigilante = VigilanteCambios(
+                    ruta, CACHE_INTERVALO_VERIFICACION, busy_timeout=BUSY_TIMEOUT_MS / 1000
+                )
+        return _vigilante
+
+def _cacheado(funcion=None, *, grupo=None):
+    """
+    Envuelve una lectura del catálogo con la caché LRU del proceso.
+
+    La clave es (nombre, argumentos posicionales con los valores por defecto
+    aplicados). `grupo` es opcional: recibe esos argumentos y retorna la clave
+    de grupo de la entrada, de modo que _claves_afectadas puede invalidar de
+    una vez todas las entradas del grupo.
+    """
+    if funcion is None:
+        return functools.partial(_cacheado, grupo=grupo)
+    firma = inspect.signature(funcion)
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        # Los aciertos de caché también se registran: una llamada por fila es un N+1 aunque no consulte
+        with _llamada(funcion.__name__):
+            # Dentro de una transacción se leen datos aún no confirmados: no se cachean
+            if _en_transaccion():
+                return funcion(*args, **kwargs)
+            if _obtener_vigilante().hubo_cambios_externos():
+                _cache.limpiar()
+                if es_solo_lectura():
+                    # Se publicó un snapshot nuevo: las conexiones abiertas ven el anterior
+                    _reabrir_pool()
+            if kwargs or len(args) < len(firma.parameters):
+                argumentos = firma.bind(*args, **kwargs)
+                argumentos.apply_defaults()
+                args = tuple(argumentos.arguments.values())
+            clave = (funcion.__name__, args)
+            encontrado, valor = _cache.obtener(clave)
+            if encontrado:
+                return valor
+            generacion = _cache.generacion
+            valor = funcion(*args)
+            _cache.guardar(clave, valor, generacion, grupo(*args) if grupo else None)
+            return valor
+    return envoltura
+
+# Máximo de parámetros por sentencia IN (...); SQLite antiguo admite solo 999
+MAX_PARAMETROS_IN = 500
+
+def _en_lotes(ids):
+    """Divide una lista de ids en lotes aptos para una cláusula IN"""
+    ids = list(ids)
+    for inicio in range(0, len(ids), MAX_PARAMETROS_IN):
+        yield ids[inicio:inicio + MAX_PARAMETROS_IN]
+
+def _marcadores(lote):
+    """Retorna '?, ?, ...' con un marcador por elemento del lote"""
+    return ", ".join("?" * len(lote))
+
+def _claves_afectadas(cursor, diplomados=(), modulos=(), clases=()):
+    """
+    Retorna las claves de caché que dependen de los diplomados, módulos y clases indicados.
+
+    Los módulos de las clases y los diplomados de los módulos se buscan en la
+    base de datos, por lo que debe llamarse antes de borrar o mover filas.
+    """
+    diplomados, modulos, clases = set(diplomados), set(modulos), set(clases)
+    for lote in _en_lotes(clases):
+        cursor.execute(f"SELECT modulo_id FROM clases WHERE id IN ({_marcadores(lote)})", lote)
+        modulos.update(row['modulo_id'] for row in cursor.fetchall())
+    for lote in _en_lotes(modulos):
+        cursor.execute(f"SELECT diplomado_id FROM modulos WHERE id IN ({_marcadores(lote)})", lote)
+        diplomados.update(row['diplomado_id'] for row in cursor.fetchall())
+
+    claves = [
+        ("obtener_diplomados", ()),
+        ("buscar_diplomados", ()),
+        ("buscar_clases", ()),
+        ("contar_modulos_y_clases_por_diplomado", ()),
+    ]
+    claves += [("obtener_clase", (clase_id,)) for clase_id in clases]
+    claves += [("obtener_clases", (modulo_id,)) for modulo_id in modulos]
+    claves += [("obtener_clases_pagina", (modulo_id,)) for modulo_id in modulos]
+    for diplomado_id in diplomados:
+        claves += [
+            ("obtener_diplomado", (diplomado_id,)),
+            ("obtener_modulos", (diplomado_id,)),
+            ("obtener_arbol_diplomado", (diplomado_id,)),
+            ("contar_clases_por_modulo", (diplomado_id,)),
+        ]
+    return claves
+
+def _en_transaccion():
+    """Indica si el hilo actual está dentro de transaccion()"""
+    return getattr(_transaccion_local, 'profundidad', 0) > 0
+
+def _obtener_cola_escrituras():
+    """Retorna el hilo escritor del proceso, iniciándolo la primera vez"""
+    global _cola_escrituras
+    if _cola_escrituras is None:
+        with _cola_lock:
+            if _cola_escrituras is None:
+                _cola_escrituras = ColaEscrituras()
+    return _cola_escrituras
+
+def _escritura(funcion):
+    """
+    Marca una función de escritura del catálogo.
+
+    Reintenta con espera aleatoria creciente si la base está bloqueada por
+    otro proceso y, con DB_COLA_ESCRITURAS=1, la ejecuta en el hilo escritor
+    único del proceso. Dentro de transaccion() se ejecuta tal cual en el hilo
+    actual, porque debe usar la conexión de la transacción y no puede
+    repetirse a medias.
+    """
+    con_reintentos = reintentar_si_bloqueada(
+        intentos=REINTENTOS_ESCRITURA,
+        espera_base=REINTENTO_ESPERA_BASE,
+        espera_maxima=REINTENTO_ESPERA_MAXIMA,
+        omitir=_en_transaccion,
+    )(funcion)
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if es_solo_lectura():
+            raise SoloLecturaError(f"{funcion.__name__}: este proceso sirve un snapshot de solo lectura")
+        with _llamada(funcion.__name__):
+            if COLA_ESCRITURAS and not _en_transaccion():
+                return _obtener_cola_escrituras().ejecutar(con_reintentos, *args, **kwargs)
+            return con_reintentos(*args, **kwargs)
+    return envoltura
+
+def _confirmar(conn, claves):
+    """
+    Confirma la transacción actual e invalida las claves de caché afectadas.
+
+    Antes de confirmar incrementa el contador cambios_catalogo para que el
+    vigilante de este proceso reconozca la escritura como propia. Dentro de
+    transaccion() no confirma nada: acumula las claves para el commit final.
+    """
+    if _en_transaccion():
+        _transaccion_local.claves.extend(claves)
+        return
+    cursor = conn.cursor()
+    cursor.execute("UPDATE cambios_catalogo SET version = version + 1 WHERE id = 1")
+    cursor.execute("SELECT version FROM cambios_catalogo WHERE id = 1")
+    version = cursor.fetchone()['version']
+    conn.commit()
+    _obtener_vigilante().registrar_version_local(version)
+    _cache.invalidar(claves)
+    if PUBLICAR_SNAPSHOT:
+        _publicar_despues_de_escribir(conn)
+
+def _publicar_despues_de_escribir(conn):
+    """
+    Publica el snapshot tras una escritura ya confirmada.
+
+    Un fallo al publicar no deshace la escritura: los lectores siguen con el
+    snapshot anterior hasta la próxima publicación.
+    """
+    try:
+        _publicar_snapshot(conn, SNAPSHOT_PATH)
+    except (OSError, sqlite3.Error) as error:
+        print(f"⚠️ No se pudo publicar el snapshot {SNAPSHOT_PATH}: {error}")
+
+def publicar_snapshot():
+    """Publica una copia de la base de datos principal para los procesos de solo lectura"""
+    if es_solo_lectura():
+        raise SoloLecturaError("Un proceso en modo snapshot no puede publicar snapshots")
+    with _conexion() as conn:
+        _publicar_snapshot(conn, SNAPSHOT_PATH)
+
+@contextmanager
+def transaccion():
+    """
+    Agrupa varias llamadas de db_manager en una sola transacción.
+
+    Las funciones de escritura llamadas dentro del bloque se unen a ella y no
+    confirman por su cuenta; al salir del bloque externo se hace un único commit
+    (o un rollback completo si hubo una excepción). Los bloques anidados usan
+    SAVEPOINT, de modo que un error dentro de ellos solo deshace su parte.
+
+        with transaccion():
+            modulo_id = crear_modulo(...)
+            crear_clases_bulk(modulo_id, sesiones)
+    """
+    if es_solo_lectura():
+        raise SoloLecturaError("transaccion(): este proceso sirve un snapshot de solo lectura")
+    with _conexion() as conn:
+        profundidad = getattr(_transaccion_local, 'profundidad', 0)
+
+        if profundidad > 0:
+            savepoint = f"sp_{profundidad}"
+            conn.execute(f"SAVEPOINT {savepoint}")
+            _transaccion_local.profundidad += 1
+            try:
+                yield conn
+            except BaseException:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+                raise
+            else:
+                conn.execute(f"RELEASE {savepoint}")
+            finally:
+                _transaccion_local.profundidad -= 1
+            return
+
+        reintentar_si_bloqueada(
+            intentos=REINTENTOS_ESCRITURA,
+            espera_base=REINTENTO_ESPERA_BASE,
+            espera_maxima=REINTENTO_ESPERA_MAXIMA,
+        )(conn.execute)("BEGIN IMMEDIATE")
+        _transaccion_local.profundidad = 1
+        _transaccion_local.claves = []
+        try:
+            yield conn
+        except BaseException:
+            _transaccion_local.profundidad = 0
+            conn.rollback()
+            raise
+        claves = _transaccion_local.claves
+        _transaccion_local.profundidad = 0
+        _transaccion_local.claves = []
+        _confirmar(conn, claves)
+
+def estadisticas_cache():
+    """Retorna los contadores de aciertos y fallos de la caché del catálogo"""
+    return _cache.estadisticas()
+
+def limpiar_cache():
+    """Vacía la caché del catálogo de este proceso"""
+    _cache.limpiar()
+
 def hash_password(password):
-    """Hashea una contraseña usando SHA256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Hashea una contraseña con sal propia y el costo calibrado para este servidor"""
+    return _hasher.hash(password)
 
-def init_database():
-    """Inicializa la base de datos con todas las tablas"""
-    conn = get_connection()
+def _consultar_limites(objetivo, sesion):
+    """
+    Gasta un intento de `objetivo`, de la sesión (si se indica) y del proceso.
+
+    Se llama antes de leer la fila o calcular el hash: si algún límite está
+    agotado lanza IntentosAgotadosError sin tocar la base. Retorna los límites
+    consultados, para registrar después el resultado.
+    """
+    if not LIMITAR_INTENTOS:
+        return []
+    limites = [(REGLAS_LIMITE["objetivo"], objetivo), (REGLAS_LIMITE["proceso"], ("proceso",))]
+    if sesion is not None:
+        limites.append((REGLAS_LIMITE["sesion"], ("sesion", sesion)))
+    _limitador.intentar(limites)
+    return limites
+
+def _comprobar_password(tabla, fila, password, limites=()):
+    """
+    Verifica `password` contra el password_hash de una fila ya leída (o None).
+
+    Anota el resultado en los `limites` consultados. Si es correcta y el hash
+    es antiguo (SHA256 sin sal) o su costo quedó lejos del calibrado, lo
+    reemplaza por uno nuevo. Un fallo al reescribirlo no impide el acceso: se
+    reintenta en el siguiente inicio de sesión.
+    """
+    # El hash no es tiempo de SQL: la última consulta termina aquí
+    _trazador.terminar_sentencia()
+    guardado = fila['password_hash'] if fila else None
+    correcta = _hasher.verificar(password, guardado)
+    if limites:
+        _limitador.registrar(limites, correcta)
+    if not correcta:
+        return False
+    if not es_solo_lectura() and _hasher.necesita_rehash(guardado):
+        try:
+            _actualizar_hash(tabla, fila['id'], guardado, _hasher.hash(password))
+        except sqlite3.Error as error:
+            print(f"⚠️ No se pudo actualizar el hash de contraseña ({tabla} {fila['id']}): {error}")
+    return True
+
+@_escritura
+def _actualizar_hash(tabla, fila_id, anterior, nuevo):
+    """Reemplaza un hash de contraseña solo si nadie lo cambió desde que se verificó"""
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"UPDATE {tabla} SET password_hash = ? WHERE id = ? AND password_hash = ?",
+            (nuevo, fila_id, anterior),
+        )
+        # Los modelos no incluyen hashes: no hay lecturas en caché que invalidar
+        _confirmar(conn, [])
+
+def normalizar_busqueda(texto):
+    """Pasa un texto a minúsculas sin acentos para compararlo: 'Psicología' -> 'psicologia'"""
+    descompuesto = unicodedata.normalize("NFKD", texto.casefold())
+    return " ".join("".join(c for c in descompuesto if not unicodedata.combining(c)).split())
+
+def _crear_admin_por_defecto(conn):
+    """Crea el usuario admin por defecto si no hay ningún administrador"""
     cursor = conn.cursor()
-    
-    # Tabla de diplomados
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS diplomados (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        nombre TEXT NOT NULL UNIQUE,
-        descripcion TEXT,
-        password_hash TEXT NOT NULL,
-        activo INTEGER DEFAULT 1,
-        fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-    
-    # Tabla de módulos
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS modulos (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        diplomado_id INTEGER NOT NULL,
-        nombre TEXT NOT NULL,
-        descripcion TEXT,
-        orden INTEGER DEFAULT 0,
-        password_hash TEXT NOT NULL,
-        FOREIGN KEY (diplomado_id) REFERENCES diplomados(id) ON DELETE CASCADE
-    )
-    """)
-    
-    # Tabla de clases (sesiones)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS clases (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        modulo_id INTEGER NOT NULL,
-        nombre TEXT NOT NULL,
-        descripcion TEXT,
-        url_video TEXT NOT NULL,
-        orden INTEGER DEFAULT 0,
-        numero_sesion INTEGER,
-        fecha_sesion DATE,
-        duracion TEXT,
-        fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (modulo_id) REFERENCES modulos(id) ON DELETE CASCADE
-    )
-    """)
-    
-    # Tabla de usuarios admin
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS usuarios_admin (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        usuario TEXT NOT NULL UNIQUE,
-        password_hash TEXT NOT NULL,
-        nombre_completo TEXT,
-        activo INTEGER DEFAULT 1,
-        fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-    
-    # Crear usuario admin por defecto si no existe
     cursor.execute("SELECT COUNT(*) as count FROM usuarios_admin")
     if cursor.fetchone()['count'] == 0:
         default_password = hash_password("admin123")
@@ -82,289 +525,632 @@ def init_database():
         INSERT INTO usuarios_admin (usuario, password_hash, nombre_completo)
         VALUES (?, ?, ?)
         """, ("admin", default_password, "Administrador"))
+        _confirmar(conn, [])
         print("✅ Usuario admin creado - Usuario: admin, Contraseña: admin123")
-    
-    conn.commit()
-    conn.close()
+
+def asegurar_esquema():
+    """
+    Aplica las migraciones pendientes una sola vez por proceso.
+
+    Después de la primera llamada exitosa para una ruta de base de datos,
+    cada llamada cuesta una sola comparación. En modo snapshot no se migra
+    nada: el snapshot lo publica el proceso principal con el esquema al día.
+    """
+    global _esquema_listo
+    ruta = _ruta_activa()
+    if _esquema_listo == ruta:
+        return
+    with _esquema_lock:
+        if _esquema_listo == ruta:
+            return
+        if es_solo_lectura():
+            if not os.path.exists(ruta):
+                raise FileNotFoundError(
+                    f"No existe el snapshot {ruta}; publícalo con `python -m database.snapshot` "
+                    "o arranca el proceso principal con DB_PUBLICAR_SNAPSHOT=1"
+                )
+        else:
+            with _conexion() as conn:
+                aplicar_migraciones(conn, DATABASE_PATH + ".lock")
+                _crear_admin_por_defecto(conn)
+                if PUBLICAR_SNAPSHOT:
+                    _publicar_despues_de_escribir(conn)
+        # Calibrar al arrancar, y no durante el primer inicio de sesión
+        costo = _hasher.calibrar()
+        print(f"✅ Contraseñas: {_hasher.algoritmo.nombre} con costo {costo} (objetivo {PASSWORD_TIEMPO_OBJETIVO_MS:g} ms)")
+        _esquema_listo = ruta
+
+def init_database():
+    """Inicializa la base de datos aplicando las migraciones pendientes"""
+    asegurar_esquema()
     print("✅ Base de datos inicializada correctamente")
 
 def migrate_database():
     """Aplica migraciones necesarias a la base de datos existente"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # Verificar si las columnas fecha_sesion y numero_sesion ya existen
-    cursor.execute("PRAGMA table_info(clases)")
-    columns = [column[1] for column in cursor.fetchall()]
-    
-    # Migración: Agregar fecha_sesion y numero_sesion si no existen
-    if 'fecha_sesion' not in columns:
-        print("🔄 Agregando columna fecha_sesion...")
-        cursor.execute("ALTER TABLE clases ADD COLUMN fecha_sesion DATE")
-        print("✅ Columna fecha_sesion agregada")
-    
-    if 'numero_sesion' not in columns:
-        print("🔄 Agregando columna numero_sesion...")
-        cursor.execute("ALTER TABLE clases ADD COLUMN numero_sesion INTEGER")
-        print("✅ Columna numero_sesion agregada")
-    
-    # Verificar si la columna password_hash existe en módulos
-    cursor.execute("PRAGMA table_info(modulos)")
-    columns_modulos = [column[1] for column in cursor.fetchall()]
-    
-    if 'password_hash' not in columns_modulos:
-        print("🔄 Agregando columna password_hash a módulos...")
-        # Agregar columna con valor por defecto (contraseña temporal: "modulo123")
-        default_password = hash_password("modulo123")
-        cursor.execute(f"ALTER TABLE modulos ADD COLUMN password_hash TEXT DEFAULT '{default_password}'")
-        # Actualizar los registros existentes
-        cursor.execute(f"UPDATE modulos SET password_hash = '{default_password}' WHERE password_hash IS NULL")
-        print("✅ Columna password_hash agregada a módulos (contraseña por defecto: 'modulo123')")
-    
-    conn.commit()
-    conn.close()
+    asegurar_esquema()
     print("✅ Migraciones aplicadas correctamente")
 
 # Funciones para usuarios admin
-def verificar_admin(usuario, password):
-    """Verifica las credenciales de un administrador"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    password_hash = hash_password(password)
-    
-    cursor.execute("""
-    SELECT * FROM usuarios_admin 
-    WHERE usuario = ? AND password_hash = ? AND activo = 1
-    """, (usuario, password_hash))
-    
-    admin = cursor.fetchone()
-    conn.close()
-    return admin is not None
+@_trazado
+def verificar_admin(usuario, password, sesion=None):
+    """
+    Verifica las credenciales de un administrador.
+
+    `sesion` identifica al navegador para limitar sus intentos; lanza
+    IntentosAgotadosError si la sesión, la cuenta o el proceso los agotaron.
+    """
+    limites = _consultar_limites(("admin", usuario), sesion)
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+        SELECT id, password_hash FROM usuarios_admin 
+        WHERE usuario = ? AND activo = 1
+        """, (usuario,))
+        admin = cursor.fetchone()
+    # El hash se calcula sin retener la conexión del pool
+    return _comprobar_password("usuarios_admin", admin, password, limites)
 
 # Funciones para diplomados
+@_escritura
 def crear_diplomado(nombre, descripcion, password):
     """Crea un nuevo diplomado"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    password_hash = hash_password(password)
-    
-    try:
-        cursor.execute("""
-        INSERT INTO diplomados (nombre, descripcion, password_hash)
-        VALUES (?, ?, ?)
-        """, (nombre, descripcion, password_hash))
-        conn.commit()
-        diplomado_id = cursor.lastrowid
-        conn.close()
-        return diplomado_id
-    except sqlite3.IntegrityError:
-        conn.close()
-        return None
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        password_hash = hash_password(password)
+
+        try:
+            cursor.execute("""
+            INSERT INTO diplomados (nombre, nombre_busqueda, descripcion, password_hash)
+            VALUES (?, ?, ?, ?)
+            """, (nombre, normalizar_busqueda(nombre), descripcion, password_hash))
+            diplomado_id = cursor.lastrowid
+            _confirmar(conn, _claves_afectadas(cursor, diplomados=[diplomado_id]))
+            return diplomado_id
+        except sqlite3.IntegrityError:
+            return None
 
+@_cacheado
 def obtener_diplomados():
     """Obtiene todos los diplomados activos"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM diplomados WHERE activo = 1 ORDER BY nombre")
-    diplomados = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return diplomados
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = fabrica_de_filas(Diplomado)
+        cursor.execute(f"SELECT {columnas(Diplomado)} FROM diplomados WHERE activo = 1 ORDER BY nombre")
+        diplomados = cursor.fetchall()
+        return diplomados
+
+@_cacheado(grupo=lambda prefijo, limit: ("buscar_diplomados", ()))
+def buscar_diplomados(prefijo="", limit=10):
+    """
+    Busca diplomados activos cuyo nombre empieza por `prefijo`.
+
+    No distingue mayúsculas ni acentos. Retorna como máximo `limit` registros
+    DiplomadoResumen (id y nombre) en orden alfabético, leídos por rango del índice
+    idx_diplomados_activo_busqueda, así que el costo no crece con el catálogo.
+    """
+    prefijo = normalizar_busqueda(prefijo)
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = fabrica_de_filas(DiplomadoResumen)
+        if prefijo:
+            # Rango [prefijo, prefijo con el último carácter incrementado)
+            hasta = prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+            cursor.execute(f"""
+            SELECT {columnas(DiplomadoResumen)} FROM diplomados
+            WHERE activo = 1 AND nombre_busqueda >= ? AND nombre_busqueda < ?
+            ORDER BY nombre_busqueda
+            LIMIT ?
+            """, (prefijo, hasta, limit))
+        else:
+            cursor.execute(f"""
+            SELECT {columnas(DiplomadoResumen)} FROM diplomados
+            WHERE activo = 1
+            ORDER BY nombre_busqueda
+            LIMIT ?
+            """, (limit,))
+        return cursor.fetchall()
 
+@_cacheado
+def contar_modulos_y_clases_por_diplomado():
+    """Retorna {diplomado_id: {'modulos': n, 'clases': n}} para los diplomados activos"""
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+        SELECT d.id AS diplomado_id,
+               (SELECT COUNT(*) FROM modulos m WHERE m.diplomado_id = d.id) AS modulos,
+               (SELECT COUNT(*) FROM modulos m
+                JOIN clases c ON c.modulo_id = m.id
+                WHERE m.diplomado_id = d.id) AS clases
+        FROM diplomados d
+        WHERE d.activo = 1
+        """)
+        return {
+            row['diplomado_id']: {'modulos': row['modulos'], 'clases': row['clases']}
+            for row in cursor.fetchall()
+        }
+
+@_cacheado
 def obtener_diplomado(diplomado_id):
     """Obtiene un diplomado por ID"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM diplomados WHERE id = ?", (diplomado_id,))
-    row = cursor.fetchone()
-    conn.close()
-    return dict(row) if row else None
-
-def verificar_password_diplomado(diplomado_id, password):
-    """Verifica la contraseña de un diplomado"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    password_hash = hash_password(password)
-    
-    cursor.execute("""
-    SELECT * FROM diplomados 
-    WHERE id = ? AND password_hash = ? AND activo = 1
-    """, (diplomado_id, password_hash))
-    
-    diplomado = cursor.fetchone()
-    conn.close()
-    return diplomado is not None
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = fabrica_de_filas(Diplomado)
+        cursor.execute(f"SELECT {columnas(Diplomado)} FROM diplomados WHERE id = ?", (diplomado_id,))
+        return cursor.fetchone()
+
+@_cacheado
+def obtener_arbol_diplomado(diplomado_id):
+    """
+    Obtiene un diplomado con sus módulos en una sola consulta.
 
+    Retorna None si el diplomado no existe. El Diplomado trae sus módulos en
+    `modulos` (en el orden de obtener_modulos) como tupla. Las sesiones no se
+    incluyen: su cantidad por módulo sale de contar_clases_por_modulo y las
+    filas de obtener_clases_pagina, así el costo no crece con el diplomado.
+    """
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        # Tuplas simples: cada fila se reparte entre los dos modelos
+        cursor.row_factory = None
+        cursor.execute(f"""
+        SELECT {columnas(Diplomado, 'd')}, {columnas(Modulo, 'm')}
+        FROM diplomados d
+        LEFT JOIN modulos m ON m.diplomado_id = d.id
+        WHERE d.id = ?
+        ORDER BY m.orden, m.nombre, m.id
+        """, (diplomado_id,))
+        rows = cursor.fetchall()
+
+    if not rows:
+        return None
+
+    fin_diplomado = len(Diplomado._fields) - len(Diplomado._field_defaults)
+    return Diplomado(*rows[0][:fin_diplomado], modulos=tuple(
+        Modulo(*row[fin_diplomado:]) for row in rows if row[fin_diplomado] is not None
+    ))
+
+@_trazado
+def verificar_password_diplomado(diplomado_id, password, sesion=None):
+    """Verifica la contraseña de un diplomado (con límite de intentos, como verificar_admin)"""
+    limites = _consultar_limites(("diplomado", diplomado_id), sesion)
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+        SELECT id, password_hash FROM diplomados 
+        WHERE id = ? AND activo = 1
+        """, (diplomado_id,))
+        diplomado = cursor.fetchone()
+    return _comprobar_password("diplomados", diplomado, password, limites)
+
+@_escritura
 def actualizar_diplomado(diplomado_id, nombre, descripcion, password=None):
     """Actualiza un diplomado"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    if password:
-        password_hash = hash_password(password)
-        cursor.execute("""
-        UPDATE diplomados 
-        SET nombre = ?, descripcion = ?, password_hash = ?
-        WHERE id = ?
-        """, (nombre, descripcion, password_hash, diplomado_id))
-    else:
-        cursor.execute("""
-        UPDATE diplomados 
-        SET nombre = ?, descripcion = ?
-        WHERE id = ?
-        """, (nombre, descripcion, diplomado_id))
-    
-    conn.commit()
-    conn.close()
+    with _conexion() as conn:
+        cursor = conn.cursor()
+
+        if password:
+            password_hash = hash_password(password)
+            cursor.execute("""
+            UPDATE diplomados 
+            SET nombre = ?, nombre_busqueda = ?, descripcion = ?, password_hash = ?
+            WHERE id = ?
+            """, (nombre, normalizar_busqueda(nombre), descripcion, password_hash, diplomado_id))
+        else:
+            cursor.execute("""
+            UPDATE diplomados 
+            SET nombre = ?, nombre_busqueda = ?, descripcion = ?
+            WHERE id = ?
+            """, (nombre, normalizar_busqueda(nombre), descripcion, diplomado_id))
 
+        _confirmar(conn, _claves_afectadas(cursor, diplomados=[diplomado_id]))
+
+@_escritura
 def eliminar_diplomado(diplomado_id):
     """Desactiva un diplomado"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE diplomados SET activo = 0 WHERE id = ?", (diplomado_id,))
-    conn.commit()
-    conn.close()
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE diplomados SET activo = 0 WHERE id = ?", (diplomado_id,))
+        _confirmar(conn, _claves_afectadas(cursor, diplomados=[diplomado_id]))
 
 # Funciones para módulos
+@_escritura
 def crear_modulo(diplomado_id, nombre, descripcion, orden, password):
     """Crea un nuevo módulo"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    password_hash = hash_password(password)
-    cursor.execute("""
-    INSERT INTO modulos (diplomado_id, nombre, descripcion, orden, password_hash)
-    VALUES (?, ?, ?, ?, ?)
-    """, (diplomado_id, nombre, descripcion, orden, password_hash))
-    conn.commit()
-    modulo_id = cursor.lastrowid
-    conn.close()
-    return modulo_id
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        password_hash = hash_password(password)
+        cursor.execute("""
+        INSERT INTO modulos (diplomado_id, nombre, descripcion, orden, password_hash)
+        VALUES (?, ?, ?, ?, ?)
+        """, (diplomado_id, nombre, descripcion, orden, password_hash))
+        modulo_id = cursor.lastrowid
+        _confirmar(conn, _claves_afectadas(cursor, modulos=[modulo_id]))
+        return modulo_id
 
+@_cacheado
 def obtener_modulos(diplomado_id):
     """Obtiene todos los módulos de un diplomado"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-    SELECT * FROM modulos 
-    WHERE diplomado_id = ? 
-    ORDER BY orden, nombre
-    """, (diplomado_id,))
-    modulos = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return modulos
-
-def verificar_password_modulo(modulo_id, password):
-    """Verifica la contraseña de un módulo"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    password_hash = hash_password(password)
-    
-    cursor.execute("""
-    SELECT * FROM modulos 
-    WHERE id = ? AND password_hash = ?
-    """, (modulo_id, password_hash))
-    
-    modulo = cursor.fetchone()
-    conn.close()
-    return modulo is not None
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = fabrica_de_filas(Modulo)
+        cursor.execute(f"""
+        SELECT {columnas(Modulo)} FROM modulos 
+        WHERE diplomado_id = ? 
+        ORDER BY orden, nombre
+        """, (diplomado_id,))
+        modulos = cursor.fetchall()
+        return modulos
 
-def actualizar_modulo(modulo_id, nombre, descripcion, orden, password=None):
-    """Actualiza un módulo"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    if password:
-        password_hash = hash_password(password)
+@_cacheado
+def contar_clases_por_modulo(diplomado_id):
+    """Retorna {modulo_id: cantidad de clases} para todos los módulos de un diplomado"""
+    with _conexion() as conn:
+        cursor = conn.cursor()
         cursor.execute("""
-        UPDATE modulos 
-        SET nombre = ?, descripcion = ?, orden = ?, password_hash = ?
-        WHERE id = ?
-        """, (nombre, descripcion, orden, password_hash, modulo_id))
-    else:
+        SELECT m.id AS modulo_id,
+               (SELECT COUNT(*) FROM clases c WHERE c.modulo_id = m.id) AS total
+        FROM modulos m
+        WHERE m.diplomado_id = ?
+        """, (diplomado_id,))
+        return {row['modulo_id']: row['total'] for row in cursor.fetchall()}
+
+@_trazado
+def verificar_password_modulo(modulo_id, password, sesion=None):
+    """Verifica la contraseña de un módulo (con límite de intentos, como verificar_admin)"""
+    limites = _consultar_limites(("modulo", modulo_id), sesion)
+    with _conexion() as conn:
+        cursor = conn.cursor()
         cursor.execute("""
-        UPDATE modulos 
-        SET nombre = ?, descripcion = ?, orden = ?
+        SELECT id, password_hash FROM modulos 
         WHERE id = ?
-        """, (nombre, descripcion, orden, modulo_id))
-    
-    conn.commit()
-    conn.close()
+        """, (modulo_id,))
+        modulo = cursor.fetchone()
+    return _comprobar_password("modulos", modulo, password, limites)
+
+@_escritura
+def actualizar_modulo(modulo_id, nombre, descripcion, orden, password=None):
+    """Actualiza un módulo"""
+    with _conexion() as conn:
+        cursor = conn.cursor()
+
+        if password:
+            password_hash = hash_password(password)
+            cursor.execute("""
+            UPDATE modulos 
+            SET nombre = ?, descripcion = ?, orden = ?, password_hash = ?
+            WHERE id = ?
+            """, (nombre, descripcion, orden, password_hash, modulo_id))
+        else:
+            cursor.execute("""
+            UPDATE modulos 
+            SET nombre = ?, descripcion = ?, orden = ?
+            WHERE id = ?
+            """, (nombre, descripcion, orden, modulo_id))
+
+        _confirmar(conn, _claves_afectadas(cursor, modulos=[modulo_id]))
 
+@_escritura
 def eliminar_modulo(modulo_id):
     """Elimina un módulo"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM modulos WHERE id = ?", (modulo_id,))
-    conn.commit()
-    conn.close()
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        claves = _claves_afectadas(cursor, modulos=[modulo_id])
+        cursor.execute("DELETE FROM modulos WHERE id = ?", (modulo_id,))
+        _confirmar(conn, claves)
 
 # Funciones para clases (sesiones)
+@_escritura
 def crear_clase(modulo_id, nombre, descripcion, url_video, numero_sesion, fecha_sesion):
     """Crea una nueva clase/sesión"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-    INSERT INTO clases (modulo_id, nombre, descripcion, url_video, numero_sesion, fecha_sesion, orden)
-    VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (modulo_id, nombre, descripcion, url_video, numero_sesion, fecha_sesion, numero_sesion))
-    conn.commit()
-    clase_id = cursor.lastrowid
-    conn.close()
-    return clase_id
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+        INSERT INTO clases (modulo_id, nombre, descripcion, url_video, numero_sesion, fecha_sesion, orden)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (modulo_id, nombre, descripcion, url_video, numero_sesion, fecha_sesion, numero_sesion))
+        clase_id = cursor.lastrowid
+        _confirmar(conn, _claves_afectadas(cursor, clases=[clase_id]))
+        return clase_id
+
+_INSERTAR_CLASE = """
+INSERT INTO clases (modulo_id, nombre, descripcion, url_video, numero_sesion, fecha_sesion, orden)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+def _filas_de_sesiones(modulo_id, sesiones):
+    """Convierte los diccionarios de sesión en parámetros para _INSERTAR_CLASE"""
+    return [
+        (
+            modulo_id,
+            sesion['nombre'],
+            sesion.get('descripcion'),
+            sesion.get('url_video', ""),
+            sesion['numero_sesion'],
+            sesion['fecha_sesion'],
+            sesion['numero_sesion'],
+        )
+        for sesion in sesiones
+    ]
+
+@_escritura
+def crear_clases_bulk(modulo_id, sesiones):
+    """
+    Crea varias clases/sesiones de un módulo en una sola transacción.
 
+    Cada sesión es un diccionario con 'nombre', 'numero_sesion', 'fecha_sesion'
+    y opcionalmente 'descripcion' y 'url_video'. Si alguna inserción falla no
+    se crea ninguna. Retorna la lista de ids nuevos en el mismo orden.
+    """
+    filas = _filas_de_sesiones(modulo_id, sesiones)
+    if not filas:
+        return []
+
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(_INSERTAR_CLASE, filas)
+        # Con AUTOINCREMENT y el bloqueo de escritura tomado, los ids son consecutivos
+        cursor.execute("SELECT last_insert_rowid() AS ultimo")
+        ultimo = cursor.fetchone()['ultimo']
+        _confirmar(conn, _claves_afectadas(cursor, modulos=[modulo_id]))
+        return list(range(ultimo - len(filas) + 1, ultimo + 1))
+
+@_cacheado
 def obtener_clases(modulo_id):
     """Obtiene todas las clases de un módulo ordenadas por fecha"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-    SELECT * FROM clases 
-    WHERE modulo_id = ? 
-    ORDER BY fecha_sesion DESC, numero_sesion DESC
-    """, (modulo_id,))
-    clases = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    return clases
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = fabrica_de_filas(Clase)
+        cursor.execute(f"""
+        SELECT {columnas(Clase)} FROM clases 
+        WHERE modulo_id = ? 
+        ORDER BY fecha_sesion DESC, numero_sesion DESC
+        """, (modulo_id,))
+        clases = cursor.fetchall()
+        return clases
+
+def _segmentos_despues_de(after):
+    """
+    Divide "las clases que van después de `after`" en rangos del índice.
+
+    El orden es fecha_sesion DESC, numero_sesion DESC, id; como fecha y número
+    pueden ser NULL (quedan al final), la condición se parte en rangos que
+    SQLite resuelve cada uno con una búsqueda en idx_clases_modulo_fecha.
+    """
+    fecha, numero, clase_id = after
+    segmentos = [("fecha_sesion IS ? AND numero_sesion IS ? AND id > ?", (fecha, numero, clase_id))]
+    if numero is not None:
+        segmentos.append(("fecha_sesion IS ? AND numero_sesion < ?", (fecha, numero)))
+        segmentos.append(("fecha_sesion IS ? AND numero_sesion IS NULL", (fecha,)))
+    if fecha is not None:
+        segmentos.append(("fecha_sesion < ?", (fecha,)))
+        segmentos.append(("fecha_sesion IS NULL", ()))
+    return segmentos
+
+@_cacheado(grupo=lambda modulo_id, after, limit, resumen: ("obtener_clases_pagina", (modulo_id,)))
+def obtener_clases_pagina(modulo_id, after=None, limit=20, resumen=False):
+    """
+    Obtiene una página de clases de un módulo en el orden de obtener_clases.
+
+    Usa paginación por clave (keyset), no OFFSET: `after` es la clave
+    (fecha_sesion, numero_sesion, id) de la última clase de la página anterior,
+    o None para la primera, y cada página cuesta lo mismo sin importar cuántas
+    sesiones tenga el módulo. Retorna (clases, siguiente), donde `siguiente` es
+    el `after` de la página siguiente o None si esta es la última. Con
+    resumen=True las clases son ClaseResumen (sin descripción ni URL).
+    """
+    modelo = ClaseResumen if resumen else Clase
+    segmentos = [("1", ())] if after is None else _segmentos_despues_de(after)
+    clases = []
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = fabrica_de_filas(modelo)
+        for condicion, params in segmentos:
+            # Se pide una fila extra para saber si existe una página siguiente
+            cursor.execute(f"""
+            SELECT {columnas(modelo)} FROM clases
+            WHERE modulo_id = ? AND {condicion}
+            ORDER BY fecha_sesion DESC, numero_sesion DESC, id
+            LIMIT ?
+            """, (modulo_id, *params, limit + 1 - len(clases)))
+            clases += cursor.fetchall()
+            if len(clases) > limit:
+                break
+
+    if len(clases) <= limit:
+        return clases, None
+    clases = clases[:limit]
+    ultima = clases[-1]
+    return clases, (ultima.fecha_sesion, ultima.numero_sesion, ultima.id)
+
+def _consulta_fts(texto):
+    """
+    Convierte el texto que escribe el usuario en una consulta FTS5 segura.
+
+    Cada palabra se busca como prefijo y todas deben aparecer; las comillas y
+    operadores de FTS5 se descartan para que ninguna entrada sea un error.
+    """
+    return " ".join(f'"{palabra}"*' for palabra in re.findall(r"\w+", texto))
+
+@_cacheado(grupo=lambda query, diplomado_id, limit: ("buscar_clases", ()))
+def buscar_clases(query, diplomado_id=None, limit=20):
+    """
+    Busca sesiones por título, descripción y nombre de módulo o diplomado.
 
+    Usa el índice FTS5 clases_fts y ordena por relevancia (bm25, con más peso
+    para el título). Sin acentos ni mayúsculas; cada palabra cuenta como
+    prefijo. Con `diplomado_id` solo busca en ese diplomado. Retorna registros
+    ResultadoBusqueda cuyo `fragmento` marca las coincidencias entre ** **.
+    """
+    consulta = _consulta_fts(query)
+    if not consulta:
+        return []
+
+    filtro_diplomado = "AND m.diplomado_id = ?" if diplomado_id is not None else ""
+    params = [consulta] + ([diplomado_id] if diplomado_id is not None else []) + [limit]
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = fabrica_de_filas(ResultadoBusqueda)
+        cursor.execute(f"""
+        SELECT c.id, c.nombre, c.numero_sesion, c.fecha_sesion,
+               m.id AS modulo_id, m.nombre AS modulo_nombre,
+               d.id AS diplomado_id, d.nombre AS diplomado_nombre,
+               snippet(clases_fts, -1, '**', '**', '…', 12) AS fragmento
+        FROM clases_fts
+        JOIN clases c ON c.id = clases_fts.rowid
+        JOIN modulos m ON m.id = c.modulo_id
+        JOIN diplomados d ON d.id = m.diplomado_id
+        WHERE clases_fts MATCH ? AND d.activo = 1 {filtro_diplomado}
+        ORDER BY rank
+        LIMIT ?
+        """, params)
+        return cursor.fetchall()
+
+@_cacheado
 def obtener_clase(clase_id):
     """Obtiene una clase por ID"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM clases WHERE id = ?", (clase_id,))
-    row = cursor.fetchone()
-    conn.close()
-    return dict(row) if row else None
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = fabrica_de_filas(Clase)
+        cursor.execute(f"SELECT {columnas(Clase)} FROM clases WHERE id = ?", (clase_id,))
+        return cursor.fetchone()
 
+@_escritura
 def actualizar_clase(clase_id, nombre, descripcion, url_video, numero_sesion, fecha_sesion):
     """Actualiza una clase/sesión"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-    UPDATE clases 
-    SET nombre = ?, descripcion = ?, url_video = ?, numero_sesion = ?, fecha_sesion = ?, orden = ?
-    WHERE id = ?
-    """, (nombre, descripcion, url_video, numero_sesion, fecha_sesion, numero_sesion, clase_id))
-    conn.commit()
-    conn.close()
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+        UPDATE clases 
+        SET nombre = ?, descripcion = ?, url_video = ?, numero_sesion = ?, fecha_sesion = ?, orden = ?
+        WHERE id = ?
+        """, (nombre, descripcion, url_video, numero_sesion, fecha_sesion, numero_sesion, clase_id))
+        _confirmar(conn, _claves_afectadas(cursor, clases=[clase_id]))
 
+@_escritura
 def eliminar_clase(clase_id):
     """Elimina una clase"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM clases WHERE id = ?", (clase_id,))
-    conn.commit()
-    conn.close()
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        claves = _claves_afectadas(cursor, clases=[clase_id])
+        cursor.execute("DELETE FROM clases WHERE id = ?", (clase_id,))
+        _confirmar(conn, claves)
+
+@_escritura
+def guardar_cambios_clases(modulo_id, nuevas=(), modificadas=(), eliminadas=()):
+    """
+    Aplica en una sola transacción los cambios de un editor de sesiones del módulo.
+
+    `nuevas` son diccionarios como los de crear_clases_bulk, `modificadas` los
+    mismos diccionarios con su 'id' y `eliminadas` una lista de ids. Solo se
+    tocan clases del módulo indicado. Si alguna sentencia falla no se aplica
+    ningún cambio. Retorna (creadas, actualizadas, eliminadas).
+    """
+    nuevas = _filas_de_sesiones(modulo_id, nuevas)
+    modificadas = [
+        (
+            sesion['nombre'],
+            sesion.get('descripcion'),
+            sesion.get('url_video', ""),
+            sesion['numero_sesion'],
+            sesion['fecha_sesion'],
+            sesion['numero_sesion'],
+            sesion['id'],
+            modulo_id,
+        )
+        for sesion in modificadas
+    ]
+    eliminadas = list(eliminadas)
+    if not (nuevas or modificadas or eliminadas):
+        return 0, 0, 0
 
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        # Las claves de las clases eliminadas se resuelven antes de borrarlas
+        claves = _claves_afectadas(
+            cursor, modulos=[modulo_id], clases=[fila[6] for fila in modificadas] + eliminadas
+        )
+        borradas = 0
+        for lote in _en_lotes(eliminadas):
+            cursor.execute(
+                f"DELETE FROM clases WHERE modulo_id = ? AND id IN ({_marcadores(lote)})",
+                [modulo_id, *lote],
+            )
+            borradas += cursor.rowcount
+        cursor.executemany("""
+        UPDATE clases 
+        SET nombre = ?, descripcion = ?, url_video = ?, numero_sesion = ?, fecha_sesion = ?, orden = ?
+        WHERE id = ? AND modulo_id = ?
+        """, modificadas)
+        actualizadas = cursor.rowcount if modificadas else 0
+        cursor.executemany(_INSERTAR_CLASE, nuevas)
+        _confirmar(conn, claves)
+        return len(nuevas), actualizadas, borradas
+
+@_escritura
 def mover_clase_a_modulo(clase_id, nuevo_modulo_id):
     """Mueve una clase a otro módulo"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-    UPDATE clases 
-    SET modulo_id = ? 
-    WHERE id = ?
-    """, (nuevo_modulo_id, clase_id))
-    conn.commit()
-    conn.close()
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        # El módulo de origen se resuelve antes de mover la clase
+        claves = _claves_afectadas(cursor, modulos=[nuevo_modulo_id], clases=[clase_id])
+        cursor.execute("""
+        UPDATE clases 
+        SET modulo_id = ? 
+        WHERE id = ?
+        """, (nuevo_modulo_id, clase_id))
+        _confirmar(conn, claves)
+
+@_escritura
+def mover_clases_a_modulo(clase_ids, nuevo_modulo_id):
+    """Mueve varias clases a otro módulo en una sola transacción y retorna cuántas se movieron"""
+    clase_ids = list(clase_ids)
+    if not clase_ids:
+        return 0
+
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        # Los módulos de origen se resuelven antes de mover las clases
+        claves = _claves_afectadas(cursor, modulos=[nuevo_modulo_id], clases=clase_ids)
+        movidas = 0
+        for lote in _en_lotes(clase_ids):
+            cursor.execute(f"""
+            UPDATE clases 
+            SET modulo_id = ? 
+            WHERE id IN ({_marcadores(lote)})
+            """, [nuevo_modulo_id, *lote])
+            movidas += cursor.rowcount
+        _confirmar(conn, claves)
+        return movidas
+
+@_escritura
+def renumerar_clases(modulo_id, inicio=1):
+    """
+    Renumera las clases de un módulo en orden cronológico.
+
+    Asigna numero_sesion y orden consecutivos desde `inicio` según fecha_sesion
+    y el número de sesión anterior (y el id, para que las sesiones repetidas
+    queden siempre en el mismo orden), con una sola sentencia UPDATE alimentada
+    por ROW_NUMBER(). Retorna la cantidad de clases renumeradas.
+    """
+    with _conexion() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+        WITH numeradas AS (
+            SELECT id, ROW_NUMBER() OVER (ORDER BY fecha_sesion, numero_sesion, id) + ? - 1 AS numero
+            FROM clases
+            WHERE modulo_id = ?
+        )
+        UPDATE clases
+        SET numero_sesion = numeradas.numero, orden = numeradas.numero
+        FROM numeradas
+        WHERE clases.id = numeradas.id
+        """, (inicio, modulo_id))
+        cursor.execute("SELECT id FROM clases WHERE modulo_id = ?", (modulo_id,))
+        clase_ids = [row['id'] for row in cursor.fetchall()]
+        claves = _claves_afectadas(cursor, modulos=[modulo_id])
+        claves += [("obtener_clase", (clase_id,)) for clase_id in clase_ids]
+        _confirmar(conn, claves)
+        return len(clase_ids)
 
 if __name__ == "__main__":
     init_database()
-    migrate_database()
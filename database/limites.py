@@ -0,0 +1,121 @@
+"""
+Límite de intentos de contraseña en memoria del proceso.
+
+Cada clave (la sesión del navegador, la cuenta admin, un módulo...) tiene un
+balde de fichas que se recarga con el tiempo: cada intento gasta una ficha y
+sin fichas se rechaza sin consultar la base ni calcular ningún hash. Los
+fallos consecutivos de una clave la bloquean por un tiempo que se duplica con
+cada fallo adicional. El estado vive en un almacén acotado que descarta las
+claves inactivas, así que un ataque con claves nuevas no agota la memoria.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# Parámetros de un balde: `capacidad` fichas, `recarga` fichas por segundo y,
+# desde `fallos_para_bloqueo` fallos seguidos (None: nunca), un bloqueo de
+# `bloqueo_base` segundos que se duplica con cada fallo hasta `bloqueo_maximo`
+ReglaLimite = namedtuple(
+    "ReglaLimite", ["capacidad", "recarga", "fallos_para_bloqueo", "bloqueo_base", "bloqueo_maximo"],
+)
+
+
+class IntentosAgotadosError(Exception):
+    """Se lanza cuando una clave agotó sus intentos; `espera` son los segundos hasta el próximo"""
+
+    def __init__(self, espera):
+        super().__init__(f"Demasiados intentos; espera {espera:.0f} s")
+        self.espera = espera
+
+
+class _Estado:
+    __slots__ = ("fichas", "actualizado", "fallos", "bloqueado_hasta")
+
+    def __init__(self, fichas, ahora):
+        self.fichas = fichas
+        self.actualizado = ahora
+        self.fallos = 0
+        self.bloqueado_hasta = 0.0
+
+
+class LimitadorIntentos:
+    """
+    Baldes de fichas con bloqueo exponencial, compartidos por todos los hilos del proceso.
+
+    Guarda como máximo `max_claves` claves y olvida las que llevan `ttl`
+    segundos sin usarse (o las menos recientes, si se llena). Una clave
+    olvidada vuelve con el balde lleno, por lo que `ttl` debe superar el
+    bloqueo máximo de las reglas.
+    """
+
+    def __init__(self, max_claves=10000, ttl=3600.0, reloj=time.monotonic):
+        self.max_claves = max_claves
+        self.ttl = ttl
+        self._reloj = reloj
+        self._estados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _estado(self, regla, clave, ahora):
+        """Retorna el estado de la clave con las fichas recargadas hasta `ahora`"""
+        estado = self._estados.get(clave)
+        if estado is None or ahora - estado.actualizado > self.ttl:
+            estado = _Estado(regla.capacidad, ahora)
+            self._estados[clave] = estado
+        else:
+            estado.fichas = min(regla.capacidad, estado.fichas + (ahora - estado.actualizado) * regla.recarga)
+            estado.actualizado = ahora
+        self._estados.move_to_end(clave)
+        return estado
+
+    def _podar(self, ahora):
+        # Las claves quedan ordenadas por último uso: las vencidas están al principio
+        while self._estados:
+            clave, estado = next(iter(self._estados.items()))
+            if len(self._estados) <= self.max_claves and ahora - estado.actualizado <= self.ttl:
+                break
+            del self._estados[clave]
+
+    def intentar(self, reglas_y_claves):
+        """
+        Gasta una ficha de cada clave si todas tienen una disponible.
+
+        `reglas_y_claves` es una lista de (ReglaLimite, clave). Si alguna está
+        bloqueada o sin fichas no se gasta ninguna y se lanza
+        IntentosAgotadosError con la mayor espera.
+        """
+        with self._lock:
+            ahora = self._reloj()
+            estados = [(regla, self._estado(regla, clave, ahora)) for regla, clave in reglas_y_claves]
+            espera = 0.0
+            for regla, estado in estados:
+                if estado.bloqueado_hasta > ahora:
+                    espera = max(espera, estado.bloqueado_hasta - ahora)
+                elif estado.fichas < 1:
+                    espera = max(espera, (1 - estado.fichas) / regla.recarga)
+            if espera:
+                self._podar(ahora)
+                raise IntentosAgotadosError(espera)
+            for _, estado in estados:
+                estado.fichas -= 1
+            self._podar(ahora)
+
+    def registrar(self, reglas_y_claves, exito):
+        """Anota el resultado de un intento: un éxito reinicia los fallos y un fallo puede bloquear"""
+        with self._lock:
+            ahora = self._reloj()
+            for regla, clave in reglas_y_claves:
+                estado = self._estado(regla, clave, ahora)
+                if exito:
+                    estado.fallos = 0
+                    continue
+                estado.fallos += 1
+                if regla.fallos_para_bloqueo is None:
+                    continue
+                exceso = estado.fallos - regla.fallos_para_bloqueo
+                if exceso >= 0:
+                    bloqueo = min(regla.bloqueo_base * 2 ** min(exceso, 32), regla.bloqueo_maximo)
+                    estado.bloqueado_hasta = ahora + bloqueo
+            self._podar(ahora)
+
+    def __len__(self):
+        return len(self._estados)
@@ -0,0 +1,295 @@
+"""
+Motor de migraciones versionadas.
+
+La versión del esquema se guarda en PRAGMA user_version. Cada migración se
+aplica en su propia transacción junto con el incremento de versión, y todo el
+proceso se serializa con un bloqueo de archivo para que varios procesos del
+servidor no migren la misma base de datos a la vez.
+
+Las migraciones ya publicadas no deben modificarse: los cambios nuevos se
+agregan como una migración con el siguiente número.
+"""
+import hashlib
+import os
+import unicodedata
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _m001_esquema_inicial(cursor):
+    """Crea las tablas base si no existen"""
+    # Tabla de diplomados
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS diplomados (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT NOT NULL UNIQUE,
+        descripcion TEXT,
+        password_hash TEXT NOT NULL,
+        activo INTEGER DEFAULT 1,
+        fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    # Tabla de módulos
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS modulos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        diplomado_id INTEGER NOT NULL,
+        nombre TEXT NOT NULL,
+        descripcion TEXT,
+        orden INTEGER DEFAULT 0,
+        password_hash TEXT NOT NULL,
+        FOREIGN KEY (diplomado_id) REFERENCES diplomados(id) ON DELETE CASCADE
+    )
+    """)
+
+    # Tabla de clases (sesiones)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS clases (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        modulo_id INTEGER NOT NULL,
+        nombre TEXT NOT NULL,
+        descripcion TEXT,
+        url_video TEXT NOT NULL,
+        orden INTEGER DEFAULT 0,
+        numero_sesion INTEGER,
+        fecha_sesion DATE,
+        duracion TEXT,
+        fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (modulo_id) REFERENCES modulos(id) ON DELETE CASCADE
+    )
+    """)
+
+    # Tabla de usuarios admin
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS usuarios_admin (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario TEXT NOT NULL UNIQUE,
+        password_hash TEXT NOT NULL,
+        nombre_completo TEXT,
+        activo INTEGER DEFAULT 1,
+        fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def _m002_columnas_sesion_y_password_modulo(cursor):
+    """Agrega columnas que no existían en bases de datos antiguas"""
+    cursor.execute("PRAGMA table_info(clases)")
+    columns = [column[1] for column in cursor.fetchall()]
+
+    if 'fecha_sesion' not in columns:
+        cursor.execute("ALTER TABLE clases ADD COLUMN fecha_sesion DATE")
+
+    if 'numero_sesion' not in columns:
+        cursor.execute("ALTER TABLE clases ADD COLUMN numero_sesion INTEGER")
+
+    cursor.execute("PRAGMA table_info(modulos)")
+    columns_modulos = [column[1] for column in cursor.fetchall()]
+
+    if 'password_hash' not in columns_modulos:
+        # Contraseña temporal "modulo123" con el hash SHA256 de la época de esta migración
+        default_password = hashlib.sha256("modulo123".encode()).hexdigest()
+        cursor.execute(f"ALTER TABLE modulos ADD COLUMN password_hash TEXT DEFAULT '{default_password}'")
+        cursor.execute(f"UPDATE modulos SET password_hash = '{default_password}' WHERE password_hash IS NULL")
+
+
+def _m003_indices_de_consulta(cursor):
+    """Índices que siguen el filtro y el orden de las consultas de listado"""
+    # obtener_diplomados: WHERE activo = 1 ORDER BY nombre
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_diplomados_activo_nombre
+    ON diplomados(activo, nombre)
+    """)
+
+    # obtener_modulos: WHERE diplomado_id = ? ORDER BY orden, nombre
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_modulos_diplomado_orden
+    ON modulos(diplomado_id, orden, nombre)
+    """)
+
+    # obtener_clases: WHERE modulo_id = ? ORDER BY fecha_sesion DESC, numero_sesion DESC
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_clases_modulo_fecha
+    ON clases(modulo_id, fecha_sesion DESC, numero_sesion DESC)
+    """)
+
+
+def _m004_contador_cambios_catalogo(cursor):
+    """Contador que cada escritura incrementa para detectar cambios entre procesos"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS cambios_catalogo (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO cambios_catalogo (id, version) VALUES (1, 0)")
+
+
+def _m005_nombre_busqueda_diplomados(cursor):
+    """Nombre normalizado e indexado para buscar diplomados por prefijo"""
+    cursor.execute("PRAGMA table_info(diplomados)")
+    columns = [column[1] for column in cursor.fetchall()]
+    if 'nombre_busqueda' not in columns:
+        cursor.execute("ALTER TABLE diplomados ADD COLUMN nombre_busqueda TEXT")
+
+    # Misma normalización que db_manager.normalizar_busqueda en la época de esta migración
+    def normalizar(texto):
+        descompuesto = unicodedata.normalize("NFKD", texto.casefold())
+        return " ".join("".join(c for c in descompuesto if not unicodedata.combining(c)).split())
+
+    cursor.execute("SELECT id, nombre FROM diplomados")
+    filas = [(normalizar(nombre), diplomado_id) for diplomado_id, nombre in cursor.fetchall()]
+    cursor.executemany("UPDATE diplomados SET nombre_busqueda = ? WHERE id = ?", filas)
+
+    # buscar_diplomados: WHERE activo = 1 AND nombre_busqueda >= ? AND nombre_busqueda < ?
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_diplomados_activo_busqueda
+    ON diplomados(activo, nombre_busqueda)
+    """)
+
+
+def _m006_busqueda_texto_completo_clases(cursor):
+    """Índice FTS5 de sesiones (título, descripción, módulo y diplomado) sincronizado con triggers"""
+    cursor.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS clases_fts USING fts5(
+        nombre, descripcion, modulo, diplomado,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """)
+    # ORDER BY rank usa bm25 con más peso para el título que para el resto
+    cursor.execute("INSERT INTO clases_fts (clases_fts, rank) VALUES ('rank', 'bm25(10.0, 4.0, 2.0, 1.0)')")
+
+    cursor.execute("DELETE FROM clases_fts")
+    cursor.execute("""
+    INSERT INTO clases_fts (rowid, nombre, descripcion, modulo, diplomado)
+    SELECT c.id, c.nombre, COALESCE(c.descripcion, ''), m.nombre, d.nombre
+    FROM clases c
+    JOIN modulos m ON m.id = c.modulo_id
+    JOIN diplomados d ON d.id = m.diplomado_id
+    """)
+
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS clases_fts_insertar AFTER INSERT ON clases BEGIN
+        INSERT INTO clases_fts (rowid, nombre, descripcion, modulo, diplomado)
+        SELECT NEW.id, NEW.nombre, COALESCE(NEW.descripcion, ''), m.nombre, d.nombre
+        FROM modulos m JOIN diplomados d ON d.id = m.diplomado_id
+        WHERE m.id = NEW.modulo_id;
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS clases_fts_actualizar AFTER UPDATE OF nombre, descripcion, modulo_id ON clases
+    WHEN NEW.nombre IS NOT OLD.nombre OR NEW.descripcion IS NOT OLD.descripcion OR NEW.modulo_id IS NOT OLD.modulo_id
+    BEGIN
+        DELETE FROM clases_fts WHERE rowid = OLD.id;
+        INSERT INTO clases_fts (rowid, nombre, descripcion, modulo, diplomado)
+        SELECT NEW.id, NEW.nombre, COALESCE(NEW.descripcion, ''), m.nombre, d.nombre
+        FROM modulos m JOIN diplomados d ON d.id = m.diplomado_id
+        WHERE m.id = NEW.modulo_id;
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS clases_fts_eliminar AFTER DELETE ON clases BEGIN
+        DELETE FROM clases_fts WHERE rowid = OLD.id;
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS modulos_fts_renombrar AFTER UPDATE OF nombre ON modulos
+    WHEN NEW.nombre IS NOT OLD.nombre
+    BEGIN
+        UPDATE clases_fts SET modulo = NEW.nombre
+        WHERE rowid IN (SELECT id FROM clases WHERE modulo_id = NEW.id);
+    END
+    """)
+    # Sin PRAGMA foreign_keys las clases de un módulo eliminado quedan huérfanas
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS modulos_fts_eliminar AFTER DELETE ON modulos BEGIN
+        DELETE FROM clases_fts WHERE rowid IN (SELECT id FROM clases WHERE modulo_id = OLD.id);
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS diplomados_fts_renombrar AFTER UPDATE OF nombre ON diplomados
+    WHEN NEW.nombre IS NOT OLD.nombre
+    BEGIN
+        UPDATE clases_fts SET diplomado = NEW.nombre
+        WHERE rowid IN (
+            SELECT c.id FROM modulos m JOIN clases c ON c.modulo_id = m.id
+            WHERE m.diplomado_id = NEW.id
+        );
+    END
+    """)
+
+
+# (versión, descripción, función) en orden estrictamente creciente
+MIGRACIONES = [
+    (1, "Esquema inicial", _m001_esquema_inicial),
+    (2, "Columnas fecha_sesion/numero_sesion y contraseña de módulos", _m002_columnas_sesion_y_password_modulo),
+    (3, "Índices para listados de diplomados, módulos y clases", _m003_indices_de_consulta),
+    (4, "Contador de cambios para invalidar cachés entre procesos", _m004_contador_cambios_catalogo),
+    (5, "Nombre de búsqueda sin mayúsculas ni acentos para diplomados", _m005_nombre_busqueda_diplomados),
+    (6, "Búsqueda de texto completo en sesiones (FTS5)", _m006_busqueda_texto_completo_clases),
+]
+
+VERSION_ESQUEMA = MIGRACIONES[-1][0]
+
+
+def version_actual(conn):
+    """Retorna la versión de esquema guardada en la base de datos"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+@contextmanager
+def bloqueo_archivo(ruta):
+    """Bloqueo exclusivo entre procesos basado en un archivo auxiliar"""
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta, "a+b") as archivo:
+        if fcntl is not None:
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_EX)
+        else:
+            archivo.seek(0)
+            msvcrt.locking(archivo.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(archivo.fileno(), fcntl.LOCK_UN)
+            else:
+                archivo.seek(0)
+                msvcrt.locking(archivo.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def aplicar_migraciones(conn, ruta_bloqueo):
+    """
+    Aplica las migraciones pendientes y retorna la lista de versiones aplicadas.
+
+    La versión se vuelve a leer después de obtener el bloqueo, de modo que si
+    otro proceso ya migró mientras se esperaba, no se repite ningún paso.
+    """
+    if version_actual(conn) >= VERSION_ESQUEMA:
+        return []
+
+    aplicadas = []
+    with bloqueo_archivo(ruta_bloqueo):
+        version = version_actual(conn)
+        for numero, descripcion, migrar in MIGRACIONES:
+            if numero <= version:
+                continue
+            print(f"🔄 Aplicando migración {numero}: {descripcion}...")
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                migrar(conn.cursor())
+                conn.execute(f"PRAGMA user_version = {int(numero)}")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            aplicadas.append(numero)
+            print(f"✅ Migración {numero} aplicada")
+    return aplicadas
@@ -0,0 +1,56 @@
+"""
+Registros que retornan las lecturas del catálogo.
+
+Son namedtuples: ocupan menos memoria que un dict por fila y se construyen
+directamente en el cursor con fabrica_de_filas. La caché de lecturas comparte
+entre sesiones los mismos registros y las listas que los contienen (y
+Diplomado.modulos es una lista), así que quien los recibe no debe
+modificarlos; ver CacheLRU. No incluyen los hashes de contraseña. Los campos con valor por defecto (modulos) son
+relaciones que solo llena obtener_arbol_diplomado; en el resto valen None.
+"""
+from collections import namedtuple
+
+Diplomado = namedtuple(
+    "Diplomado",
+    ["id", "nombre", "descripcion", "activo", "fecha_creacion", "modulos"],
+    defaults=(None,),
+)
+
+Modulo = namedtuple("Modulo", ["id", "diplomado_id", "nombre", "descripcion", "orden"])
+
+Clase = namedtuple(
+    "Clase",
+    ["id", "modulo_id", "nombre", "descripcion", "url_video", "orden",
+     "numero_sesion", "fecha_sesion", "duracion", "fecha_creacion"],
+)
+
+# Variantes de resumen: solo las columnas que muestran los listados y selectores.
+# El registro completo se lee después (obtener_diplomado, obtener_clase) si hace falta.
+DiplomadoResumen = namedtuple("DiplomadoResumen", ["id", "nombre"])
+
+ClaseResumen = namedtuple("ClaseResumen", ["id", "modulo_id", "nombre", "numero_sesion", "fecha_sesion"])
+
+# Resultado de buscar_clases: la sesión con su ubicación y el extracto resaltado
+ResultadoBusqueda = namedtuple(
+    "ResultadoBusqueda",
+    ["id", "nombre", "numero_sesion", "fecha_sesion", "modulo_id", "modulo_nombre",
+     "diplomado_id", "diplomado_nombre", "fragmento"],
+)
+
+
+def columnas(modelo, alias=None):
+    """
+    Retorna la lista de columnas para el SELECT de un modelo, en el orden de sus campos.
+
+    Omite las relaciones (campos con valor por defecto). Con `alias` cada
+    columna se califica con la tabla: columnas(Clase, "c") -> "c.id, c.modulo_id, ..."
+    """
+    prefijo = f"{alias}." if alias else ""
+    return ", ".join(prefijo + campo for campo in modelo._fields if campo not in modelo._field_defaults)
+
+
+def fabrica_de_filas(modelo):
+    """Row factory de sqlite3 que construye `modelo` con las columnas de columnas(modelo)"""
+    def fabrica(cursor, fila):
+        return modelo(*fila)
+    return fabrica
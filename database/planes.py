@@ -0,0 +1,214 @@
+"""
+Auditoría de planes de consulta de db_manager.
+
+Ejecuta cada función pública de db_manager contra una base de datos temporal,
+captura las sentencias SQL que emite y corre EXPLAIN QUERY PLAN sobre cada una.
+Se considera regresión cualquier plan que recorra una tabla completa (SCAN) o
+que necesite ordenar en un B-tree temporal (USE TEMP B-TREE).
+
+Uso (retorna código de salida 1 si hay regresiones):
+    python -m database.planes
+"""
+import os
+import re
+import sys
+import tempfile
+
+if __package__ in (None, ""):
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_manager
+
+PREFIJOS_PUBLICOS = (
+    "obtener_", "buscar_", "crear_", "actualizar_", "eliminar_", "mover_", "verificar_", "contar_",
+    "guardar_",
+)
+
+SENTENCIAS_AUDITADAS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+# Sentencias que recorren la tabla completa a propósito
+SCANS_PERMITIDOS = {
+    # Siembra del admin por defecto: se ejecuta una vez por proceso sobre una tabla diminuta
+    "SELECT COUNT(*) as count FROM usuarios_admin",
+}
+
+# Funciones que pueden ordenar en un B-tree temporal solo el último término del
+# ORDER BY, es decir, solo las filas empatadas en los términos que da el índice
+ORDENES_PARCIALES_PERMITIDOS = {
+    # Desempate por id de las sesiones con la misma fecha y número, dentro de un módulo
+    "renumerar_clases",
+}
+
+# Detalle del plan cuando solo se ordena la parte final del ORDER BY
+_ORDEN_PARCIAL = re.compile(r"USE TEMP B-TREE FOR (?:LAST TERM|RIGHT PART) OF ORDER BY")
+
+
+def _escenarios(ids):
+    """(función, argumentos) para ejercitar cada consulta de db_manager"""
+    return [
+        ("verificar_admin", ("admin", "admin123")),
+        ("obtener_diplomados", ()),
+        ("obtener_diplomado", (ids["diplomado"],)),
+        ("buscar_diplomados", ("diplomado", 10)),
+        ("buscar_diplomados", ("", 10)),
+        ("contar_modulos_y_clases_por_diplomado", ()),
+        ("obtener_arbol_diplomado", (ids["diplomado"],)),
+        ("verificar_password_diplomado", (ids["diplomado"], "clave")),
+        ("actualizar_diplomado", (ids["diplomado"], "Diplomado Plan", "desc", "clave")),
+        ("obtener_modulos", (ids["diplomado"],)),
+        ("contar_clases_por_modulo", (ids["diplomado"],)),
+        ("verificar_password_modulo", (ids["modulo"], "clave")),
+        ("actualizar_modulo", (ids["modulo"], "Módulo Plan", "desc", 1, "clave")),
+        ("obtener_clases", (ids["modulo"],)),
+        ("obtener_clases_pagina", (ids["modulo"], None, 5)),
+        ("obtener_clases_pagina", (ids["modulo"], ("2025-01-01", 1, 0), 5)),
+        ("obtener_clases_pagina", (ids["modulo"], ("2025-01-01", 1, 0), 5, True)),
+        ("obtener_clase", (ids["clase"],)),
+        ("buscar_clases", ("clase", None, 10)),
+        ("buscar_clases", ("clase desc", ids["diplomado"], 10)),
+        ("actualizar_clase", (ids["clase"], "Clase", "desc", "http://video", 1, "2025-01-01")),
+        ("mover_clase_a_modulo", (ids["clase"], ids["modulo_destino"])),
+        ("mover_clases_a_modulo", ([ids["clase"]], ids["modulo"])),
+        ("renumerar_clases", (ids["modulo"],)),
+        ("crear_diplomado", ("Otro Diplomado", "desc", "clave")),
+        ("crear_modulo", (ids["diplomado"], "Otro Módulo", "desc", 2, "clave")),
+        ("crear_clase", (ids["modulo"], "Otra Clase", "desc", "http://video", 2, "2025-01-02")),
+        ("crear_clases_bulk", (ids["modulo"], [
+            {"nombre": "Bulk 1", "numero_sesion": 3, "fecha_sesion": "2025-01-03"},
+            {"nombre": "Bulk 2", "numero_sesion": 4, "fecha_sesion": "2025-01-04"},
+        ])),
+        ("guardar_cambios_clases", (ids["modulo"],
+            [{"nombre": "Grilla", "numero_sesion": 5, "fecha_sesion": "2025-01-05"}],
+            [{"id": ids["clase"], "nombre": "Clase", "numero_sesion": 1, "fecha_sesion": "2025-01-01"}],
+            [ids["clase"]],
+        )),
+        ("eliminar_clase", (ids["clase"],)),
+        ("eliminar_modulo", (ids["modulo_destino"],)),
+        ("eliminar_diplomado", (ids["diplomado"],)),
+    ]
+
+
+def _sembrar():
+    """Crea un catálogo mínimo y retorna los ids a usar en los escenarios"""
+    diplomado_id = db_manager.crear_diplomado("Diplomado Plan", "desc", "clave")
+    modulo_id = db_manager.crear_modulo(diplomado_id, "Módulo Plan", "desc", 1, "clave")
+    modulo_destino_id = db_manager.crear_modulo(diplomado_id, "Módulo Destino", "desc", 2, "clave")
+    clase_id = db_manager.crear_clase(modulo_id, "Clase", "desc", "http://video", 1, "2025-01-01")
+    return {
+        "diplomado": diplomado_id,
+        "modulo": modulo_id,
+        "modulo_destino": modulo_destino_id,
+        "clase": clase_id,
+    }
+
+
+def capturar_sentencias(funcion, *args):
+    """Ejecuta la función y retorna las sentencias SQL auditables que emitió"""
+    sentencias = []
+
+    def registrar(sql):
+        if sql.lstrip().upper().startswith(SENTENCIAS_AUDITADAS):
+            sentencias.append(sql)
+
+    db_manager.escuchar_sentencias(registrar)
+    try:
+        funcion(*args)
+    finally:
+        db_manager.dejar_de_escuchar(registrar)
+    return sentencias
+
+
+def plan_consulta(sql):
+    """Retorna las líneas de detalle de EXPLAIN QUERY PLAN para una sentencia"""
+    with db_manager._conexion() as conn:
+        filas = conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+    return [fila["detail"] for fila in filas]
+
+
+# Nombres de CTEs y subconsultas con alias dentro de una sentencia
+_TABLAS_DERIVADAS = re.compile(r"(?:\bWITH|,)\s+(\w+)\s+AS\s*\(|\)\s+AS\s+(\w+)", re.IGNORECASE)
+
+
+def _tablas_derivadas(sql):
+    return {nombre for par in _TABLAS_DERIVADAS.findall(sql) for nombre in par if nombre}
+
+
+def problemas_plan(detalles, sql=""):
+    """
+    Filtra las líneas del plan que indican un recorrido completo o un orden temporal.
+
+    Recorrer un resultado intermedio (SCAN CONSTANT ROW, una subconsulta o un
+    CTE ya filtrado) no cuenta como recorrido de tabla, ni tampoco una búsqueda
+    FTS5 con MATCH, que el plan muestra como SCAN de la tabla virtual aunque
+    use el índice invertido (la M en la cadena de índice).
+    """
+    derivadas = _tablas_derivadas(sql)
+    problemas = []
+    for detalle in detalles:
+        if "TEMP B-TREE" in detalle:
+            problemas.append(detalle)
+        elif detalle.startswith("SCAN "):
+            objetivo = detalle.split()[1]
+            if detalle == "SCAN CONSTANT ROW" or objetivo.startswith("(subquery") or objetivo in derivadas:
+                continue
+            if re.search(r"VIRTUAL TABLE INDEX \d+:\S*M", detalle):
+                continue
+            problemas.append(detalle)
+    return problemas
+
+
+def _normalizar(sql):
+    return " ".join(sql.split())
+
+
+def auditar_planes():
+    """
+    Audita los planes de todas las funciones públicas de db_manager.
+
+    Retorna un diccionario {nombre_funcion: [(sql, [problemas])]} con solo las
+    funciones que presentan regresiones. Las funciones públicas sin escenario
+    también se reportan, para que ninguna consulta nueva quede sin auditar.
+    """
+    ruta_original = db_manager.DATABASE_PATH
+    with tempfile.TemporaryDirectory() as directorio:
+        db_manager.DATABASE_PATH = os.path.join(directorio, "planes.db")
+        try:
+            db_manager.asegurar_esquema()
+            escenarios = _escenarios(_sembrar())
+
+            regresiones = {}
+            for nombre, args in escenarios:
+                # Se audita la función original, sin pasar por la caché de lecturas
+                funcion = getattr(db_manager, nombre)
+                funcion = getattr(funcion, "__wrapped__", funcion)
+                for sql in capturar_sentencias(funcion, *args):
+                    if _normalizar(sql) in SCANS_PERMITIDOS:
+                        continue
+                    problemas = problemas_plan(plan_consulta(sql), sql)
+                    if nombre in ORDENES_PARCIALES_PERMITIDOS:
+                        problemas = [problema for problema in problemas if not _ORDEN_PARCIAL.fullmatch(problema)]
+                    if problemas:
+                        regresiones.setdefault(nombre, []).append((_normalizar(sql), problemas))
+
+            auditadas = {nombre for nombre, _ in escenarios}
+            for nombre in dir(db_manager):
+                if nombre.startswith(PREFIJOS_PUBLICOS) and callable(getattr(db_manager, nombre)):
+                    if nombre not in auditadas:
+                        regresiones.setdefault(nombre, []).append(("", ["sin escenario en database/planes.py"]))
+        finally:
+            db_manager.get_pool().cerrar()
+            db_manager.DATABASE_PATH = ruta_original
+    return regresiones
+
+
+if __name__ == "__main__":
+    regresiones = auditar_planes()
+    if not regresiones:
+        print("✅ Todos los planes de consulta usan índices")
+        sys.exit(0)
+    for nombre, casos in sorted(regresiones.items()):
+        for sql, problemas in casos:
+            print(f"❌ {nombre}: {sql}")
+            for problema in problemas:
+                print(f"     {problema}")
+    sys.exit(1)
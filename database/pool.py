@@ -0,0 +1,177 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from database.snapshot import uri_solo_lectura
+
+
+class PoolAgotadoError(sqlite3.OperationalError):
+    """Se lanza cuando no hay conexiones libres dentro del tiempo de espera"""
+
+
+# Sentencia con la que se comprueba una conexión antes de prestarla
+CONSULTA_SALUD = "SELECT 1"
+
+
+class PoolConexiones:
+    """
+    Pool acotado de conexiones SQLite reutilizables.
+
+    Cada hilo de script de Streamlit toma una conexión del pool la primera vez
+    que la necesita y la reutiliza en todas las llamadas anidadas del mismo hilo;
+    al salir de la llamada más externa la conexión vuelve al pool en lugar de
+    cerrarse. Con solo_lectura=True las conexiones abren `ruta` como snapshot
+    inmutable (ver database/snapshot.py). `al_conectar` recibe cada conexión
+    nueva después de configurarla, p. ej. para instrumentarla.
+    """
+
+    def __init__(self, ruta, max_conexiones=8, cached_statements=128, espera_maxima=30.0, pragmas=(),
+                 solo_lectura=False, al_conectar=None):
+        self.ruta = ruta
+        self.max_conexiones = max_conexiones
+        self.cached_statements = cached_statements
+        self.espera_maxima = espera_maxima
+        # (nombre, valor) aplicados a cada conexión nueva, p. ej. ("journal_mode", "WAL")
+        self.pragmas = list(pragmas)
+        self.solo_lectura = solo_lectura
+        self.al_conectar = al_conectar
+        self._libres = []
+        self._total = 0
+        self._cerrado = False
+        self._condicion = threading.Condition()
+        self._local = threading.local()
+
+        directorio = os.path.dirname(ruta)
+        if directorio and not solo_lectura:
+            os.makedirs(directorio, exist_ok=True)
+
+    def _crear_conexion(self):
+        """Abre una conexión nueva configurada para el pool"""
+        if self.solo_lectura:
+            conn = sqlite3.connect(
+                uri_solo_lectura(self.ruta),
+                uri=True,
+                check_same_thread=False,
+                cached_statements=self.cached_statements,
+            )
+        else:
+            conn = sqlite3.connect(
+                self.ruta,
+                check_same_thread=False,
+                cached_statements=self.cached_statements,
+            )
+        conn.row_factory = sqlite3.Row
+        for nombre, valor in self.pragmas:
+            conn.execute(f"PRAGMA {nombre} = {valor}").fetchall()
+        if self.al_conectar is not None:
+            self.al_conectar(conn)
+        return conn
+
+    @staticmethod
+    def _esta_sana(conn):
+        """Comprueba que una conexión del pool siga siendo utilizable"""
+        try:
+            conn.execute(CONSULTA_SALUD).fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _descartar(self, conn):
+        """Cierra una conexión y libera su lugar en el pool"""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._condicion:
+            self._total -= 1
+            self._condicion.notify()
+
+    def _tomar(self):
+        """Obtiene una conexión libre o crea una nueva si hay capacidad"""
+        limite = time.monotonic() + self.espera_maxima
+        while True:
+            with self._condicion:
+                while not self._libres and self._total >= self.max_conexiones:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        raise PoolAgotadoError(
+                            f"No hay conexiones libres tras {self.espera_maxima}s "
+                            f"(máximo {self.max_conexiones})"
+                        )
+                    self._condicion.wait(restante)
+                if self._libres:
+                    conn = self._libres.pop()
+                else:
+                    self._total += 1
+                    conn = None
+
+            if conn is None:
+                try:
+                    return self._crear_conexion()
+                except BaseException:
+                    with self._condicion:
+                        self._total -= 1
+                        self._condicion.notify()
+                    raise
+
+            if self._esta_sana(conn):
+                return conn
+            self._descartar(conn)
+
+    def _devolver(self, conn):
+        """Devuelve una conexión al pool, deshaciendo cualquier transacción abierta"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._descartar(conn)
+            return
+        with self._condicion:
+            if self._cerrado:
+                self._total -= 1
+                conn.close()
+            else:
+                self._libres.append(conn)
+            self._condicion.notify()
+
+    @contextmanager
+    def conexion(self):
+        """Presta la conexión del hilo actual, tomándola del pool si hace falta"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.profundidad += 1
+            try:
+                yield conn
+            finally:
+                self._local.profundidad -= 1
+            return
+
+        conn = self._tomar()
+        self._local.conn = conn
+        self._local.profundidad = 1
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._local.conn = None
+            self._local.profundidad = 0
+            self._devolver(conn)
+
+    def cerrar(self):
+        """Cierra todas las conexiones libres; las prestadas se cierran al devolverse"""
+        with self._condicion:
+            self._cerrado = True
+            while self._libres:
+                self._libres.pop().close()
+                self._total -= 1
+            self._condicion.notify_all()
+
+    def estadisticas(self):
+        """Retorna el número de conexiones abiertas y libres"""
+        with self._condicion:
+            return {"abiertas": self._total, "libres": len(self._libres), "maximo": self.max_conexiones}
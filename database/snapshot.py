@@ -0,0 +1,114 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from urllib.request import pathname2url
+
+if __package__ in (None, ""):
+    # Permite ejecutar este archivo directamente: python database/snapshot.py
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.migraciones import bloqueo_archivo
+
+
+class SoloLecturaError(sqlite3.OperationalError):
+    """Se lanza al intentar escribir desde un proceso que sirve un snapshot"""
+
+
+def uri_solo_lectura(ruta):
+    """
+    Retorna la URI que abre un snapshot en solo lectura e inmutable.
+
+    Con immutable=1 SQLite no toma bloqueos ni comprueba si el archivo cambió,
+    por lo que el archivo nunca debe modificarse en el lugar: cada publicación
+    lo reemplaza por uno nuevo.
+    """
+    return f"file:{pathname2url(os.path.abspath(ruta))}?mode=ro&immutable=1"
+
+
+def publicar_snapshot(origen, ruta):
+    """
+    Copia la base de datos abierta en `origen` a `ruta` de forma atómica.
+
+    La copia se hace con la API de backup sobre un archivo temporal del mismo
+    directorio, se deja en modo de diario DELETE (un snapshot inmutable no
+    puede tener WAL) y se renombra sobre el snapshot anterior. Los lectores que
+    aún tienen abierto el archivo anterior siguen viendo una copia consistente
+    hasta que reabren. Las publicaciones se serializan entre procesos, de modo
+    que nunca se reemplaza un snapshot por uno más antiguo.
+    """
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with bloqueo_archivo(ruta + ".lock"):
+        destino = sqlite3.connect(temporal)
+        try:
+            origen.backup(destino)
+            destino.execute("PRAGMA journal_mode = DELETE").fetchall()
+            destino.close()
+            os.replace(temporal, ruta)
+        except BaseException:
+            destino.close()
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+
+
+class VigilanteSnapshot:
+    """
+    Detecta que se publicó un snapshot nuevo.
+
+    SQLite no vigila un archivo abierto con immutable=1; como cada publicación
+    reemplaza el archivo, basta comparar su identidad en el sistema de archivos
+    (inodo, fecha de modificación y tamaño). La verificación se hace como
+    máximo una vez por intervalo. Tiene la misma interfaz que VigilanteCambios.
+    """
+
+    def __init__(self, ruta, intervalo=1.0):
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._ultima_verificacion = 0.0
+        self._identidad = None
+        self._iniciado = False
+
+    def _leer_identidad(self):
+        try:
+            estado = os.stat(self.ruta)
+        except FileNotFoundError:
+            return None
+        return (estado.st_ino, estado.st_mtime_ns, estado.st_size)
+
+    def registrar_version_local(self, version):
+        """Un proceso de solo lectura no produce versiones propias"""
+
+    def hubo_cambios_externos(self):
+        """Retorna True si el snapshot fue reemplazado desde la última verificación"""
+        ahora = time.monotonic()
+        if ahora - self._ultima_verificacion < self.intervalo:
+            return False
+        with self._lock:
+            self._ultima_verificacion = ahora
+            identidad = self._leer_identidad()
+            if not self._iniciado:
+                self._iniciado = True
+                self._identidad = identidad
+                return False
+            if identidad == self._identidad:
+                return False
+            self._identidad = identidad
+            return True
+
+    def cerrar(self):
+        pass
+
+
+if __name__ == "__main__":
+    # Publica el snapshot una vez, p. ej. antes de arrancar los servidores de alumnos
+    from database import db_manager
+
+    db_manager.asegurar_esquema()
+    db_manager.publicar_snapshot()
+    print(f"✅ Snapshot publicado en {db_manager.SNAPSHOT_PATH}")
@@ -0,0 +1,258 @@
+"""
+Traza de las sentencias SQL de cada ejecución del script de Streamlit.
+
+db_manager instala Trazador.sentencia como trace callback de las conexiones
+del pool y envuelve cada función pública en Trazador.llamada: cada sentencia
+queda asociada a la función de db_manager que la ejecutó y a la línea de la
+página (o de utils/) que llamó a esa función. La duración de una sentencia se
+mide desde que SQLite la empieza hasta que empieza la siguiente o termina la
+función, así que incluye leer sus filas.
+
+SQLite admite un solo trace callback por conexión: quien necesite ver las
+sentencias (p. ej. la auditoría de planes o la prueba de carga) se registra
+como oyente del trazador en lugar de reemplazarlo.
+
+Con un umbral, las sentencias más lentas se reportan en la consola (el log de
+consultas lentas de producción). Entre iniciar() y terminar() se guarda además
+la traza completa de la ejecución, en la que se marcan como candidatas a N+1
+las consultas con la misma forma y las llamadas desde la misma línea que se
+repiten en varias llamadas. El estado es de cada hilo: las escrituras que
+DB_COLA_ESCRITURAS=1 ejecuta en el hilo escritor no aparecen en la traza.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import namedtuple
+
+# Repeticiones dentro de una ejecución a partir de las cuales algo es candidato a N+1
+REPETICIONES_N_MAS_1 = 3
+
+# Caracteres de SQL que se muestran en el log de consultas lentas
+LARGO_MAXIMO_LOG = 300
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DIRECTORIO_DATABASE = os.path.dirname(os.path.abspath(__file__))
+
+# `llamada` es el número de la llamada externa (desde fuera de database/) dentro de la traza
+Sentencia = namedtuple("Sentencia", ["sql", "forma", "funcion", "llamador", "ms", "llamada"])
+Llamada = namedtuple("Llamada", ["funcion", "llamador", "ms", "consultas"])
+# `tipo` es "consulta" (misma forma de SQL) o "llamada" (misma función desde la misma línea)
+CandidataNMas1 = namedtuple("CandidataNMas1", ["tipo", "descripcion", "veces", "ms", "origenes"])
+
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTAS_IN = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+
+
+def forma_consulta(sql):
+    """
+    Retorna el SQL con los literales reemplazados por ? y los espacios normalizados.
+
+    Las sentencias que solo difieren en sus parámetros tienen la misma forma;
+    las listas IN (?, ?, ...) de cualquier largo también.
+    """
+    forma = " ".join(_LITERALES.sub("?", sql).split())
+    return _LISTAS_IN.sub("IN (...)", forma)
+
+
+def _ruta_relativa(ruta):
+    relativa = os.path.relpath(ruta, RAIZ)
+    return os.path.basename(ruta) if relativa.startswith("..") else relativa
+
+
+def _llamador(frame):
+    """'archivo:línea' del primer frame fuera de database/, relativo a la raíz del proyecto"""
+    while frame is not None and frame.f_code.co_filename.startswith(_DIRECTORIO_DATABASE):
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    return f"{_ruta_relativa(frame.f_code.co_filename)}:{frame.f_lineno}"
+
+
+class TrazaConsultas:
+    """Sentencias y llamadas a db_manager de una ejecución del script"""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.sentencias = []
+        self.llamadas = []
+        self.inicio = time.perf_counter()
+        self.ms_total = None
+
+    @property
+    def ms_sql(self):
+        return sum(sentencia.ms for sentencia in self.sentencias)
+
+    def candidatas_n_mas_1(self, minimo=REPETICIONES_N_MAS_1):
+        """
+        Retorna las candidatas a N+1, de la más repetida a la menos.
+
+        Una forma de consulta cuenta una vez por llamada externa, de modo que
+        un executemany o los lotes de una misma función no se marcan; una
+        función cuenta cuando se llama `minimo` veces desde la misma línea,
+        aunque la caché haya evitado sus consultas.
+        """
+        formas = {}
+        for sentencia in self.sentencias:
+            llamadas, ms, origenes = formas.setdefault(sentencia.forma, (set(), [0.0], set()))
+            llamadas.add(sentencia.llamada)
+            ms[0] += sentencia.ms
+            origenes.add(f"{sentencia.funcion} ← {sentencia.llamador}")
+        candidatas = [
+            CandidataNMas1("consulta", forma, len(llamadas), ms[0], sorted(origenes))
+            for forma, (llamadas, ms, origenes) in formas.items()
+            if len(llamadas) >= minimo
+        ]
+
+        repetidas = {}
+        for llamada in self.llamadas:
+            veces, ms, consultas = repetidas.get((llamada.funcion, llamada.llamador), (0, 0.0, 0))
+            repetidas[(llamada.funcion, llamada.llamador)] = (veces + 1, ms + llamada.ms, consultas + llamada.consultas)
+        candidatas += [
+            CandidataNMas1("llamada", f"{funcion}()", veces, ms, [f"{llamador} ({consultas} consultas)"])
+            for (funcion, llamador), (veces, ms, consultas) in repetidas.items()
+            if veces >= minimo
+        ]
+        return sorted(candidatas, key=lambda candidata: (-candidata.veces, -candidata.ms))
+
+
+class _EstadoHilo(threading.local):
+    def __init__(self):
+        self.pila = []
+        self.frame = None
+        self.consultas = 0
+        self.inicio_llamada = 0.0
+        self.pendiente = None
+        self.traza = None
+
+
+class _Llamada:
+    """Contexto de una llamada a una función pública de db_manager"""
+
+    __slots__ = ("trazador", "funcion")
+
+    def __init__(self, trazador, funcion):
+        self.trazador = trazador
+        self.funcion = funcion
+
+    def __enter__(self):
+        estado = self.trazador._estado
+        if not estado.pila:
+            # Frame de la envoltura; _llamador sube desde ahí hasta salir de database/
+            estado.frame = sys._getframe(1)
+            estado.consultas = 0
+            estado.inicio_llamada = time.perf_counter()
+        estado.pila.append(self.funcion)
+
+    def __exit__(self, *excepcion):
+        trazador = self.trazador
+        estado = trazador._estado
+        trazador.terminar_sentencia()
+        estado.pila.pop()
+        if estado.pila:
+            return
+        if estado.traza is not None:
+            ms = (time.perf_counter() - estado.inicio_llamada) * 1000
+            estado.traza.llamadas.append(Llamada(self.funcion, _llamador(estado.frame), ms, estado.consultas))
+        estado.frame = None
+
+
+class Trazador:
+    """
+    Registra las sentencias SQL de las funciones públicas de db_manager, por hilo.
+
+    `umbral_lento_ms` > 0 reporta con `registrar` cada sentencia que tarde al
+    menos eso. Con `trazas` en False, iniciar() no guarda nada; si además el
+    umbral es 0 el trazador está inactivo y no mide nada. Las sentencias de
+    `ignorar` (p. ej. la comprobación de salud del pool) no se registran.
+    Los oyentes reciben todas las sentencias, estén o no activas las trazas.
+    """
+
+    def __init__(self, umbral_lento_ms=0.0, trazas=False, ignorar=(), registrar=print):
+        self.umbral_lento_ms = umbral_lento_ms
+        self.trazas = trazas
+        self.ignorar = frozenset(ignorar)
+        self.registrar = registrar
+        self._estado = _EstadoHilo()
+        # Tupla inmutable: sentencia() la recorre sin lock mientras otro hilo agrega o quita
+        self._oyentes = ()
+
+    @property
+    def activo(self):
+        return self.trazas or self.umbral_lento_ms > 0
+
+    def agregar_oyente(self, oyente):
+        """Registra una función que recibe el SQL de cada sentencia de las conexiones del pool"""
+        self._oyentes += (oyente,)
+
+    def quitar_oyente(self, oyente):
+        oyentes = list(self._oyentes)
+        oyentes.remove(oyente)
+        self._oyentes = tuple(oyentes)
+
+    def llamada(self, funcion):
+        """Contexto que atribuye a `funcion` las sentencias ejecutadas dentro"""
+        return _Llamada(self, funcion)
+
+    def sentencia(self, sql):
+        """Trace callback de sqlite3: cierra la sentencia anterior y empieza a medir esta"""
+        for oyente in self._oyentes:
+            oyente(sql)
+        estado = self._estado
+        if not estado.pila or sql in self.ignorar:
+            return
+        # SQLite también reporta los subprogramas de triggers y de FTS5 ("-- ...") y
+        # repite la sentencia al entrar a cada trigger: son parte de la sentencia en curso
+        if sql.startswith("--") or (estado.pendiente is not None and sql == estado.pendiente[0]):
+            return
+        self.terminar_sentencia()
+        estado.consultas += 1
+        estado.pendiente = (sql, estado.pila[-1], time.perf_counter())
+
+    def terminar_sentencia(self):
+        """
+        Cierra la medición de la sentencia en curso del hilo.
+
+        Las funciones que siguen trabajando después de su última consulta (p.
+        ej. calculando un hash) la llaman para que ese tiempo no se sume al SQL.
+        """
+        estado = self._estado
+        if estado.pendiente is None:
+            return
+        sql, funcion, inicio = estado.pendiente
+        estado.pendiente = None
+        ms = (time.perf_counter() - inicio) * 1000
+        lenta = self.umbral_lento_ms > 0 and ms >= self.umbral_lento_ms
+        if estado.traza is None and not lenta:
+            return
+        forma = forma_consulta(sql)
+        llamador = _llamador(estado.frame)
+        if lenta:
+            texto = forma if len(forma) <= LARGO_MAXIMO_LOG else forma[:LARGO_MAXIMO_LOG] + "…"
+            self.registrar(f"🐢 Consulta lenta ({ms:.1f} ms) en {funcion}, desde {llamador}: {texto}")
+        if estado.traza is not None:
+            estado.traza.sentencias.append(
+                Sentencia(sql, forma, funcion, llamador, ms, len(estado.traza.llamadas))
+            )
+
+    def iniciar(self, nombre):
+        """
+        Empieza la traza de una ejecución en el hilo actual y la retorna.
+
+        Retorna None si las trazas están desactivadas o si ya hay una en curso
+        en el hilo (p. ej. un fragmento dentro de la ejecución de su página).
+        """
+        estado = self._estado
+        if not self.trazas or estado.traza is not None:
+            return None
+        estado.traza = TrazaConsultas(nombre)
+        return estado.traza
+
+    def terminar(self, traza):
+        """Termina la traza iniciada con iniciar(); ignora None"""
+        estado = self._estado
+        if traza is None or estado.traza is not traza:
+            return
+        estado.traza = None
+        traza.ms_total = (time.perf_counter() - traza.inicio) * 1000
@@ -6,12 +6,20 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.db_manager import (
-    verificar_admin, crear_diplomado, obtener_diplomados, actualizar_diplomado,
+    IntentosAgotadosError, asegurar_esquema, es_solo_lectura, verificar_admin, buscar_clases, crear_diplomado, obtener_diplomados, actualizar_diplomado,
     eliminar_diplomado, crear_modulo, obtener_modulos, actualizar_modulo,
-    eliminar_modulo, crear_clase, obtener_clases, actualizar_clase, eliminar_clase,
-    mover_clase_a_modulo
+    eliminar_modulo, crear_clase, obtener_clase, actualizar_clase, eliminar_clase,
+    mover_clases_a_modulo, renumerar_clases, obtener_arbol_diplomado, obtener_clases_pagina, contar_clases_por_modulo, contar_modulos_y_clases_por_diplomado
 )
+from utils.editor_sesiones import editor_sesiones
 from utils.helpers import extraer_url_de_iframe, formatear_fecha
+from utils.paginacion import controles_paginacion, paginar
+from utils.selectores import hay_diplomados, selector_diplomado
+from utils.sesion import id_sesion
+from utils.trazas import trazar_ejecucion
+
+# Sesiones que se muestran por página en la pestaña de clases
+CLASES_POR_PAGINA = 20
 
 st.set_page_config(
     page_title="Panel Admin - VodsAcademia",
@@ -44,6 +52,14 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# Asegurar el esquema de la base de datos (solo migra la primera vez en cada proceso)
+asegurar_esquema()
+
+if es_solo_lectura():
+    st.title("🔑 Panel de Administración")
+    st.error("🔒 Este servidor sirve una copia de solo lectura del catálogo. Administra el contenido desde el servidor principal.")
+    st.stop()
+
 def logout():
     """Cierra la sesión"""
     st.session_state.tipo_usuario = None
@@ -60,13 +76,18 @@ def login_admin():
         
         if submit:
             # Usuario por defecto es "admin"
-            if verificar_admin("admin", password):
-                st.session_state.tipo_usuario = 'admin'
-                st.session_state.usuario_admin = "admin"
-                st.success("✅ Sesión iniciada correctamente")
-                st.rerun()
+            try:
+                correcta = verificar_admin("admin", password, id_sesion())
+            except IntentosAgotadosError as e:
+                st.error(f"⏳ Demasiados intentos. Vuelve a intentarlo en {e.espera:.0f} segundos")
             else:
-                st.error("❌ Contraseña incorrecta")
+                if correcta:
+                    st.session_state.tipo_usuario = 'admin'
+                    st.session_state.usuario_admin = "admin"
+                    st.success("✅ Sesión iniciada correctamente")
+                    st.rerun()
+                else:
+                    st.error("❌ Contraseña incorrecta")
     
     if st.button("← Volver al inicio"):
         st.switch_page("app.py")
@@ -109,56 +130,97 @@ def gestionar_diplomados():
     if diplomados:
         st.markdown("### Diplomados Existentes")
         
+        # Módulos y clases de todos los diplomados en una sola consulta
+        conteos = contar_modulos_y_clases_por_diplomado()
+        
         for diplomado in diplomados:
-            with st.expander(f"📖 {diplomado['nombre']}", expanded=False):
+            with st.expander(f"📖 {diplomado.nombre}", expanded=False):
                 col1, col2 = st.columns([3, 1])
                 
                 with col1:
-                    st.markdown(f"**Descripción:** {diplomado['descripcion'] or 'Sin descripción'}")
-                    st.markdown(f"**Fecha creación:** {diplomado['fecha_creacion']}")
+                    st.markdown(f"**Descripción:** {diplomado.descripcion or 'Sin descripción'}")
+                    st.markdown(f"**Fecha creación:** {diplomado.fecha_creacion}")
                     
                     # Contar módulos y clases
-                    modulos = obtener_modulos(diplomado['id'])
-                    total_clases = sum(len(obtener_clases(m['id'])) for m in modulos)
-                    st.markdown(f"**Módulos:** {len(modulos)} | **Clases:** {total_clases}")
+                    conteo = conteos.get(diplomado.id, {'modulos': 0, 'clases': 0})
+                    st.markdown(f"**Módulos:** {conteo['modulos']} | **Clases:** {conteo['clases']}")
                 
                 with col2:
-                    if st.button("🗑️ Eliminar", key=f"del_dip_{diplomado['id']}"):
-                        eliminar_diplomado(diplomado['id'])
+                    if st.button("🗑️ Eliminar", key=f"del_dip_{diplomado.id}"):
+                        eliminar_diplomado(diplomado.id)
                         st.success("Diplomado eliminado")
                         st.rerun()
                 
                 # Editar diplomado
-                with st.form(f"form_edit_dip_{diplomado['id']}"):
+                with st.form(f"form_edit_dip_{diplomado.id}"):
                     st.markdown("**Editar Diplomado**")
-                    nuevo_nombre = st.text_input("Nombre", value=diplomado['nombre'], key=f"nombre_{diplomado['id']}")
-                    nueva_desc = st.text_area("Descripción", value=diplomado['descripcion'] or "", key=f"desc_{diplomado['id']}")
+                    nuevo_nombre = st.text_input("Nombre", value=diplomado.nombre, key=f"nombre_{diplomado.id}")
+                    nueva_desc = st.text_area("Descripción", value=diplomado.descripcion or "", key=f"desc_{diplomado.id}")
                     
                     if st.form_submit_button("💾 Guardar Cambios"):
-                        actualizar_diplomado(diplomado['id'], nuevo_nombre, nueva_desc, None)
+                        actualizar_diplomado(diplomado.id, nuevo_nombre, nueva_desc, None)
                         st.success("Cambios guardados")
                         st.rerun()
     else:
         st.info("No hay diplomados creados aún.")
 
+def fila_seleccionada(clave, filas, columnas_de):
+    """
+    Dibuja `filas` como una tabla compacta de selección única y retorna la fila elegida.
+
+    `columnas_de(fila)` da el dict de columnas visibles de cada fila. Es un solo
+    elemento sin widgets por fila, así que su costo no crece con los formularios
+    de edición: solo la fila elegida (o ninguna) tiene uno.
+    """
+    evento = st.dataframe(
+        [columnas_de(fila) for fila in filas],
+        key=clave,
+        on_select="rerun",
+        selection_mode="single-row",
+        hide_index=True,
+        use_container_width=True
+    )
+    seleccion = evento.selection.rows
+    if seleccion and seleccion[0] < len(filas):
+        return filas[seleccion[0]]
+    return None
+
+def editar_modulo(modulo):
+    """Formulario de edición del módulo seleccionado en la tabla"""
+    st.markdown(f"#### ✏️ {modulo.nombre}")
+    if st.button("🗑️ Eliminar", key=f"del_mod_{modulo.id}"):
+        eliminar_modulo(modulo.id)
+        st.session_state.tabla_modulos_counter += 1
+        st.success("Módulo eliminado")
+        st.rerun()
+    
+    # Editar módulo
+    with st.form(f"form_edit_mod_{modulo.id}"):
+        st.markdown("**Editar Módulo**")
+        nuevo_nombre = st.text_input("Nombre", value=modulo.nombre, key=f"nombre_mod_{modulo.id}")
+        nueva_desc = st.text_area("Descripción", value=modulo.descripcion or "", key=f"desc_mod_{modulo.id}")
+        nuevo_orden = st.number_input("Orden", value=modulo.orden, min_value=0, key=f"orden_mod_{modulo.id}")
+        nueva_pass = st.text_input("Nueva Contraseña (dejar vacío para mantener)", type="password", key=f"pass_mod_{modulo.id}")
+        
+        if st.form_submit_button("💾 Guardar Cambios"):
+            actualizar_modulo(modulo.id, nuevo_nombre, nueva_desc, nuevo_orden, nueva_pass if nueva_pass else None)
+            st.session_state.tabla_modulos_counter += 1
+            st.success("Cambios guardados")
+            st.rerun()
+
 def gestionar_modulos():
     """Sección para gestionar módulos"""
     st.header("📑 Gestión de Módulos")
     
-    diplomados = obtener_diplomados()
-    
-    if not diplomados:
+    if not hay_diplomados():
         st.warning("Primero debes crear un diplomado")
         return
     
-    # Seleccionar diplomado
-    diplomado_opciones = {d['nombre']: d['id'] for d in diplomados}
-    diplomado_seleccionado = st.selectbox(
-        "Selecciona un Diplomado",
-        options=list(diplomado_opciones.keys()),
-        key="select_dip_modulo"
-    )
-    diplomado_id = diplomado_opciones[diplomado_seleccionado]
+    # Seleccionar diplomado (solo se cargan los primeros que coinciden con la búsqueda)
+    diplomado = selector_diplomado("Selecciona un Diplomado", "select_dip_modulo")
+    if diplomado is None:
+        return
+    diplomado_id = diplomado.id
     
     # Inicializar contador para resetear formulario
     if 'form_modulo_counter' not in st.session_state:
@@ -192,65 +254,143 @@ def gestionar_modulos():
     if modulos:
         st.markdown("### Módulos Existentes")
         
-        for modulo in modulos:
-            with st.expander(f"📂 {modulo['nombre']} (Orden: {modulo['orden']})", expanded=False):
-                col1, col2 = st.columns([3, 1])
-                
-                with col1:
-                    st.markdown(f"**Descripción:** {modulo['descripcion'] or 'Sin descripción'}")
-                    
-                    # Contar clases
-                    clases = obtener_clases(modulo['id'])
-                    st.markdown(f"**Clases:** {len(clases)}")
-                
-                with col2:
-                    if st.button("🗑️ Eliminar", key=f"del_mod_{modulo['id']}"):
-                        eliminar_modulo(modulo['id'])
-                        st.success("Módulo eliminado")
-                        st.rerun()
-                
-                # Editar módulo
-                with st.form(f"form_edit_mod_{modulo['id']}"):
-                    st.markdown("**Editar Módulo**")
-                    nuevo_nombre = st.text_input("Nombre", value=modulo['nombre'], key=f"nombre_mod_{modulo['id']}")
-                    nueva_desc = st.text_area("Descripción", value=modulo['descripcion'] or "", key=f"desc_mod_{modulo['id']}")
-                    nuevo_orden = st.number_input("Orden", value=modulo['orden'], min_value=0, key=f"orden_mod_{modulo['id']}")
-                    nueva_pass = st.text_input("Nueva Contraseña (dejar vacío para mantener)", type="password", key=f"pass_mod_{modulo['id']}")
-                    
-                    if st.form_submit_button("💾 Guardar Cambios"):
-                        actualizar_modulo(modulo['id'], nuevo_nombre, nueva_desc, nuevo_orden, nueva_pass if nueva_pass else None)
-                        st.success("Cambios guardados")
-                        st.rerun()
+        # Clases de todos los módulos en una sola consulta
+        conteo_clases = contar_clases_por_modulo(diplomado_id)
+        
+        st.caption("Selecciona un módulo de la tabla para editarlo o eliminarlo.")
+        
+        if 'tabla_modulos_counter' not in st.session_state:
+            st.session_state.tabla_modulos_counter = 0
+        modulo = fila_seleccionada(
+            f"tabla_modulos_{diplomado_id}_{st.session_state.tabla_modulos_counter}",
+            modulos,
+            lambda m: {
+                "Orden": m.orden,
+                "Módulo": m.nombre,
+                "Clases": conteo_clases.get(m.id, 0),
+                "Descripción": m.descripcion or "Sin descripción",
+            },
+        )
+        
+        if modulo:
+            editar_modulo(modulo)
     else:
         st.info("No hay módulos creados para este diplomado.")
 
+def abrir_resultado_busqueda(resultado):
+    """Selecciona el diplomado y el módulo de un resultado de búsqueda (se ejecuta antes del rerun)"""
+    st.session_state.select_dip_clase_busqueda = resultado.diplomado_nombre
+    st.session_state.select_dip_clase = resultado.diplomado_nombre
+    st.session_state.select_mod_clase = resultado.modulo_nombre
+
+def buscar_sesiones():
+    """Buscador de sesiones en todos los diplomados"""
+    with st.expander("🔎 Buscar Sesiones", expanded=False):
+        texto = st.text_input(
+            "Buscar por título, descripción, módulo o diplomado",
+            key="buscar_sesiones_admin"
+        )
+        if not texto.strip():
+            return
+        
+        resultados = buscar_clases(texto, None, 20)
+        if not resultados:
+            st.info("No se encontraron sesiones")
+            return
+        
+        for resultado in resultados:
+            col_info, col_boton = st.columns([4, 1])
+            with col_info:
+                st.markdown(
+                    f"**Sesión {resultado.numero_sesion or ''}: {resultado.nombre}** "
+                    f"({formatear_fecha(resultado.fecha_sesion)})"
+                )
+                st.caption(f"{resultado.diplomado_nombre} › {resultado.modulo_nombre} — {resultado.fragmento}")
+            with col_boton:
+                st.button(
+                    "Abrir",
+                    key=f"abrir_sesion_{resultado.id}",
+                    on_click=abrir_resultado_busqueda,
+                    args=(resultado,),
+                    use_container_width=True
+                )
+
+def editar_clase(clase_id):
+    """Formulario de edición de una sesión, con la fila completa leída al abrirlo"""
+    clase = obtener_clase(clase_id)
+    if not clase:
+        return
+    
+    fecha_mostrar = formatear_fecha(clase.fecha_sesion)
+    numero_mostrar = clase.numero_sesion if clase.numero_sesion else clase.orden
+    
+    st.markdown(f"#### ✏️ Sesión {numero_mostrar} - {clase.nombre} ({fecha_mostrar})")
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        st.markdown(f"**URL:** {clase.url_video[:50]}...")
+    
+    with col2:
+        if st.button("🗑️ Eliminar", key=f"del_clase_{clase.id}"):
+            eliminar_clase(clase.id)
+            st.session_state.tabla_clases_counter += 1
+            st.success("Sesión eliminada")
+            st.rerun()
+    
+    # Editar sesión/clase
+    with st.form(f"form_edit_clase_{clase.id}"):
+        st.markdown("**Editar Sesión**")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            nuevo_numero = st.number_input("Número de Sesión", value=numero_mostrar, min_value=1, key=f"num_clase_{clase.id}")
+            nueva_fecha = st.date_input("Fecha", value=None, key=f"fecha_clase_{clase.id}")
+        with col2:
+            nuevo_nombre = st.text_input("Título", value=clase.nombre, key=f"nombre_clase_{clase.id}")
+        
+        nueva_desc = st.text_area("Descripción", value=clase.descripcion or "", key=f"desc_clase_{clase.id}")
+        nueva_url_input = st.text_area(
+            "Iframe o URL Video", 
+            value=clase.url_video, 
+            key=f"url_clase_{clase.id}",
+            height=100
+        )
+        
+        if st.form_submit_button("💾 Guardar Cambios"):
+            # Extraer URL del iframe si es necesario
+            nueva_url = extraer_url_de_iframe(nueva_url_input)
+            fecha_final = str(nueva_fecha) if nueva_fecha else clase.fecha_sesion
+            actualizar_clase(clase.id, nuevo_nombre, nueva_desc, nueva_url, nuevo_numero, fecha_final)
+            st.session_state.tabla_clases_counter += 1
+            st.success("Cambios guardados")
+            st.rerun()
+
 def gestionar_clases():
     """Sección para gestionar clases"""
     st.header("🎥 Gestión de Clases")
     
-    diplomados = obtener_diplomados()
-    
-    if not diplomados:
+    if not hay_diplomados():
         st.warning("Primero debes crear un diplomado")
         return
     
-    # Seleccionar diplomado
-    diplomado_opciones = {d['nombre']: d['id'] for d in diplomados}
-    diplomado_seleccionado = st.selectbox(
-        "Selecciona un Diplomado",
-        options=list(diplomado_opciones.keys()),
-        key="select_dip_clase"
-    )
-    diplomado_id = diplomado_opciones[diplomado_seleccionado]
+    buscar_sesiones()
     
-    modulos = obtener_modulos(diplomado_id)
+    # Seleccionar diplomado (solo se cargan los primeros que coinciden con la búsqueda)
+    diplomado = selector_diplomado("Selecciona un Diplomado", "select_dip_clase")
+    if diplomado is None:
+        return
+    diplomado_id = diplomado.id
+    
+    # Módulos del diplomado en una sola consulta
+    arbol = obtener_arbol_diplomado(diplomado_id)
+    modulos = arbol.modulos if arbol else []
     
     if not modulos:
         st.warning("Primero debes crear módulos para este diplomado")
         return
     
     # Seleccionar módulo
-    modulo_opciones = {m['nombre']: m['id'] for m in modulos}
+    modulo_opciones = {m.nombre: m.id for m in modulos}
     modulo_seleccionado = st.selectbox(
         "Selecciona un Módulo",
         options=list(modulo_opciones.keys()),
@@ -262,102 +402,11 @@ def gestionar_clases():
     if 'form_clase_counter' not in st.session_state:
         st.session_state.form_clase_counter = 0
     
-    # Crear sesiones masivas
-    with st.expander("➕➕ Crear Sesiones Masivas", expanded=False):
-        st.markdown("**Crea múltiples sesiones de una vez (sin descripción ni video)**")
-        
-        with st.form("form_sesiones_masivas"):
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                cantidad_sesiones = st.number_input(
-                    "¿Cuántas sesiones crear?*",
-                    min_value=1,
-                    max_value=50,
-                    value=5,
-                    step=1,
-                    help="Número total de sesiones a crear"
-                )
-            
-            with col2:
-                numero_inicio = st.number_input(
-                    "¿En qué número inician?*",
-                    min_value=1,
-                    value=1,
-                    step=1,
-                    help="Número de la primera sesión"
-                )
-            
-            st.markdown(f"**Se crearán {cantidad_sesiones} sesiones: desde la {numero_inicio} hasta la {numero_inicio + cantidad_sesiones - 1}**")
-            
-            st.markdown("---")
-            st.markdown("**Ingresa los datos para cada sesión:**")
-            
-            # Crear campos dinámicos para cada sesión
-            sesiones_data = []
-            for i in range(int(cantidad_sesiones)):
-                numero_sesion = int(numero_inicio) + i
-                st.markdown(f"### Sesión {numero_sesion}")
-                
-                col_fecha, col_titulo = st.columns(2)
-                
-                with col_fecha:
-                    fecha = st.date_input(
-                        f"Fecha",
-                        key=f"fecha_masiva_{i}",
-                        label_visibility="collapsed"
-                    )
-                
-                with col_titulo:
-                    titulo = st.text_input(
-                        f"Título/Tema",
-                        key=f"titulo_masiva_{i}",
-                        placeholder=f"Título de la sesión {numero_sesion}",
-                        label_visibility="collapsed"
-                    )
-                
-                sesiones_data.append({
-                    'numero': numero_sesion,
-                    'fecha': fecha,
-                    'titulo': titulo
-                })
-            
-            submit_masivo = st.form_submit_button("✅ Crear Todas las Sesiones", type="primary")
-            
-            if submit_masivo:
-                # Validar que todos tengan título
-                sesiones_sin_titulo = [s['numero'] for s in sesiones_data if not s['titulo']]
-                
-                if sesiones_sin_titulo:
-                    st.error(f"⚠️ Las siguientes sesiones no tienen título: {', '.join(map(str, sesiones_sin_titulo))}")
-                else:
-                    # Crear todas las sesiones
-                    creadas = 0
-                    errores = []
-                    
-                    for sesion in sesiones_data:
-                        try:
-                            # Crear con descripción indicando que el video se subirá próximamente
-                            crear_clase(
-                                modulo_id,
-                                sesion['titulo'],
-                                "La clase se subirá próximamente",
-                                "",  # URL vacía
-                                sesion['numero'],
-                                str(sesion['fecha'])
-                            )
-                            creadas += 1
-                        except Exception as e:
-                            errores.append(f"Sesión {sesion['numero']}: {str(e)}")
-                    
-                    if creadas > 0:
-                        st.success(f"✅ {creadas} sesiones creadas correctamente")
-                    
-                    if errores:
-                        st.error("❌ Errores:\n" + "\n".join(errores))
-                    
-                    if creadas > 0:
-                        st.rerun()
+    # Editor tipo hoja de cálculo: crear, editar y eliminar varias sesiones a la vez
+    # (solo se carga el módulo completo cuando se abre)
+    if st.toggle("📝 Editar Sesiones en Tabla", key="editor_sesiones_abierto"):
+        st.markdown("**Edita las celdas, agrega o elimina filas, o pega un rango copiado de una hoja de cálculo. Solo se guardan las filas que cambiaron.**")
+        editor_sesiones(modulo_id)
     
     # Crear nueva sesión/clase individual
     with st.expander("➕ Crear Nueva Sesión Individual", expanded=False):
@@ -398,69 +447,48 @@ def gestionar_clases():
                         st.rerun()
     
     # Listar sesiones/clases
-    clases = obtener_clases(modulo_id)
+    clave_pagina = f"admin_pagina_clases_{modulo_id}"
+    # El listado solo necesita número, fecha y título; la sesión completa se lee al editarla
+    pagina, siguiente = paginar(
+        clave_pagina,
+        lambda after: obtener_clases_pagina(modulo_id, after, CLASES_POR_PAGINA, resumen=True),
+    )
     
-    if clases:
+    if pagina:
         st.markdown("### Sesiones Existentes")
+        st.caption("Selecciona una sesión de la tabla para editarla o eliminarla.")
         
-        for clase in clases:
-            fecha_mostrar = formatear_fecha(clase.get('fecha_sesion'))
-            numero_mostrar = clase['numero_sesion'] if clase.get('numero_sesion') else clase['orden']
-            
-            with st.expander(f"📅 Sesión {numero_mostrar} - {clase['nombre']} ({fecha_mostrar})", expanded=False):
-                col1, col2 = st.columns([3, 1])
-                
-                with col1:
-                    st.markdown(f"**Fecha:** {fecha_mostrar}")
-                    st.markdown(f"**Número de Sesión:** {numero_mostrar}")
-                    st.markdown(f"**Descripción:** {clase['descripcion'] or 'Sin descripción'}")
-                    st.markdown(f"**URL:** {clase['url_video'][:50]}...")
-                
-                with col2:
-                    if st.button("🗑️ Eliminar", key=f"del_clase_{clase['id']}"):
-                        eliminar_clase(clase['id'])
-                        st.success("Sesión eliminada")
-                        st.rerun()
-                
-                # Editar sesión/clase
-                with st.form(f"form_edit_clase_{clase['id']}"):
-                    st.markdown("**Editar Sesión**")
-                    
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        nuevo_numero = st.number_input("Número de Sesión", value=numero_mostrar, min_value=1, key=f"num_clase_{clase['id']}")
-                        nueva_fecha = st.date_input("Fecha", value=None, key=f"fecha_clase_{clase['id']}")
-                    with col2:
-                        nuevo_nombre = st.text_input("Título", value=clase['nombre'], key=f"nombre_clase_{clase['id']}")
-                    
-                    nueva_desc = st.text_area("Descripción", value=clase['descripcion'] or "", key=f"desc_clase_{clase['id']}")
-                    nueva_url_input = st.text_area(
-                        "Iframe o URL Video", 
-                        value=clase['url_video'], 
-                        key=f"url_clase_{clase['id']}",
-                        height=100
-                    )
-                    
-                    if st.form_submit_button("💾 Guardar Cambios"):
-                        # Extraer URL del iframe si es necesario
-                        nueva_url = extraer_url_de_iframe(nueva_url_input)
-                        fecha_final = str(nueva_fecha) if nueva_fecha else clase.get('fecha_sesion', '')
-                        actualizar_clase(clase['id'], nuevo_nombre, nueva_desc, nueva_url, nuevo_numero, fecha_final)
-                        st.success("Cambios guardados")
-                        st.rerun()
+        # La tabla se recrea (y se limpia su selección) al cambiar de página o tras guardar
+        if 'tabla_clases_counter' not in st.session_state:
+            st.session_state.tabla_clases_counter = 0
+        numero_pagina = len(st.session_state[clave_pagina])
+        clase = fila_seleccionada(
+            f"tabla_clases_{modulo_id}_{numero_pagina}_{st.session_state.tabla_clases_counter}",
+            pagina,
+            lambda c: {
+                "Sesión": c.numero_sesion,
+                "Fecha": formatear_fecha(c.fecha_sesion),
+                "Título": c.nombre,
+            },
+        )
+        
+        controles_paginacion(clave_pagina, siguiente)
+        
+        if clase:
+            editar_clase(clase.id)
     else:
         st.info("No hay clases creadas para este módulo.")
     
     # Mover sesiones entre módulos
-    if clases:
+    if pagina:
         st.markdown("---")
         with st.expander("🔄 Mover Sesiones a Otro Módulo", expanded=False):
             st.markdown("**Selecciona las sesiones que deseas mover y el módulo destino**")
             
-            # Selector de sesiones
+            # Selector de sesiones (las de la página que se está mostrando)
             sesiones_opciones = {
-                f"Sesión {c.get('numero_sesion', c['orden'])} - {c['nombre']} ({formatear_fecha(c.get('fecha_sesion'))})": c['id'] 
-                for c in clases
+                f"Sesión {c.numero_sesion} - {c.nombre} ({formatear_fecha(c.fecha_sesion)})": c.id 
+                for c in pagina
             }
             
             sesiones_seleccionadas = st.multiselect(
@@ -470,10 +498,10 @@ def gestionar_clases():
             )
             
             # Selector de módulo destino (excluyendo el actual)
-            modulos_destino = [m for m in modulos if m['id'] != modulo_id]
+            modulos_destino = [m for m in modulos if m.id != modulo_id]
             
             if modulos_destino:
-                modulo_destino_opciones = {m['nombre']: m['id'] for m in modulos_destino}
+                modulo_destino_opciones = {m.nombre: m.id for m in modulos_destino}
                 
                 modulo_destino = st.selectbox(
                     "Mover a módulo",
@@ -486,17 +514,24 @@ def gestionar_clases():
                         st.error("⚠️ Debes seleccionar al menos una sesión")
                     else:
                         nuevo_modulo_id = modulo_destino_opciones[modulo_destino]
-                        movidas = 0
-                        
-                        for sesion_nombre in sesiones_seleccionadas:
-                            clase_id = sesiones_opciones[sesion_nombre]
-                            mover_clase_a_modulo(clase_id, nuevo_modulo_id)
-                            movidas += 1
+                        clase_ids = [sesiones_opciones[nombre] for nombre in sesiones_seleccionadas]
+                        movidas = mover_clases_a_modulo(clase_ids, nuevo_modulo_id)
                         
                         st.success(f"✅ {movidas} sesión(es) movida(s) a '{modulo_destino}'")
                         st.rerun()
             else:
                 st.warning("No hay otros módulos disponibles. Crea más módulos para poder mover sesiones.")
+        
+        # Renumerar sesiones del módulo
+        with st.expander("🔢 Renumerar Sesiones", expanded=False):
+            st.markdown("**Asigna números consecutivos a las sesiones de este módulo según su fecha**")
+            
+            numero_inicial = st.number_input("Número de la primera sesión", min_value=1, value=1, step=1, key="renumerar_inicio")
+            
+            if st.button("🔢 Renumerar por Fecha", key="btn_renumerar"):
+                renumeradas = renumerar_clases(modulo_id, int(numero_inicial))
+                st.success(f"✅ {renumeradas} sesión(es) renumerada(s)")
+                st.rerun()
 
 def main():
     """Función principal del panel admin"""
@@ -517,6 +552,25 @@ def main():
     
     st.markdown("---")
     
+    panel_admin()
+
+
+def seleccionar_menu(opcion):
+    """Callback de los botones del menú: cambia de sección antes del rerun"""
+    st.session_state.menu_admin = opcion
+
+
+@st.fragment
+@trazar_ejecucion("pages/1_admin.py (panel)")
+def panel_admin():
+    """
+    Menú y sección seleccionada del panel.
+
+    Es un fragmento: cambiar de sección o usar los controles de una sección
+    vuelve a ejecutar solo el panel, no el CSS ni el encabezado de la página.
+    Cuando se ejecuta solo el fragmento, la traza de consultas se muestra al
+    final del panel.
+    """
     # Navegación principal con tabs
     if 'menu_admin' not in st.session_state:
         st.session_state.menu_admin = "Diplomados"
@@ -524,19 +578,13 @@ def main():
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        if st.button("📚 Diplomados", type="primary" if st.session_state.menu_admin == "Diplomados" else "secondary", use_container_width=True):
-            st.session_state.menu_admin = "Diplomados"
-            st.rerun()
+        st.button("📚 Diplomados", on_click=seleccionar_menu, args=("Diplomados",), type="primary" if st.session_state.menu_admin == "Diplomados" else "secondary", use_container_width=True)
     
     with col2:
-        if st.button("📑 Módulos", type="primary" if st.session_state.menu_admin == "Módulos" else "secondary", use_container_width=True):
-            st.session_state.menu_admin = "Módulos"
-            st.rerun()
+        st.button("📑 Módulos", on_click=seleccionar_menu, args=("Módulos",), type="primary" if st.session_state.menu_admin == "Módulos" else "secondary", use_container_width=True)
     
     with col3:
-        if st.button("🎥 Clases", type="primary" if st.session_state.menu_admin == "Clases" else "secondary", use_container_width=True):
-            st.session_state.menu_admin = "Clases"
-            st.rerun()
+        st.button("🎥 Clases", on_click=seleccionar_menu, args=("Clases",), type="primary" if st.session_state.menu_admin == "Clases" else "secondary", use_container_width=True)
     
     st.markdown("---")
     
@@ -550,4 +598,5 @@ def main():
         gestionar_clases()
 
 if __name__ == "__main__":
-    main()
+    with trazar_ejecucion("pages/1_admin.py"):
+        main()
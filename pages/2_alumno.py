@@ -5,8 +5,16 @@ import os
 # Agregar el directorio raíz al path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.db_manager import obtener_diplomado, obtener_modulos, obtener_clases, verificar_password_modulo
+from database.db_manager import (
+    IntentosAgotadosError, asegurar_esquema, buscar_clases, contar_clases_por_modulo, obtener_arbol_diplomado,
+    obtener_clases_pagina, verificar_password_modulo,
+)
 from utils.helpers import formatear_fecha
+from utils.paginacion import controles_paginacion, paginar
+from utils.sesion import id_sesion
+
+# Sesiones que se muestran por página
+CLASES_POR_PAGINA = 20
 
 st.set_page_config(
     page_title="Mis Clases - VodsAcademia",
@@ -39,6 +47,9 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# Asegurar el esquema de la base de datos (solo migra la primera vez en cada proceso)
+asegurar_esquema()
+
 def logout():
     """Cierra la sesión"""
     st.session_state.tipo_usuario = None
@@ -48,6 +59,71 @@ def logout():
 
 
 
+def seleccionar_modulo(modulo_id):
+    """
+    Callback de los botones que cambian de módulo.
+
+    Al correr antes del rerun, el fragmento se dibuja una sola vez y ya con el
+    módulo nuevo (con st.rerun() dentro del botón se ejecutaba dos veces).
+    """
+    st.session_state.modulo_seleccionado = modulo_id
+    # Resetear la clase seleccionada al cambiar de módulo
+    if 'clase_seleccionada' in st.session_state:
+        del st.session_state.clase_seleccionada
+
+
+def desbloquear_modulo(modulo_id):
+    """Callback del botón Desbloquear: valida la contraseña escrita para el módulo"""
+    password_modulo = st.session_state.get(f"pass_mod_{modulo_id}", "")
+    if not password_modulo:
+        st.session_state[f"error_desbloqueo_{modulo_id}"] = "⚠️ Debes ingresar la contraseña"
+        return
+    try:
+        correcta = verificar_password_modulo(modulo_id, password_modulo, id_sesion())
+    except IntentosAgotadosError as e:
+        st.session_state[f"error_desbloqueo_{modulo_id}"] = f"⏳ Demasiados intentos. Vuelve a intentarlo en {e.espera:.0f} segundos"
+        return
+    if correcta:
+        st.session_state.modulos_autenticados.add(modulo_id)
+    else:
+        st.session_state[f"error_desbloqueo_{modulo_id}"] = "❌ Contraseña incorrecta"
+
+
+def mostrar_busqueda_sesiones(diplomado_id):
+    """Buscador de sesiones del diplomado con acceso directo al módulo de cada resultado"""
+    with st.expander("🔎 Buscar sesiones en este diplomado", expanded=False):
+        texto = st.text_input(
+            "Buscar por título, descripción o módulo",
+            key="buscar_sesiones_alumno",
+            placeholder="Ej.: validación emocional"
+        )
+        if not texto.strip():
+            return
+        
+        resultados = buscar_clases(texto, diplomado_id, 20)
+        if not resultados:
+            st.info("🔎 No se encontraron sesiones")
+            return
+        
+        for resultado in resultados:
+            col_info, col_boton = st.columns([4, 1])
+            with col_info:
+                st.markdown(
+                    f"**Sesión {resultado.numero_sesion or ''}: {resultado.nombre}** · "
+                    f"📂 {resultado.modulo_nombre} · 📅 {formatear_fecha(resultado.fecha_sesion)}"
+                )
+                # El extracto puede venir de la descripción: solo en módulos desbloqueados
+                if resultado.modulo_id in st.session_state.modulos_autenticados:
+                    st.caption(resultado.fragmento)
+            with col_boton:
+                st.button(
+                    "Ir al módulo",
+                    key=f"ir_sesion_{resultado.id}",
+                    on_click=seleccionar_modulo,
+                    args=(resultado.modulo_id,),
+                    use_container_width=True
+                )
+
 def main():
     """Función principal de la vista de alumno"""
     
@@ -68,9 +144,9 @@ def main():
             st.switch_page("app.py")
         return
     
-    # Obtener información del diplomado
+    # Obtener el diplomado con sus módulos en una sola consulta
     diplomado_id = st.session_state.diplomado_id
-    diplomado = obtener_diplomado(diplomado_id)
+    diplomado = obtener_arbol_diplomado(diplomado_id)
     
     if not diplomado:
         st.error("Error: Diplomado no encontrado")
@@ -80,9 +156,9 @@ def main():
     # Header con título y botón de cerrar sesión
     col1, col2 = st.columns([5, 1])
     with col1:
-        st.title(f"🎓 {diplomado['nombre']}")
-        if diplomado['descripcion']:
-            st.markdown(diplomado['descripcion'])
+        st.title(f"🎓 {diplomado.nombre}")
+        if diplomado.descripcion:
+            st.markdown(diplomado.descripcion)
     with col2:
         st.markdown("")  # Espaciado
         if st.button("🚪 Cerrar Sesión"):
@@ -90,8 +166,29 @@ def main():
     
     st.markdown("---")
     
+    # Inicializar session_state para módulos autenticados
+    if 'modulos_autenticados' not in st.session_state:
+        st.session_state.modulos_autenticados = set()
+    
+    mostrar_modulos(diplomado_id)
+
+
+@st.fragment
+def mostrar_modulos(diplomado_id):
+    """
+    Selector de módulos, buscador y sesiones del módulo elegido.
+
+    Es un fragmento: elegir un módulo, desbloquearlo o cambiar de página
+    vuelve a ejecutar solo esta función, no el CSS ni el encabezado de la
+    página. El árbol del diplomado y los conteos salen de la caché de lecturas.
+    """
+    diplomado = obtener_arbol_diplomado(diplomado_id)
+    if not diplomado:
+        # Se eliminó mientras se navegaba: la página completa lo informa
+        st.rerun()
+    
     # Contenido principal
-    modulos = obtener_modulos(diplomado_id)
+    modulos = diplomado.modulos
     
     if not modulos:
         st.info("📭 No hay módulos disponibles en este diplomado aún.")
@@ -100,17 +197,13 @@ def main():
     # Selector de módulos en el contenido principal
     st.markdown("### 📚 Selecciona un Módulo")
     
-    # Inicializar session_state para módulos autenticados
-    if 'modulos_autenticados' not in st.session_state:
-        st.session_state.modulos_autenticados = set()
-    
     # Almacenar el módulo seleccionado en session_state
     if 'modulo_seleccionado' not in st.session_state:
-        st.session_state.modulo_seleccionado = modulos[0]['id']
+        st.session_state.modulo_seleccionado = modulos[0].id
     
     # Crear tabs o botones para módulos
-    modulo_nombres = [f"📂 {m['nombre']}" for m in modulos]
-    modulo_ids = [m['id'] for m in modulos]
+    modulo_nombres = [f"📂 {m.nombre}" for m in modulos]
+    modulo_ids = [m.id for m in modulos]
     
     # Encontrar el índice del módulo actual
     try:
@@ -119,6 +212,9 @@ def main():
         idx_actual = 0
         st.session_state.modulo_seleccionado = modulo_ids[0]
     
+    # Una consulta de conteo para todos los botones: las sesiones solo se leen por página
+    clases_por_modulo = contar_clases_por_modulo(diplomado_id)
+    
     # Crear columnas para los módulos
     num_modulos = len(modulos)
     cols_modulos = st.columns(num_modulos if num_modulos <= 5 else 5)
@@ -126,46 +222,45 @@ def main():
     for idx, (modulo, col) in enumerate(zip(modulos, cols_modulos if num_modulos <= 5 else cols_modulos * (num_modulos // 5 + 1))):
         if idx < num_modulos:
             with col:
-                clases_count = len(obtener_clases(modulo['id']))
-                es_seleccionado = modulo['id'] == st.session_state.modulo_seleccionado
-                esta_autenticado = modulo['id'] in st.session_state.modulos_autenticados
+                clases_count = clases_por_modulo.get(modulo.id, 0)
+                es_seleccionado = modulo.id == st.session_state.modulo_seleccionado
+                esta_autenticado = modulo.id in st.session_state.modulos_autenticados
                 
                 # Mostrar icono de candado si no está autenticado
                 icono = "📂" if esta_autenticado else "🔒"
                 
-                if st.button(
-                    f"{icono} {modulo['nombre']}\n({clases_count} clases)",
-                    key=f"btn_mod_{modulo['id']}",
+                st.button(
+                    f"{icono} {modulo.nombre}\n({clases_count} clases)",
+                    key=f"btn_mod_{modulo.id}",
+                    on_click=seleccionar_modulo,
+                    args=(modulo.id,),
                     type="primary" if es_seleccionado else "secondary",
                     use_container_width=True
-                ):
-                    st.session_state.modulo_seleccionado = modulo['id']
-                    # Resetear la clase seleccionada al cambiar de módulo
-                    if 'clase_seleccionada' in st.session_state:
-                        del st.session_state.clase_seleccionada
-                    st.rerun()
+                )
+    
+    mostrar_busqueda_sesiones(diplomado.id)
     
     st.markdown("---")
     
     # Obtener módulo seleccionado
     modulo_actual = None
     for m in modulos:
-        if m['id'] == st.session_state.modulo_seleccionado:
+        if m.id == st.session_state.modulo_seleccionado:
             modulo_actual = m
             break
     
     if not modulo_actual:
         modulo_actual = modulos[0]
-        st.session_state.modulo_seleccionado = modulo_actual['id']
+        st.session_state.modulo_seleccionado = modulo_actual.id
     
     # Verificar si el módulo está autenticado
-    modulo_autenticado = modulo_actual['id'] in st.session_state.modulos_autenticados
+    modulo_autenticado = modulo_actual.id in st.session_state.modulos_autenticados
     
     # Mostrar información del módulo
-    st.markdown(f"## 📂 {modulo_actual['nombre']}")
+    st.markdown(f"## 📂 {modulo_actual.nombre}")
     
-    if modulo_actual['descripcion']:
-        st.markdown(f"*{modulo_actual['descripcion']}*")
+    if modulo_actual.descripcion:
+        st.markdown(f"*{modulo_actual.descripcion}*")
     
     st.markdown("---")
     
@@ -176,48 +271,59 @@ def main():
         
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
-            password_modulo = st.text_input(
+            st.text_input(
                 "Contraseña del Módulo",
                 type="password",
-                key=f"pass_mod_{modulo_actual['id']}"
+                key=f"pass_mod_{modulo_actual.id}"
             )
             
-            if st.button("🔓 Desbloquear Módulo", type="primary", use_container_width=True):
-                if not password_modulo:
-                    st.error("⚠️ Debes ingresar la contraseña")
-                else:
-                    if verificar_password_modulo(modulo_actual['id'], password_modulo):
-                        st.session_state.modulos_autenticados.add(modulo_actual['id'])
-                        st.success("✅ Módulo desbloqueado")
-                        st.rerun()
-                    else:
-                        st.error("❌ Contraseña incorrecta")
+            st.button(
+                "🔓 Desbloquear Módulo",
+                on_click=desbloquear_modulo,
+                args=(modulo_actual.id,),
+                type="primary",
+                use_container_width=True
+            )
+            error = st.session_state.pop(f"error_desbloqueo_{modulo_actual.id}", None)
+            if error:
+                st.error(error)
         
         # Mostrar solo las fechas de las sesiones (sin contenido)
         st.markdown("---")
         st.markdown("### 📅 Sesiones Programadas (Vista Previa)")
         st.info("🔒 Desbloquea el módulo para acceder al contenido completo de las sesiones")
         
-        clases = obtener_clases(modulo_actual['id'])
+        # La vista previa solo muestra fecha, número y título: basta el resumen
+        clave_pagina = f"pagina_clases_{modulo_actual.id}"
+        clases, siguiente = paginar(
+            clave_pagina,
+            lambda after: obtener_clases_pagina(modulo_actual.id, after, CLASES_POR_PAGINA, resumen=True),
+        )
         
         if clases:
             for clase in clases:
-                fecha_mostrar = formatear_fecha(clase.get('fecha_sesion'))
-                numero_sesion = clase.get('numero_sesion', clase.get('orden', ''))
+                fecha_mostrar = formatear_fecha(clase.fecha_sesion)
+                numero_sesion = clase.numero_sesion
                 
                 col_fecha, col_nombre = st.columns([1, 3])
                 with col_fecha:
                     st.markdown(f"**📅 {fecha_mostrar}**")
                 with col_nombre:
-                    st.markdown(f"**Sesión {numero_sesion}:** {clase['nombre']}")
+                    st.markdown(f"**Sesión {numero_sesion}:** {clase.nombre}")
+            
+            controles_paginacion(clave_pagina, siguiente)
         else:
             st.info("📭 No hay sesiones disponibles en este módulo aún.")
         
         return
     
     # Si el módulo está autenticado, mostrar el contenido completo
-    # Obtener clases del módulo
-    clases = obtener_clases(modulo_actual['id'])
+    # Obtener la página actual de clases del módulo
+    clave_pagina = f"pagina_clases_{modulo_actual.id}"
+    clases, siguiente = paginar(
+        clave_pagina,
+        lambda after: obtener_clases_pagina(modulo_actual.id, after, CLASES_POR_PAGINA),
+    )
     
     if not clases:
         st.info("📭 No hay sesiones disponibles en este módulo aún.")
@@ -227,22 +333,22 @@ def main():
     st.markdown("### 📅 Sesiones Programadas")
     
     for clase in clases:
-        fecha_mostrar = formatear_fecha(clase.get('fecha_sesion'))
-        numero_sesion = clase.get('numero_sesion', clase.get('orden', ''))
+        fecha_mostrar = formatear_fecha(clase.fecha_sesion)
+        numero_sesion = clase.numero_sesion
         
         # Crear fila con información de la sesión y botón
         col_info, col_boton = st.columns([4, 1])
         
         with col_info:
-            st.markdown(f"**Sesión {numero_sesion}: {clase['nombre']}**")
+            st.markdown(f"**Sesión {numero_sesion}: {clase.nombre}**")
             st.markdown(f"📅 {fecha_mostrar}")
-            if clase['descripcion']:
-                st.markdown(f"*{clase['descripcion']}*")
+            if clase.descripcion:
+                st.markdown(f"*{clase.descripcion}*")
         
         with col_boton:
             # Verificar si hay URL de video
-            if clase['url_video'] and clase['url_video'].strip():
-                url_video = clase['url_video'].strip()
+            if clase.url_video and clase.url_video.strip():
+                url_video = clase.url_video.strip()
                 # Crear botón HTML personalizado que abre en nueva pestaña
                 button_html = f"""
                     <div style="display: flex; align-items: center; height: 100%; padding-top: 8px;">
@@ -271,6 +377,8 @@ def main():
                 st.markdown("<div style='padding-top: 8px;'><em>📹 Próximamente</em></div>", unsafe_allow_html=True)
         
         st.markdown("---")
+    
+    controles_paginacion(clave_pagina, siguiente)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,137 @@
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+from database.db_manager import guardar_cambios_clases, obtener_clases
+from utils.helpers import extraer_url_de_iframe
+
+# Columnas editables, en el orden en que se muestran
+COLUMNAS = ["numero_sesion", "fecha_sesion", "nombre", "descripcion", "url_video"]
+
+# Descripción de las sesiones nuevas, igual que en la creación masiva anterior
+DESCRIPCION_NUEVAS = "La clase se subirá próximamente"
+
+
+def _a_fecha(valor):
+    """Convierte la fecha guardada ('YYYY-MM-DD') en date; None si falta o no se entiende"""
+    if isinstance(valor, date):
+        return valor
+    try:
+        return date.fromisoformat(str(valor)[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+def _vacio(valor):
+    return valor is None or (not isinstance(valor, str) and pd.isna(valor))
+
+
+def _valores(fila):
+    """Normaliza una fila (Clase o fila del editor) para compararla y guardarla"""
+    numero = fila['numero_sesion']
+    fecha = _a_fecha(fila['fecha_sesion'])
+    return {
+        'numero_sesion': None if _vacio(numero) else int(numero),
+        'fecha_sesion': fecha.isoformat() if fecha else None,
+        'nombre': "" if _vacio(fila['nombre']) else str(fila['nombre']),
+        'descripcion': None if _vacio(fila['descripcion']) else str(fila['descripcion']),
+        'url_video': "" if _vacio(fila['url_video']) else str(fila['url_video']),
+    }
+
+
+def diferencias(originales, editadas):
+    """
+    Compara las clases cargadas con el DataFrame que devuelve el editor.
+
+    Retorna (nuevas, modificadas, eliminadas, errores): solo las filas que
+    cambiaron, listas para guardar_cambios_clases, y los mensajes de las filas
+    incompletas. Las filas nuevas que quedaron vacías se ignoran.
+    """
+    por_id = {clase.id: _valores(clase._asdict()) for clase in originales}
+    nuevas, modificadas, errores = [], [], []
+    vistos = set()
+
+    for posicion, fila in enumerate(editadas.to_dict('records'), start=1):
+        valores = _valores(fila)
+        clase_id = None if _vacio(fila['id']) else int(fila['id'])
+
+        if clase_id is None and not any(valores[columna] for columna in ("nombre", "fecha_sesion", "url_video")):
+            continue
+        if clase_id is not None:
+            vistos.add(clase_id)
+            if valores == por_id.get(clase_id):
+                continue
+
+        faltantes = [
+            etiqueta for columna, etiqueta in (("numero_sesion", "número"), ("fecha_sesion", "fecha"), ("nombre", "título"))
+            if not valores[columna]
+        ]
+        if faltantes:
+            errores.append(f"Fila {posicion}: falta {', '.join(faltantes)}")
+            continue
+
+        # Se puede pegar el iframe completo, como en el formulario individual
+        valores['url_video'] = extraer_url_de_iframe(valores['url_video'])
+        if clase_id is None:
+            nuevas.append(valores)
+        else:
+            modificadas.append({'id': clase_id, **valores})
+
+    eliminadas = [clase_id for clase_id in por_id if clase_id not in vistos]
+    return nuevas, modificadas, eliminadas, errores
+
+
+def editor_sesiones(modulo_id):
+    """
+    Editor tipo hoja de cálculo de todas las sesiones de un módulo.
+
+    Permite editar celdas, agregar y borrar filas y pegar rangos copiados de una
+    hoja de cálculo. Al guardar solo se escriben las filas que cambiaron, en una
+    sola transacción.
+    """
+    clases = obtener_clases(modulo_id)
+    tabla = pd.DataFrame(
+        [{'id': clase.id, **{columna: getattr(clase, columna) for columna in COLUMNAS}} for clase in clases],
+        columns=['id', *COLUMNAS],
+    )
+    tabla['fecha_sesion'] = [_a_fecha(valor) for valor in tabla['fecha_sesion']]
+
+    # El editor guarda sus ediciones relativas a la tabla cargada: tras guardar se recrea
+    if 'editor_sesiones_counter' not in st.session_state:
+        st.session_state.editor_sesiones_counter = 0
+
+    version = f"{modulo_id}_{st.session_state.editor_sesiones_counter}"
+    with st.form(f"form_editor_sesiones_{version}"):
+        editadas = st.data_editor(
+            tabla,
+            key=f"editor_sesiones_{version}",
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            disabled=["id"],
+            column_config={
+                'id': None,
+                'numero_sesion': st.column_config.NumberColumn("Sesión", min_value=1, step=1),
+                'fecha_sesion': st.column_config.DateColumn("Fecha", format="DD/MM/YYYY"),
+                'nombre': st.column_config.TextColumn("Título"),
+                'descripcion': st.column_config.TextColumn("Descripción", default=DESCRIPCION_NUEVAS),
+                'url_video': st.column_config.TextColumn("Iframe o URL Video"),
+            },
+        )
+
+        if st.form_submit_button("💾 Guardar Cambios", type="primary"):
+            nuevas, modificadas, eliminadas, errores = diferencias(clases, editadas)
+            if errores:
+                st.error("⚠️ No se guardó nada. " + "; ".join(errores))
+            elif not (nuevas or modificadas or eliminadas):
+                st.info("No hay cambios que guardar")
+            else:
+                try:
+                    creadas, actualizadas, borradas = guardar_cambios_clases(modulo_id, nuevas, modificadas, eliminadas)
+                except Exception as e:
+                    st.error(f"❌ No se guardó ningún cambio: {str(e)}")
+                else:
+                    st.session_state.editor_sesiones_counter += 1
+                    st.success(f"✅ {creadas} creada(s), {actualizadas} actualizada(s), {borradas} eliminada(s)")
+                    st.rerun()
@@ -0,0 +1,45 @@
+import streamlit as st
+
+
+def paginar(clave, obtener_pagina):
+    """
+    Retorna (filas, siguiente) de la página que se está mostrando.
+
+    `obtener_pagina(after)` debe retornar (filas, siguiente) como
+    obtener_clases_pagina. En st.session_state[clave] se guarda la pila de
+    cursores de las páginas visitadas, así que volver atrás no requiere
+    consultar en sentido inverso.
+    """
+    pila = st.session_state.setdefault(clave, [])
+    filas, siguiente = obtener_pagina(pila[-1] if pila else None)
+    # Si se eliminaron todas las filas de esta página, volver a la anterior
+    while not filas and pila:
+        pila.pop()
+        filas, siguiente = obtener_pagina(pila[-1] if pila else None)
+    return filas, siguiente
+
+
+def controles_paginacion(clave, siguiente):
+    """
+    Dibuja los botones Anterior/Siguiente de una lista paginada con paginar().
+
+    Los botones mueven la pila en un callback, antes del rerun: dentro de un
+    fragmento solo se vuelve a ejecutar el fragmento, y una sola vez.
+    """
+    pila = st.session_state.setdefault(clave, [])
+    if not pila and siguiente is None:
+        return
+
+    col_anterior, col_pagina, col_siguiente = st.columns([1, 2, 1])
+    with col_anterior:
+        st.button("⬅️ Anterior", key=f"{clave}_anterior", disabled=not pila, on_click=pila.pop)
+    with col_pagina:
+        st.markdown(f"<p style='text-align: center;'>Página {len(pila) + 1}</p>", unsafe_allow_html=True)
+    with col_siguiente:
+        st.button(
+            "Siguiente ➡️",
+            key=f"{clave}_siguiente",
+            disabled=siguiente is None,
+            on_click=pila.append,
+            args=(siguiente,),
+        )
@@ -0,0 +1,37 @@
+import streamlit as st
+
+from database.db_manager import buscar_diplomados
+
+# Diplomados que se envían como máximo al navegador en cada selector
+LIMITE_RESULTADOS = 20
+
+
+def hay_diplomados():
+    """Indica si existe al menos un diplomado activo"""
+    return bool(buscar_diplomados("", 1))
+
+
+def selector_diplomado(etiqueta, clave, limite=LIMITE_RESULTADOS):
+    """
+    Campo de búsqueda y selector con los primeros diplomados que coinciden.
+
+    Solo se consultan y se envían al navegador `limite` diplomados, sin importar
+    el tamaño del catálogo. Retorna el DiplomadoResumen elegido (id y nombre)
+    o None si ninguno empieza por el texto buscado.
+    """
+    texto = st.text_input(
+        "🔎 Buscar diplomado",
+        key=f"{clave}_busqueda",
+        placeholder="Escribe el inicio del nombre (sin importar mayúsculas ni acentos)",
+    )
+    diplomados = buscar_diplomados(texto, limite)
+
+    if not diplomados:
+        st.info(f"🔎 Ningún diplomado empieza por \"{texto}\"")
+        return None
+
+    opciones = {d.nombre: d for d in diplomados}
+    seleccionado = st.selectbox(etiqueta, options=list(opciones.keys()), key=clave)
+    if len(diplomados) == limite:
+        st.caption(f"Se muestran los primeros {limite} resultados; escribe más letras para acotar la búsqueda.")
+    return opciones[seleccionado]
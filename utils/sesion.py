@@ -0,0 +1,13 @@
+import uuid
+
+import streamlit as st
+
+
+def id_sesion():
+    """
+    Identificador aleatorio de la sesión del navegador.
+
+    Se usa como clave del límite de intentos de contraseña; no es secreto ni
+    sirve para autenticar.
+    """
+    return st.session_state.setdefault("id_sesion", uuid.uuid4().hex)
@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+
+import streamlit as st
+
+from database.db_manager import iniciar_traza, terminar_traza
+
+
+@contextmanager
+def trazar_ejecucion(nombre):
+    """
+    Guarda las consultas SQL del bloque y, al terminar, las muestra en un panel plegable.
+
+    Solo hace algo con DB_TRAZA_CONSULTAS=1, y el panel solo se muestra con
+    sesión de administrador (ver panel_traza). Si el bloque termina con
+    st.rerun(), st.switch_page() o st.stop() no se muestra nada: el panel
+    aparece en la ejecución que llega al final. Dentro de la ejecución de su
+    página un fragmento no inicia otra traza; cuando se vuelve a ejecutar solo
+    el fragmento, muestra la suya al final del fragmento.
+    """
+    traza = iniciar_traza(nombre)
+    try:
+        yield traza
+    finally:
+        terminar_traza(traza)
+    if traza is not None:
+        panel_traza(traza)
+
+
+def panel_traza(traza):
+    """
+    Dibuja el resumen de una TrazaConsultas y sus candidatas a N+1.
+
+    Solo para el administrador: a cualquier otra sesión no le muestra nada. El
+    SQL se muestra por su forma, sin los valores de los parámetros.
+    """
+    if st.session_state.get('tipo_usuario') != 'admin':
+        return
+
+    candidatas = traza.candidatas_n_mas_1()
+    titulo = (
+        f"🔬 SQL de {traza.nombre}: {len(traza.sentencias)} consultas, "
+        f"{traza.ms_sql:.1f} ms de {traza.ms_total:.0f} ms"
+    )
+    if candidatas:
+        titulo += f" · ⚠️ {len(candidatas)} posibles N+1"
+
+    with st.expander(titulo, expanded=False):
+        for candidata in candidatas:
+            que = "Misma consulta en" if candidata.tipo == "consulta" else "Misma llamada repetida"
+            st.warning(
+                f"**{que} {candidata.veces} llamadas** ({candidata.ms:.1f} ms): `{candidata.descripcion}`  \n"
+                + "  \n".join(candidata.origenes)
+            )
+
+        st.markdown(f"**Llamadas a db_manager ({len(traza.llamadas)})**")
+        st.dataframe(
+            [
+                {"función": llamada.funcion, "desde": llamada.llamador, "ms": round(llamada.ms, 2),
+                 "consultas": llamada.consultas}
+                for llamada in traza.llamadas
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )
+
+        st.markdown(f"**Sentencias ({len(traza.sentencias)})**")
+        st.dataframe(
+            [
+                {"ms": round(sentencia.ms, 2), "función": sentencia.funcion, "desde": sentencia.llamador,
+                 "sql": sentencia.forma}
+                for sentencia in traza.sentencias
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )